@@ -1,92 +1,42 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from datetime import datetime, date
-import pytz
+from datetime import datetime, date, timedelta
+import functools
 import os
-import requests
-import altair as alt
-import unicodedata
-import random
-
-
-# --------------------------------------------------
-# Normalización de texto
-# --------------------------------------------------
-def _normalize_text(s: str) -> str:
-    """
-    Normaliza texto para comparaciones robustas:
-    - Convierte a string
-    - Quita espacios al inicio y final
-    - Pasa a minúsculas
-    - Elimina acentos
-    - Quita caracteres que no sean letras o números
-    """
-    if s is None or (isinstance(s, float) and pd.isna(s)):
-        return ""
-    s = str(s).strip().lower()
-
-    # Quitar acentos
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-
-    # Quitar espacios y signos de puntuación, dejar solo letras y números
-    s = "".join(ch for ch in s if ch.isalnum())
-    return s
-
-
-def norm(s: str) -> str:
-    """Alias de _normalize_text para nombres de columnas, etc."""
-    return _normalize_text(s)
-
-
-def norm_producto(s: str) -> str:
-    """Normalizador específico para nombres de producto."""
-    return _normalize_text(s)
-
-
-# --------------------------------------------------
-# Tema Altair
-# --------------------------------------------------
-def hp_altair_theme():
-    return {
-        "config": {
-            "background": "rgba(0,0,0,0)",
-            "view": {"stroke": "transparent"},
-            "axis": {
-                "labelColor": "#64748B",  # slate-500
-                "titleColor": "#0F172A",  # slate-900
-                "gridColor": "#E5E7EB",
-            },
-            "legend": {
-                "labelColor": "#0F172A",
-                "titleColor": "#0F172A",
-            },
-            "line": {
-                "strokeWidth": 3,
-            },
-            "range": {
-                "category": [
-                    "#0F172A",  # negro para Masaryk
-                    "#06B6D4",  # cyan
-                    "#A855F7",  # violeta
-                    "#22C55E",  # verde
-                    "#F97316",  # naranja
-                    "#EC4899",  # rosa
-                ]
-            },
-        }
-    }
-
+import uuid
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from inventario.bandeja_salida import FALLIDO
+from inventario.busqueda import indice_productos
+from inventario.catalogo import resolver_lineas, vistas_catalogo
+from inventario.config import ZONA_HORARIA, bandeja, directorio_perfil, registro_perfil_activo
+from inventario.envios import (
+    cargar_movimientos_por_bloques,
+    encolar_recepcion,
+    encolar_requerimientos,
+    generar_folio_recepcion,
+    generar_folio_requerimiento,
+    leer_archivo_movimientos,
+)
+from inventario.hojas import (
+    buscar_folio_requerimiento,
+    folios_abiertos,
+    load_catalogo_productos,
+    load_requerimientos_from_gsheet,
+    obtener_historial_recepciones,
+    pendientes_de_folio,
+    requerimientos_con_archivo,
+    resumen_estatus,
+    version_catalogo,
+)
+from inventario.perfil import Rerun, configurar_registro, iniciar_rerun, medido, medir
+from inventario.tema import CSS, ENCABEZADO_HTML, LOGO_URL
 
-alt.themes.register("hp_theme", hp_altair_theme)
-alt.themes.enable("hp_theme")
 
 # --------------------------------------------------
 # Configuración básica de la página
 # --------------------------------------------------
-LOGO_URL = "https://raw.githubusercontent.com/apalma-hps/Dashboard-Ventas-HP/49cbb064b6dcf8eecaa4fb39292d9fe94f357d49/logo_hp.png"
-
 st.set_page_config(
     page_title="Inventario – Movimientos",
     page_icon=LOGO_URL,
@@ -94,261 +44,10 @@ st.set_page_config(
 )
 
 # --------------------------------------------------
-# THEME VISUAL (CSS)
-# --------------------------------------------------
-st.markdown(
-    """
-<style>
-    body {
-        background: #E5F3FF !important;
-    }
-
-    .stApp {
-        background: linear-gradient(135deg, #E0F2FE 0%, #ECFDF5 50%, #FDF2F8 100%) !important;
-        color: #0F172A !important;
-        font-family: system-ui, -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-    }
-
-    header[data-testid="stHeader"] {
-        background: transparent !important;
-    }
-    header[data-testid="stHeader"] > div {
-        background: transparent !important;
-    }
-
-    main.block-container {
-        padding-top: 1rem !important;
-    }
-
-    section[data-testid="stSidebar"] {
-        background-color: #FFFFFF !important;
-        border-right: 1px solid #E5E7EB !important;
-    }
-    section[data-testid="stSidebar"] * {
-        color: #0F172A !important;
-    }
-
-    h1, h2, h3, .stMarkdown h1, .stMarkdown h2 {
-        color: #0F172A !important;
-        font-weight: 700 !important;
-    }
-    h4, h5 {
-        color: #111827 !important;
-        font-weight: 600 !important;
-    }
-
-    label, span, p, li, .stMarkdown, [data-testid="stMarkdownContainer"] * {
-        color: #0F172A !important;
-    }
-
-    a {
-        color: #06B6D4 !important;
-        text-decoration: none !important;
-    }
-    a:hover {
-        color: #0E7490 !important;
-        text-decoration: underline !important;
-    }
-
-    button[kind="primary"],
-    button[kind="secondary"],
-    button[data-testid^="baseButton"] {
-        background: linear-gradient(135deg, #06B6D4, #22C55E) !important;
-        color: #FFFFFF !important;
-        border-radius: 999px !important;
-        border: none !important;
-        box-shadow: 0 8px 20px rgba(8, 145, 178, 0.25) !important;
-        font-weight: 600 !important;
-    }
-    button[kind="primary"]:hover,
-    button[kind="secondary"]:hover,
-    button[data-testid^="baseButton"]:hover {
-        background: linear-gradient(135deg, #0891B2, #16A34A) !important;
-    }
-
-    [data-testid="stNumberInput"] button {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border: 1px solid #D1D5DB !important;
-        border-radius: 0.75rem !important;
-        box-shadow: none !important;
-    }
-
-    input,
-    .stTextInput > div > input,
-    .stNumberInput input,
-    textarea {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border: 1px solid #D1D5DB !important;
-        border-radius: 0.75rem !important;
-        padding: 0.45rem 0.75rem !important;
-    }
-    input:focus,
-    .stTextInput > div > input:focus,
-    .stNumberInput input:focus,
-    textarea:focus {
-        outline: 2px solid #06B6D4 !important;
-        border-color: #06B6D4 !important;
-    }
-
-    [data-testid="stDateInput"] input {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border: 1px solid #D1D5DB !important;
-        border-radius: 0.75rem !important;
-    }
-
-    div[data-baseweb="select"] > div {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border-radius: 0.75rem !important;
-        border: 1px solid #D1D5DB !important;
-    }
-    div[data-baseweb="select"] svg {
-        color: #64748B !important;
-    }
-
-    [data-baseweb="menu"],
-    [data-baseweb="popover"] [data-baseweb="menu"] {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border-radius: 0.75rem !important;
-        border: 1px solid #E5E7EB !important;
-        box-shadow: 0 18px 45px rgba(15,23,42,0.18) !important;
-    }
-
-    [data-baseweb="menu"] ul[role="listbox"],
-    [data-baseweb="menu"] div[role="listbox"] {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-    }
-
-    [data-baseweb="menu"] [role="option"],
-    [data-baseweb="menu"] li[role="option"] {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-    }
-
-    [data-baseweb="menu"] [role="option"][aria-selected="true"],
-    [data-baseweb="menu"] [role="option"]:hover {
-        background-color: #DBEAFE !important;
-        color: #0F172A !important;
-    }
-
-    .dataframe {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-        border-radius: 1rem !important;
-        border: 1px solid #E5E7EB !important;
-        box-shadow: 0 10px 30px rgba(15, 23, 42, 0.06) !important;
-    }
-
-    [data-testid="stDataFrame"],
-    [data-testid="stTable"] {
-        background-color: #FFFFFF !important;
-    }
-
-    [data-testid="stDataFrame"] table,
-    [data-testid="stTable"] table {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-    }
-
-    [data-testid="stDataFrame"] th,
-    [data-testid="stTable"] th {
-        background-color: #F8FAFC !important;
-        color: #0F172A !important;
-        font-weight: 600 !important;
-    }
-
-    [data-testid="stDataFrame"] td,
-    [data-testid="stTable"] td {
-        background-color: #FFFFFF !important;
-        color: #0F172A !important;
-    }
-
-    [data-testid="stDataFrame"] tr:hover td,
-    [data-testid="stTable"] tr:hover td {
-        background-color: #F1F5F9 !important;
-    }
-
-    [data-testid="stMetric"] {
-        background-color: #FFFFFF !important;
-        border-radius: 1.5rem !important;
-        padding: 1.2rem 1.5rem !important;
-        box-shadow: 0 18px 45px rgba(15, 23, 42, 0.08) !important;
-        border: 1px solid rgba(148, 163, 184, 0.25) !important;
-    }
-
-    .stSuccess {
-        background-color: #ECFDF5 !important;
-        color: #16A34A !important;
-        border-left: 4px solid #16A34A !important;
-    }
-    .stError {
-        background-color: #FEF2F2 !important;
-        color: #DC2626 !important;
-        border-left: 4px solid #DC2626 !important;
-    }
-    .stWarning {
-        background-color: #FFFBEB !important;
-        color: #92400E !important;
-        border-left: 4px solid #F59E0B !important;
-    }
-
-</style>
-""",
-    unsafe_allow_html=True,
-)
-
-# --------------------------------------------------
-# Encabezado con logo
+# THEME VISUAL (CSS) y encabezado con logo (ver inventario.tema)
 # --------------------------------------------------
-st.markdown(
-    f"""
-    <div style="
-        display:flex;
-        align-items:center;
-        gap:20px;
-        margin-top:10px;
-        margin-bottom:25px;
-        padding:18px 22px;
-        background-color: rgba(255,255,255,0.9);
-        border-radius: 24px;
-        box-shadow: 0 18px 45px rgba(15,23,42,0.08);
-    ">
-        <img src="{LOGO_URL}" 
-             style="
-                width:80px; 
-                height:80px; 
-                object-fit:contain; 
-                border-radius:50%; 
-                background:white;
-                box-shadow: 0 4px 12px rgba(15,23,42,0.18);
-             "/>
-        <div>
-            <h1 style="
-                font-size: 1.9rem; 
-                font-weight:700; 
-                margin:0; 
-                padding:0;
-                color:#0F172A;
-            ">
-                Sistema de Gestión de Inventario y Requerimientos
-            </h1>
-            <p style="
-                margin:4px 0 0 0;
-                color:#64748B;
-                font-size:0.95rem;
-            ">
-                Operación diaria · Control de insumos · Trazabilidad por restaurante
-            </p>
-        </div>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+st.markdown(CSS, unsafe_allow_html=True)
+st.markdown(ENCABEZADO_HTML, unsafe_allow_html=True)
 
 # --------------------------------------------------
 # URL plantilla inventario (por si se usa después)
@@ -360,71 +59,32 @@ PLANTILLA_INVENTARIO_XLSX_URL = (
 )
 
 # --------------------------------------------------
-# Columnas inventario / requerimientos / recepción
+# Tablas y paginación (las columnas de cada hoja están en inventario.esquemas)
 # --------------------------------------------------
-USER_COLUMNS = [
-    "Tipo",
-    "CECO_Origen",
-    "CECO_Destino",
-    "Proveedor",
-    "Pedido_Ref",
-    "SKU",
-    "Producto",
-    "Cantidad",
-    "UoM",
-    "Precio_Unitario",
-    "Subtotal",
-    "Lote",
-    "Caducidad",
-    "Temperatura",
-    "Observaciones",
-    "Folio",
-    "Usuario",
-    "Chofer",
-    "Unidad",
-    "Recibido",
-    "CECO_DESTINO",
-]
-
-REQUERIMIENTOS_COLUMNS = [
-    "FECHA DE PEDIDO",
-    "PROVEDOR",
-    "INSUMO",
-    "UNIDAD DE MEDIDA",
-    "COSTO UNIDAD",
-    "CANTIDAD",
-    "COSTO TOTAL",
-    "FECHA DESEADA",
-    "OBSERVACIONES",
-    "ESTATUS",
-    "ID_REQ",
-    "Hora",
-    "CECO_DESTINO",
-    "CATEGORIA",
-    "Fecha aproximada de entrega",
-    "SKU",
-]
-
-# Para enviar a Apps Script de recepción (hoja Recepción o script que actualiza Requerimientos)
-RECEPCION_COLUMNS = [
-    "Fecha de recepción",
-    "PROVEEDOR",
-    "FACTURA / TICKET",
-    "SKU",
-    "PRODUCTO",
-    "UNIDAD DE MEDIDA",
-    "CANTIDAD PO",
-    "CANTIDAD RECIBIDA",
-    "TEMP (°C)",
-    "CALIDAD (OK / RECHAZO)",
-    "OBSERVACIONES",
-    "RECIBIÓ",
-    "FOLIO",
-    "APROBÓ",
-    "ID DE REQUERIMIENTO AL QUE CORRESPONDE",
-    "Folio Generado de Recepcion",
-    "fecha de caducidad",
-]
+# Las fechas de requerimientos se cargan como datetime (ver inventario.esquemas)
+COLUMN_CONFIG_FECHAS = {
+    "FECHA DE PEDIDO": st.column_config.DateColumn("FECHA DE PEDIDO", format="YYYY-MM-DD"),
+    "FECHA DESEADA": st.column_config.DateColumn("FECHA DESEADA", format="YYYY-MM-DD"),
+}
+
+COLUMN_CONFIG_AVANCE = {
+    "% RECIBIDO": st.column_config.ProgressColumn(
+        "% recibido", format="%.0f%%", min_value=0, max_value=100,
+    ),
+}
+
+# Filas por página en el tablero de folios abiertos
+FOLIOS_POR_PAGINA = 50
+
+# Listado de estatus de requerimientos: filas por página y rango inicial (días)
+ESTATUS_POR_PAGINA = 50
+DIAS_ESTATUS = 90
+
+# Resultados que muestra el buscador de productos del requerimiento
+RESULTADOS_BUSQUEDA = 30
+
+# Hoja que se lee al importar un requerimiento desde Excel
+HOJA_IMPORTAR_REQUERIMIENTO = "Requerimiento"
 
 # --------------------------------------------------
 # Session state
@@ -440,6 +100,14 @@ if "ultimo_inventario_hora" not in st.session_state:
 
 if "carrito_req" not in st.session_state:
     st.session_state["carrito_req"] = []
+# Cambia la key del editor del carrito cuando se agregan o quitan filas.
+if "carrito_version" not in st.session_state:
+    st.session_state["carrito_version"] = 0
+if "aviso_carrito" not in st.session_state:
+    st.session_state["aviso_carrito"] = None
+# Folio registrado ("" tras vaciar) que se avisa después del rerun del carrito.
+if "aviso_envio_req" not in st.session_state:
+    st.session_state["aviso_envio_req"] = None
 if "carrito_recepcion" not in st.session_state:
     st.session_state["carrito_recepcion"] = []
 
@@ -451,270 +119,71 @@ if "req_recepcion_id" not in st.session_state:
 if "editor_version" not in st.session_state:
     st.session_state["editor_version"] = 0
 
+if "aviso_recepcion" not in st.session_state:
+    st.session_state["aviso_recepcion"] = None
+if "folios_recepcion_enviados" not in st.session_state:
+    st.session_state["folios_recepcion_enviados"] = []
 
-# --------------------------------------------------
-# Funciones auxiliares – Inventario (por si las usas)
-# --------------------------------------------------
-@st.cache_data
-def load_movimientos_template_from_gsheet() -> pd.DataFrame:
-    sheet_url = st.secrets["MOVIMIENTOS_TEMPLATE_CSV_URL"]
-
-    try:
-        df = pd.read_csv(sheet_url, nrows=0)
-    except pd.errors.ParserError:
-        df_full = pd.read_csv(
-            sheet_url,
-            engine="python",
-            on_bad_lines="skip"
-        )
-        df = df_full.iloc[0:0].copy()
-
-    df.columns = df.columns.str.strip()
-    return df
-
-
-def df_to_excel_bytes(df: pd.DataFrame, sheet_name: str = "Movimientos") -> BytesIO:
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-    output.seek(0)
-    return output
-
-
-def detectar_extension(nombre_archivo: str) -> str:
-    return os.path.splitext(nombre_archivo)[1].lower().replace(".", "")
-
-
-def leer_archivo_movimientos(uploaded_file) -> pd.DataFrame:
-    nombre = uploaded_file.name
-    ext = detectar_extension(nombre)
-
-    if ext in ["xlsx", "xls"]:
-        try:
-            df = pd.read_excel(uploaded_file, sheet_name="Movimientos_Inventario")
-        except ValueError:
-            st.warning(
-                "El archivo Excel no tiene una hoja llamada 'Movimientos_Inventario'. "
-                "Se leerá la primera hoja disponible; revisa que sea la correcta."
-            )
-            df = pd.read_excel(uploaded_file)
-    elif ext == "csv":
-        try:
-            df = pd.read_csv(uploaded_file)
-        except UnicodeDecodeError:
-            df = pd.read_csv(uploaded_file, encoding="latin1")
-    else:
-        st.error(
-            f"Tipo de archivo no soportado: .{ext}. Usa archivos Excel (.xlsx, .xls) o CSV."
-        )
-        st.stop()
-
-    df.columns = df.columns.astype(str).str.strip()
-    return df
-
-
-def validar_y_ordenar_columnas(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = df.columns.astype(str).str.strip()
-
-    missing = [c for c in USER_COLUMNS if c not in df.columns]
-    if missing:
-        st.error(
-            "El archivo cargado no contiene todas las columnas requeridas.\n"
-            f"Faltan las columnas: {missing}\n\n"
-            "Asegúrate de haber usado la plantilla descargada y de no haber cambiado los nombres."
-        )
-        st.stop()
-
-    df = df[USER_COLUMNS].copy()
-    return df
-
-
-def generar_folio_inventario() -> tuple[str, str, str]:
-    tz = pytz.timezone("America/Mexico_City")
-    ahora = datetime.now(tz)
-    folio = ahora.strftime("INV-%Y%m%d-%H%M%S")
-    fecha = ahora.date().isoformat()
-    hora = ahora.strftime("%H:%M:%S")
-    return folio, fecha, hora
-
-
-def agregar_campos_sistema(df: pd.DataFrame, folio: str, fecha: str, hora: str) -> pd.DataFrame:
-    df = df.copy()
-    df["ID"] = folio
-    df["Fecha_Carga"] = fecha
-    df["Hora_Carga"] = hora
-
-    ordered_cols = (
-            ["ID"] +
-            [c for c in USER_COLUMNS if c in df.columns] +
-            [c for c in ["Fecha_Carga", "Hora_Carga"] if c in df.columns]
-    )
-    df = df[ordered_cols]
-    return df
-
-
-def enviar_a_consolidado(df: pd.DataFrame):
-    url = st.secrets.get("APPS_SCRIPT_CONSOLIDADO_URL", "")
-
-    if not url:
-        st.warning(
-            "No se configuró APPS_SCRIPT_CONSOLIDADO_URL en secrets. No se enviará nada al consolidado."
-        )
-        return
-
-    df_json = df.copy()
-
-    def to_jsonable(x):
-        if isinstance(x, (pd.Timestamp, datetime, date)):
-            return x.isoformat()
-        return x
-
-    df_json = df_json.map(to_jsonable)
-    df_json = df_json.astype(object).where(pd.notnull(df_json), None)
+if "estatus_listado" not in st.session_state:
+    st.session_state["estatus_listado"] = False
 
-    rows = df_json.values.tolist()
-    payload = {"rows": rows}
+if "perfil_sesion" not in st.session_state:
+    st.session_state["perfil_sesion"] = uuid.uuid4().hex[:8]
 
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
-        if resp.status_code == 200:
-            try:
-                data = resp.json()
-            except Exception:
-                data = {}
-            if data.get("status") == "ok":
-                st.success(
-                    f"Movimientos enviados al consolidado en Google Sheets. "
-                    f"Filas insertadas: {data.get('inserted', 'desconocido')}."
-                )
-            else:
-                st.warning(
-                    "Se recibió respuesta de Apps Script pero con estado distinto de 'ok'. "
-                    f"Respuesta: {data}"
-                )
-        else:
-            st.error(
-                f"No se pudo enviar al consolidado. Código HTTP: {resp.status_code}"
-            )
-    except Exception as e:
-        st.error("Error al enviar al consolidado.")
-        st.exception(e)
+# Tiempos de este rerun; el panel lateral muestra los del rerun anterior
+# (el actual sigue en curso cuando se dibuja).
+configurar_registro(directorio_perfil() if registro_perfil_activo() else None)
+st.session_state["perfil_anterior"] = st.session_state.get("perfil_rerun")
+st.session_state["perfil_rerun"] = iniciar_rerun(sesion=st.session_state["perfil_sesion"])
 
 
-# --------------------------------------------------
-# Funciones auxiliares – Catálogo / Requerimientos / Recepción
-# --------------------------------------------------
-@st.cache_data
-def load_catalogo_productos() -> pd.DataFrame:
+def mostrar_pagina(
+        df: pd.DataFrame,
+        key: str,
+        por_pagina: int,
+        descripcion: str,
+        column_config: dict | None = None,
+):
     """
-    Carga el catálogo desde CATALOGO_CSV_URL,
-    normaliza columnas y genera PRODUCTO_KEY.
+    Selector de página y `st.dataframe` sólo con esa página de `df`: al
+    navegador se manda la página visible, no la tabla completa.
     """
-    url = st.secrets.get("CATALOGO_CSV_URL", "")
-    if not url:
-        raise ValueError(
-            "No se encontró CATALOGO_CSV_URL en secrets. "
-            "Debes apuntar al CSV de la hoja 'Catálogo'."
-        )
-
-    try:
-        df = pd.read_csv(url)
-    except pd.errors.ParserError:
-        df = pd.read_csv(url, engine="python", on_bad_lines="skip")
-
-    df.columns = df.columns.astype(str).str.strip()
-
-    rename_map = {}
-    for col in df.columns:
-        n = norm(col)
-        if n == "nombre":
-            rename_map[col] = "Producto"
-        elif n in ("categoriadeproducto", "categoríadeproducto"):
-            rename_map[col] = "Categoria"
-        elif n in ("referenciainterna", "sku"):
-            rename_map[col] = "Referencia Interna"
-        elif n in ("udmdecompra", "unidaddecompra", "udmcompra"):
-            rename_map[col] = "UdM de Compra"
-        elif n in ("proveedor", "provedor"):
-            rename_map[col] = "Proveedor"
-
-    df = df.rename(columns=rename_map)
-
-    required = ["Producto", "Categoria", "Referencia Interna"]
-    for c in required:
-        if c not in df.columns:
-            raise ValueError(
-                "La hoja 'Catálogo' debe contener al menos "
-                "'Nombre', 'Categoría de producto' y 'Referencia interna'. "
-                f"Columnas leídas: {list(df.columns)}"
-            )
-
-    df = df[df["Producto"].notna()].copy()
-    df["Producto"] = df["Producto"].astype(str).str.strip()
-    df["Categoria"] = df["Categoria"].astype(str).str.strip()
-    df["Referencia Interna"] = df["Referencia Interna"].astype(str).str.strip()
-
-    df["UdM de Compra"] = (
-        df.get("UdM de Compra", "pz")
-        .astype(str)
-        .fillna("pz")
-        .str.strip()
+    total_paginas = max(1, -(-len(df) // por_pagina))
+    # Si los filtros dejaron menos páginas que la elegida, se regresa a la última.
+    if st.session_state.get(key, 1) > total_paginas:
+        st.session_state[key] = total_paginas
+    pagina = st.number_input(
+        f"Página (de {total_paginas})",
+        min_value=1,
+        max_value=total_paginas,
+        value=1,
+        step=1,
+        key=key,
     )
-    df["Proveedor"] = (
-        df.get("Proveedor", "")
-        .astype(str)
-        .fillna("")
-        .str.strip()
+    inicio = (int(pagina) - 1) * por_pagina
+    pagina_df = df.iloc[inicio:inicio + por_pagina].reset_index(drop=True)
+    with medir(f"render: {key}", filas=len(pagina_df)):
+        st.dataframe(
+            pagina_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=column_config,
+        )
+    st.caption(
+        f"Mostrando {inicio + 1}–{min(inicio + por_pagina, len(df))} "
+        f"de {len(df)} {descripcion}."
     )
 
-    df = df[
-        (df["Producto"] != "") &
-        (df["Producto"].str.lower() != "nan")
-        ].reset_index(drop=True)
-
-    df["PRODUCTO_KEY"] = df["Producto"].apply(norm_producto)
-
-    return df
-
-
-@st.cache_data
-def load_requerimientos_from_gsheet() -> pd.DataFrame:
-    url = st.secrets.get("REQUERIMIENTOS_CSV_URL", "")
-    if not url:
-        raise ValueError("No se encontró REQUERIMIENTOS_CSV_URL en secrets.")
-
-    try:
-        df = pd.read_csv(url)
-    except pd.errors.ParserError:
-        df = pd.read_csv(url, engine="python", on_bad_lines="skip")
-
-    df.columns = df.columns.astype(str).str.strip()
-    return df
-
-
-@st.cache_data
-def load_recepcion_from_gsheet() -> pd.DataFrame:
-    url = st.secrets.get("RECEPCION_CSV_URL", "")
-    if not url:
-        raise ValueError("No se encontró RECEPCION_CSV_URL en secrets.")
-
-    try:
-        df = pd.read_csv(url)
-    except pd.errors.ParserError:
-        df = pd.read_csv(url, engine="python", on_bad_lines="skip")
-
-    df.columns = df.columns.astype(str).str.strip()
-    return df
-
 
 # --------------------------------------------------
 # Funciones para recepciones parciales
 # --------------------------------------------------
+@medido("recepción: pendientes por producto")
 def calcular_pendientes_por_producto(id_req: str, df_req_folio: pd.DataFrame) -> pd.DataFrame:
     """
-    Calcula la cantidad pendiente por producto usando los datos de la misma hoja de requerimientos.
-    Las columnas CANTIDAD RECIBIDA y CANTIDAD PENDIENTE ya vienen en df_req_folio.
+    Cantidad pedida, recibida y pendiente por producto del requerimiento.
+    Se lee de la tabla de pendientes (ver inventario.pendientes), que ya
+    incluye las recepciones registradas que la hoja aún no refleja.
     """
 
     with st.expander("🔍 DEBUG: Columnas disponibles en requerimiento", expanded=False):
@@ -723,586 +192,409 @@ def calcular_pendientes_por_producto(id_req: str, df_req_folio: pd.DataFrame) ->
         st.write("**Primeras filas:**")
         st.dataframe(df_req_folio.head(5))
 
-    col_cant_recibida = None
-    col_cant_pendiente = None
-
-    for col in df_req_folio.columns:
-        col_lower = col.lower().strip()
-        if "cantidad recibida" in col_lower and col_cant_recibida is None:
-            col_cant_recibida = col
-        if "cantidad pendiente" in col_lower and col_cant_pendiente is None:
-            col_cant_pendiente = col
-
-    group_cols = ["INSUMO"]
-    if "SKU" in df_req_folio.columns:
-        group_cols = ["INSUMO", "SKU"]
-
-    df_req_folio["CANTIDAD"] = pd.to_numeric(df_req_folio["CANTIDAD"], errors="coerce").fillna(0.0)
-
-    if col_cant_recibida:
-        df_req_folio[col_cant_recibida] = pd.to_numeric(df_req_folio[col_cant_recibida], errors="coerce").fillna(0.0)
-
-    if col_cant_pendiente:
-        df_req_folio[col_cant_pendiente] = pd.to_numeric(df_req_folio[col_cant_pendiente], errors="coerce").fillna(0.0)
-
-    agg_dict = {"CANTIDAD": "sum"}
-    if col_cant_recibida:
-        agg_dict[col_cant_recibida] = "sum"
-    if col_cant_pendiente:
-        agg_dict[col_cant_pendiente] = "sum"
-
-    base_df = df_req_folio.groupby(group_cols, as_index=False).agg(agg_dict)
-    base_df = base_df.rename(columns={"CANTIDAD": "CANTIDAD PO"})
-
-    if col_cant_recibida:
-        base_df = base_df.rename(columns={col_cant_recibida: "CANTIDAD RECIBIDA TOTAL"})
-    else:
-        base_df["CANTIDAD RECIBIDA TOTAL"] = 0.0
-
-    base_df["CANTIDAD PENDIENTE"] = (
-            base_df["CANTIDAD PO"] - base_df["CANTIDAD RECIBIDA TOTAL"]
+    base_df = (
+        pendientes_de_folio(id_req)
+        .drop(columns="ID_REQ")
+        .sort_values(["INSUMO", "SKU"])
+        .reset_index(drop=True)
     )
 
-    base_df["CANTIDAD PENDIENTE"] = (
-        base_df["CANTIDAD PENDIENTE"]
-        .fillna(0)
-        .clip(lower=0)
-    )
-
-    base_df["CANTIDAD PENDIENTE"] = base_df["CANTIDAD PENDIENTE"].clip(lower=0)
-
-    if "SKU" not in base_df.columns:
-        base_df["SKU"] = ""
-
-    if "PROVEDOR" in df_req_folio.columns:
-        prov_map = df_req_folio[["INSUMO", "PROVEDOR"]].drop_duplicates(subset=["INSUMO"])
-        prov_map["INSUMO"] = prov_map["INSUMO"].astype(str).str.strip()
-        base_df["INSUMO"] = base_df["INSUMO"].astype(str).str.strip()
-        base_df = base_df.merge(prov_map, on="INSUMO", how="left")
-        base_df.rename(columns={"PROVEDOR": "PROVEEDOR"}, inplace=True)
-    else:
-        base_df["PROVEEDOR"] = ""
-
     with st.expander("🔍 DEBUG: Resultado de pendientes calculados", expanded=False):
-        st.write(f"**Columna de recibido encontrada:** `{col_cant_recibida}`")
-        st.write(f"**Columna de pendiente encontrada:** `{col_cant_pendiente}`")
         st.dataframe(base_df)
 
     return base_df
 
 
-def obtener_historial_recepciones(id_req: str) -> pd.DataFrame:
-    """
-    Obtiene el historial de recepciones para un requerimiento.
-    Como todo está en la misma hoja, filtra las filas que tienen folio de recepción.
-    """
-    try:
-        load_requerimientos_from_gsheet.clear()
-        req_df = load_requerimientos_from_gsheet()
-        req_df.columns = req_df.columns.astype(str).str.strip()
-    except Exception:
-        return pd.DataFrame()
-
-    if req_df.empty or "ID_REQ" not in req_df.columns:
-        return pd.DataFrame()
-
-    req_folio = req_df[
-        req_df["ID_REQ"].astype(str).str.strip() == id_req.strip()
-        ].copy()
-
-    col_folio_recep = None
-    for col in req_folio.columns:
-        if "folio" in col.lower() and "recep" in col.lower():
-            col_folio_recep = col
-            break
-
-    if col_folio_recep and col_folio_recep in req_folio.columns:
-        req_folio = req_folio[req_folio[col_folio_recep].notna() & (req_folio[col_folio_recep] != "")]
-
-    return req_folio
-
-
-def generar_folio_requerimiento() -> tuple[str, str, str]:
-    tz = pytz.timezone("America/Mexico_City")
-    ahora = datetime.now(tz)
-    folio = ahora.strftime("REQ-%Y%m%d-%H%M%S")
-    fecha = ahora.date().isoformat()
-    hora = ahora.strftime("%H:%M:%S")
-    return folio, fecha, hora
-
-
-def generar_folio_recepcion() -> tuple[str, str, str]:
-    tz = pytz.timezone("America/Mexico_City")
-    ahora = datetime.now(tz)
-    folio = ahora.strftime("REC-%Y%m%d-%H%M%S")
-    fecha = ahora.date().isoformat()
-    hora = ahora.strftime("%H:%M:%S")
-    return folio, fecha, hora
-
+ICONOS_ESTADO_ENVIO = {
+    "pendiente": "🕒 En cola",
+    "enviando": "📤 Enviando",
+    "enviado": "✅ Enviado",
+    "fallido": "❌ Fallido",
+}
 
-def enviar_requerimientos_a_gsheet(lista_req_data):
-    url = st.secrets.get("APPS_SCRIPT_REQUERIMIENTOS_URL", "")
 
-    if not url:
-        st.warning(
-            "No se configuró APPS_SCRIPT_REQUERIMIENTOS_URL en secrets. No se enviarán los requerimientos."
-        )
+def mostrar_envios(folios: list[str] | None = None, limite: int = 10):
+    """Tabla con el estado de entrega de los envíos más recientes (o de `folios`)."""
+    envios = bandeja().envios(folios=folios, limite=limite)
+    if not envios:
+        st.caption("Sin envíos registrados.")
         return
 
-    rows = []
-    for req_data in lista_req_data:
-        row = [req_data.get(col, "") for col in REQUERIMIENTOS_COLUMNS]
-        rows.append(row)
-
-    payload = {"rows": rows}
-
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
-
-        st.markdown("#### Respuesta cruda de Apps Script (requerimientos – debug)")
-        st.code(resp.text, language="json")
-
-        if resp.status_code != 200:
-            st.error(
-                f"No se pudo enviar el requerimiento. Código HTTP: {resp.status_code}"
-            )
-            return
-
-        try:
-            data = resp.json()
-        except Exception as e:
-            st.warning(
-                "La respuesta de Apps Script no es un JSON válido. "
-                "Revisa el contenido mostrado arriba (debug)."
-            )
-            st.exception(e)
-            return
-
-        status = data.get("status")
-        if status == "ok":
-            st.success(
-                f"Requerimiento enviado y registrado. "
-                f"Filas insertadas: {data.get('inserted', 'desconocido')}."
-            )
-        else:
-            st.warning(
-                "Se recibió respuesta de Apps Script pero con estado distinto de 'ok'. "
-                f"Respuesta completa: {data}"
-            )
-
-    except Exception as e:
-        st.error("Error al enviar el requerimiento.")
-        st.exception(e)
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "Folio": [e.folio for e in envios],
+                "Tipo": [e.tipo for e in envios],
+                "Estado": [ICONOS_ESTADO_ENVIO.get(e.estado, e.estado) for e in envios],
+                "Filas": [e.filas for e in envios],
+                "Intentos": [e.intentos for e in envios],
+                "Último error": [e.ultimo_error for e in envios],
+            }
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
 
+    fallidos = [e for e in envios if e.estado == FALLIDO]
+    if fallidos and st.button(
+            f"🔁 Reintentar fallidos ({len(fallidos)})", key=f"reintentar_{folios}"
+    ):
+        for e in fallidos:
+            bandeja().reintentar(e.id)
+        st.rerun()
 
-def enviar_recepcion_a_gsheet(lista_recepcion_data):
-    url = st.secrets.get("APPS_SCRIPT_RECEPCION_URL", "")
 
-    if not url:
-        st.warning(
-            "No se configuró APPS_SCRIPT_RECEPCION_URL en secrets. "
-            "La recepción NO se enviará a la hoja 'Requerimientos'."
-        )
+def mostrar_perfil(rerun: Rerun | None):
+    """Desglose de tiempos de un rerun en la barra lateral."""
+    if rerun is None or not rerun.mediciones:
+        st.sidebar.caption("Sin mediciones todavía; vuelve a interactuar con la página.")
         return
 
-    rows = []
-    for rec_data in lista_recepcion_data:
-        row = [rec_data.get(col, "") for col in RECEPCION_COLUMNS]
-        rows.append(row)
-
-    payload = {
-        "rows": rows,
-        "accion": "registrar_recepcion",
-    }
-
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
+    mediciones = sorted(rerun.mediciones, key=lambda m: m.inicio)
+    st.sidebar.caption(
+        f"Rerun anterior ({rerun.contexto.get('vista', '')}"
+        f"{' · ' + rerun.contexto['seccion'] if 'seccion' in rerun.contexto else ''}): "
+        f"{rerun.ms_medidos:.0f} ms hasta la última medición."
+    )
+    st.sidebar.dataframe(
+        pd.DataFrame({
+            "paso": ["· " * m.nivel + m.nombre for m in mediciones],
+            "ms": [round(m.ms, 1) for m in mediciones],
+            "filas": [m.filas for m in mediciones],
+            "KB": [None if m.bytes is None else round(m.bytes / 1024, 1) for m in mediciones],
+            "caché": [m.cache or "" for m in mediciones],
+            "error": [m.error or "" for m in mediciones],
+        }),
+        hide_index=True,
+        use_container_width=True,
+    )
 
-        if resp.status_code != 200:
-            st.error(
-                f"No se pudo registrar la recepción. Código HTTP: {resp.status_code}"
+    ruta = os.path.join(directorio_perfil(), f"{datetime.now().strftime('%Y-%m-%d')}.jsonl")
+    if os.path.exists(ruta):
+        with open(ruta, "rb") as f:
+            st.sidebar.download_button(
+                "⬇️ Registro de hoy (JSONL)",
+                data=f.read(),
+                file_name=os.path.basename(ruta),
+                mime="application/jsonl",
             )
-            return
 
-        try:
-            data = resp.json()
-        except Exception as e:
-            st.warning(
-                "La respuesta de Apps Script (recepción) no es un JSON válido. "
-                "Revisa el contenido crudo si activas el modo debug."
-            )
-            st.exception(e)
-            return
-
-        status = data.get("status")
-        if status == "ok":
-            inserted = data.get("inserted", None)
-            if inserted is not None:
-                st.success(
-                    f"Recepción registrada correctamente. "
-                    f"Filas insertadas: {inserted}."
-                )
-            else:
-                st.success("Recepción registrada correctamente en Google Sheets.")
-        else:
-            st.warning(
-                "Apps Script respondió pero con status distinto de 'ok'. "
-                f"Respuesta: {data}"
-            )
 
-    except Exception as e:
-        st.error("Error al enviar la recepción a Google Sheets.")
-        st.exception(e)
+# --------------------------------------------------
+# Secciones que se vuelven a ejecutar solas (st.fragment)
+# --------------------------------------------------
+def _rerun_de_seccion() -> bool:
+    """True si este rerun lo pidió un widget de una sección, no la página completa."""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
 
 
-def enviar_nuevo_producto_a_catalogo(nombre: str, categoria: str | None = None):
-    url = st.secrets.get("APPS_SCRIPT_CATALOGO_URL", "")
-    if not url:
-        st.warning(
-            "No se configuró APPS_SCRIPT_CATALOGO_URL en secrets. "
-            "El nuevo producto NO se enviará al catálogo."
-        )
-        return
+def rerun_seccion():
+    """Vuelve a ejecutar sólo la sección actual (o la app, si corre con la página completa)."""
+    st.rerun(scope="fragment" if _rerun_de_seccion() else "app")
 
-    if categoria is None or str(categoria).strip() == "":
-        categoria = "Sin categoría"
 
-    payload = {
-        "accion": "nuevo_producto",
-        "producto": nombre,
-        "categoria": categoria,
-    }
+def seccion(nombre: str):
+    """
+    Decorador: la función es un st.fragment. Al tocar uno de sus widgets sólo
+    se vuelve a ejecutar esa función, no el script completo (session state,
+    carga del catálogo ni las demás secciones); para redibujar el resto hay
+    que llamar st.rerun() (toda la app).
 
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
+    Se mide como "sección: <nombre>"; cuando corre sola abre su propio rerun
+    en el perfil, con la sección en el contexto.
+    """
 
-        st.markdown("#### Respuesta cruda de Apps Script (catálogo – debug)")
-        st.code(resp.text, language="json")
+    def decorador(func):
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            if _rerun_de_seccion():
+                contexto = st.session_state["perfil_rerun"].contexto
+                st.session_state["perfil_rerun"] = iniciar_rerun(**{**contexto, "seccion": nombre})
+            with medir(f"sección: {nombre}"):
+                return func(*args, **kwargs)
 
-        if resp.status_code != 200:
-            st.error(
-                f"No se pudo enviar el nuevo producto. Código HTTP: {resp.status_code}"
-            )
-            return
+        return st.fragment(envoltura)
 
-        try:
-            data = resp.json()
-        except Exception as e:
-            st.warning(
-                "La respuesta de Apps Script (catálogo) no es un JSON válido. "
-                "Revisa el contenido mostrado arriba."
-            )
-            st.exception(e)
-            return
+    return decorador
 
-        status = data.get("status")
-        if status == "ok":
-            if data.get("exists"):
-                st.info(f"El producto '{nombre}' ya existe en el catálogo.")
-            else:
-                st.success(f"Producto '{nombre}' enviado y agregado al catálogo.")
-        else:
-            st.warning(
-                "Apps Script de catálogo respondió con status distinto de 'ok'. "
-                f"Respuesta: {data}"
-            )
 
-    except Exception as e:
-        st.error("Error al enviar el nuevo producto al catálogo.")
-        st.exception(e)
+@seccion("producto a agregar")
+def seleccion_producto(productos_df: pd.DataFrame):
+    """Categoría, búsqueda, producto y cantidad; agrega la línea al carrito."""
+    st.markdown("### Producto a agregar al requerimiento")
 
+    version = version_catalogo(productos_df)
+    vistas = vistas_catalogo(productos_df, version)
 
-# --------------------------------------------------
-# Selector de vista
-# --------------------------------------------------
-vista = st.sidebar.radio(
-    "Selecciona el proceso:",
-    (
-        "📦 Requerimientos de producto",
-        "📥 Recepción",
-        "❓ FAQs",
-    ),
-)
-
-# --------------------------------------------------
-# VISTA FAQs
-# --------------------------------------------------
-if vista == "❓ FAQs":
-    st.title("Carga de inventario")
-    st.write(
-        "Flujo:\n"
-        "1) Descarga la plantilla, puedes encontrar el vínculo de descarga en la vista Carga de Inventario.\n"
-        "2) Llenan la hoja **Movimientos_Inventario** en Excel/CSV, **las primeras 4 columnas quedan vacías**.\n"
-        "3) Sube el archivo.\n"
-        "4) Anota el folio generado para futuras consultas.\n"
+    OPCION_TODAS = "--- Todas las categorías ---"
+    categoria_sel = st.selectbox(
+        "Categoría de producto",
+        [OPCION_TODAS] + vistas.categorias,
+        key="categoria_producto",
     )
+    categoria_filtro = None if categoria_sel == OPCION_TODAS else categoria_sel
 
-    st.title("Requerimientos de producto")
-    st.write(
-        "Flujo:\n"
-        "1) Selecciona CECO Destino.\n"
-        "2) Selecciona productos por categoría.\n"
-        "3) Agrega las cantidades necesarias y observaciones.\n"
-        "4) Una vez que confirmaste cantidades da clic en **Agregar producto al requerimiento**.\n"
-        "5) Verifica los productos agregados y cantidades nuevamente, da clic en **Confirmar y enviar requerimiento**.\n"
-        "6) Anota el folio generado para futuras consultas.\n"
+    busqueda_prod = st.text_input(
+        "Buscar producto (nombre, SKU o categoría)",
+        key="busqueda_producto",
+        help="No distingue acentos ni mayúsculas y tolera errores de captura.",
     )
 
-# --------------------------------------------------
-# VISTA: Requerimientos de producto (con carrito)
-# --------------------------------------------------
-elif vista == "📦 Requerimientos de producto":
-    st.header("📦 Requerimientos de producto")
-
-    try:
-        productos_df = load_catalogo_productos()
-        st.success("Catálogo de productos cargado exitosamente.")
-    except Exception as e:
-        st.error(
-            "No se pudo cargar el catálogo de productos desde la plantilla de inventario. "
-            "Revisa que exista la hoja 'Catálogo'."
+    if busqueda_prod.strip():
+        indice = indice_productos(productos_df, version)
+        posiciones = indice.buscar(
+            busqueda_prod,
+            k=RESULTADOS_BUSQUEDA,
+            mascara=vistas.mascaras.get(categoria_filtro) if categoria_filtro else None,
         )
-        st.exception(e)
-        st.stop()
-
-    st.subheader("📝 Crear nuevo requerimiento (carrito de productos)")
-
-    with st.container():
-        col1, col2 = st.columns(2)
-
-        opciones_ceco = [
-            "Flautas Lamartine",
-            "Burritos Masaryk",
-            "Burritos Miyana",
-            "Comisariato",
-            "Waldos & Crispier",
-            "Eventos",
-        ]
-        ceco_destino = col1.selectbox("CECO Destino", opciones_ceco)
-
-        fecha_requerida = col2.date_input(
-            "Fecha requerida (fecha de entrega)",
-            value=date.today(),
+        lista_productos = (
+            productos_df["Producto"].iloc[posiciones].drop_duplicates().tolist()
         )
+        if not lista_productos:
+            st.info("No se encontraron productos con esa búsqueda.")
+    elif categoria_filtro is None:
+        lista_productos = vistas.productos
+    else:
+        lista_productos = vistas.productos_por_categoria.get(categoria_filtro, [])
 
-        st.markdown("### Producto a agregar al requerimiento")
-
-        categorias_unicas = sorted(
-            productos_df["Categoria"].dropna().astype(str).unique().tolist()
-        )
+    producto_sel = st.selectbox(
+        "Producto",
+        lista_productos,
+        key="producto_seleccionado",
+    )
 
-        OPCION_TODAS = "--- Todas las categorías ---"
-        categoria_sel = st.selectbox(
-            "Categoría de producto",
-            [OPCION_TODAS] + categorias_unicas,
-            key="categoria_producto",
-        )
+    datos_prod = vistas.producto(producto_sel, categoria_filtro) if producto_sel else None
+    if datos_prod is not None:
+        sku_prod = datos_prod.sku
+        udm_prod = datos_prod.udm
+        prov_prod = datos_prod.proveedor
+        cat_prod = datos_prod.categoria
+    else:
+        sku_prod = ""
+        udm_prod = "pz"
+        prov_prod = ""
+        cat_prod = "Sin categoría"
+
+    col_cant, col_obs = st.columns(2)
+    cantidad_req = col_cant.number_input(
+        "Cantidad requerida",
+        min_value=0.0,
+        step=1.0,
+        value=1.0,
+        key="cantidad_req",
+    )
+    observaciones_req = col_obs.text_input(
+        "Observaciones (opcional)",
+        value="",
+        key="obs_req",
+    )
 
-        if categoria_sel == OPCION_TODAS:
-            productos_filtrados = productos_df.copy()
+    if st.button("➕ Agregar producto al requerimiento"):
+        if not producto_sel:
+            st.error("Debes seleccionar un producto.")
+        elif cantidad_req <= 0:
+            st.error("La cantidad debe ser mayor a 0.")
         else:
-            productos_filtrados = productos_df[
-                productos_df["Categoria"] == categoria_sel
-                ].copy()
-
-        lista_productos = productos_filtrados["Producto"].dropna().unique().tolist()
-        lista_productos = sorted(lista_productos)
-
-        producto_sel = st.selectbox(
-            "Producto",
-            lista_productos,
-            key="producto_seleccionado",
-        )
-
-        fila_prod = productos_filtrados[productos_filtrados["Producto"] == producto_sel]
-        if not fila_prod.empty:
-            sku_prod = fila_prod.iloc[0].get("Referencia Interna", "")
-            udm_prod = fila_prod.iloc[0].get("UdM de Compra", "pz")
-            prov_prod = fila_prod.iloc[0].get("Proveedor", "")
-            cat_prod = fila_prod.iloc[0].get("Categoria", "Sin categoría")
+            item = {
+                "INSUMO": producto_sel,
+                "UNIDAD DE MEDIDA": udm_prod,
+                "CANTIDAD": cantidad_req,
+                "Observaciones": observaciones_req,
+                "SKU": sku_prod,
+                "PROVEDOR": prov_prod,
+                "Categoria": cat_prod,
+            }
+            st.session_state["carrito_req"].append(item)
+            st.session_state["carrito_version"] += 1
+            st.session_state["aviso_carrito"] = f"Producto '{producto_sel}' agregado al carrito."
+            # El carrito es otra sección: se redibuja la página completa.
+            st.rerun()
+
+    if st.session_state["aviso_carrito"]:
+        st.success(st.session_state["aviso_carrito"])
+        st.session_state["aviso_carrito"] = None
+
+
+@seccion("carrito")
+def carrito_requerimiento(ceco_destino: str, fecha_requerida: date):
+    """Editor del carrito y registro del requerimiento en el almacén local."""
+    folio_enviado = st.session_state["aviso_envio_req"]
+    if folio_enviado is not None:
+        st.session_state["aviso_envio_req"] = None
+        if folio_enviado:
+            st.success(
+                f"Requerimiento **{folio_enviado}** registrado. "
+                "Se está enviando a Google Sheets en segundo plano."
+            )
+            mostrar_envios(folios=[folio_enviado])
         else:
-            sku_prod = ""
-            udm_prod = "pz"
-            prov_prod = ""
-            cat_prod = "Sin categoría"
-
-        col_cant, col_obs = st.columns(2)
-        cantidad_req = col_cant.number_input(
-            "Cantidad requerida",
-            min_value=0.0,
-            step=1.0,
-            value=1.0,
-            key="cantidad_req",
-        )
-        observaciones_req = col_obs.text_input(
-            "Observaciones (opcional)",
-            value="",
-            key="obs_req",
-        )
+            st.info("Carrito vaciado.")
 
-        if st.button("➕ Agregar producto al requerimiento"):
-            if not producto_sel:
-                st.error("Debes seleccionar un producto.")
-            elif cantidad_req <= 0:
-                st.error("La cantidad debe ser mayor a 0.")
-            else:
-                item = {
-                    "INSUMO": producto_sel,
-                    "UNIDAD DE MEDIDA": udm_prod,
-                    "CANTIDAD": cantidad_req,
-                    "Observaciones": observaciones_req,
-                    "SKU": sku_prod,
-                    "PROVEDOR": prov_prod,
-                    "Categoria": cat_prod,
-                }
-                st.session_state["carrito_req"].append(item)
-                st.success(f"Producto '{producto_sel}' agregado al carrito.")
+    if not st.session_state["carrito_req"]:
+        return
 
-    st.markdown("---")
-    st.subheader("🛒 Carrito de requerimientos")
+    # Agrupado por categoría con el orden de las filas (no un bloque por categoría).
+    carrito_df = pd.DataFrame(st.session_state["carrito_req"])
+    if "Categoria" not in carrito_df.columns:
+        carrito_df["Categoria"] = "Sin categoría"
+    carrito_df = carrito_df.sort_values(["Categoria", "INSUMO"], kind="stable").reset_index(drop=True)
+    carrito_df["Borrar"] = False
+
+    with medir("render: editor del carrito", filas=len(carrito_df)):
+        editado_df = st.data_editor(
+            carrito_df,
+            column_config={
+                "Categoria": st.column_config.TextColumn("Categoría", disabled=True),
+                "INSUMO": st.column_config.TextColumn("Producto", disabled=True),
+                "UNIDAD DE MEDIDA": st.column_config.TextColumn("Unidad", disabled=True),
+                "CANTIDAD": st.column_config.NumberColumn("Cantidad", min_value=0.0, step=1.0),
+                "Observaciones": st.column_config.TextColumn("Observaciones"),
+                "Borrar": st.column_config.CheckboxColumn("Borrar", default=False),
+            },
+            column_order=["Categoria", "INSUMO", "UNIDAD DE MEDIDA", "CANTIDAD", "Observaciones", "Borrar"],
+            num_rows="fixed",
+            hide_index=True,
+            use_container_width=True,
+            key=f"editor_carrito_{st.session_state['carrito_version']}",
+        )
 
-    if st.session_state["carrito_req"]:
-        carrito_df = pd.DataFrame(st.session_state["carrito_req"])
-        carrito_df["__idx__"] = range(len(carrito_df))
-
-        if "Categoria" in carrito_df.columns:
-            categorias_orden = sorted(carrito_df["Categoria"].dropna().unique().tolist())
-
-            for cat in categorias_orden:
-                subset = carrito_df[carrito_df["Categoria"] == cat]
-                st.markdown(f"#### 📂 {cat}")
-
-                header_cols = st.columns([4, 2, 2, 4, 1])
-                header_cols[0].markdown("**Producto**")
-                header_cols[1].markdown("**Unidad**")
-                header_cols[2].markdown("**Cantidad**")
-                header_cols[3].markdown("**Observaciones**")
-                header_cols[4].markdown("**Borrar**")
-
-                for _, row in subset.iterrows():
-                    c1, c2, c3, c4, c5_columns = st.columns([4, 2, 2, 4, 1])
-                    c1.write(row.get("INSUMO", ""))
-                    c2.write(row.get("UNIDAD DE MEDIDA", ""))
-                    c3.write(row.get("CANTIDAD", ""))
-                    c4.write(row.get("Observaciones", ""))
-
-                    delete_key = f"del_{int(row['__idx__'])}"
-                    if c5_columns.button("❌", key=delete_key):
-                        st.session_state["carrito_req"].pop(int(row["__idx__"]))
-                        st.rerun()
-        else:
-            header_cols = st.columns([4, 2, 2, 4, 1])
-            header_cols[0].markdown("**Producto**")
-            header_cols[1].markdown("**Unidad**")
-            header_cols[2].markdown("**Cantidad**")
-            header_cols[3].markdown("**Observaciones**")
-            header_cols[4].markdown("**Borrar**")
-
-            for _, row in carrito_df.iterrows():
-                c1, c2, c3, c4, c5_columns = st.columns([4, 2, 2, 4, 1])
-                c1.write(row.get("INSUMO", ""))
-                c2.write(row.get("UNIDAD DE MEDIDA", ""))
-                c3.write(row.get("CANTIDAD", ""))
-                c4.write(row.get("Observaciones", ""))
-
-                delete_key = f"del_{int(row['__idx__'])}"
-                if c5_columns.button("❌", key=delete_key):
-                    st.session_state["carrito_req"].pop(int(row["__idx__"]))
-                    st.rerun()
+    # Las ediciones de cantidad/observaciones se guardan en el carrito en cada rerun.
+    editado_df["Observaciones"] = editado_df["Observaciones"].fillna("")
+    st.session_state["carrito_req"] = (
+        editado_df.drop(columns="Borrar").to_dict("records")
+    )
 
-        colc1, colc2 = st.columns(2)
-        vaciar = colc1.button("🗑️ Vaciar carrito")
-        send_req = colc2.button(
-            "✅ Confirmar y enviar requerimiento", key="btn_send_req"
+    n_borrar = int(editado_df["Borrar"].sum())
+    if st.button(
+            f"❌ Borrar seleccionados ({n_borrar})",
+            disabled=n_borrar == 0,
+            key="btn_borrar_carrito",
+    ):
+        st.session_state["carrito_req"] = (
+            editado_df[~editado_df["Borrar"]].drop(columns="Borrar").to_dict("records")
         )
+        st.session_state["carrito_version"] += 1
+        rerun_seccion()
 
-        if vaciar:
-            st.session_state["carrito_req"] = []
-            st.info("Carrito vaciado.")
+    colc1, colc2 = st.columns(2)
+    vaciar = colc1.button("🗑️ Vaciar carrito")
+    send_req = colc2.button(
+        "✅ Confirmar y enviar requerimiento", key="btn_send_req"
+    )
 
-        if send_req:
-            errores = []
+    if vaciar:
+        st.session_state["carrito_req"] = []
+        st.session_state["carrito_version"] += 1
+        st.session_state["aviso_envio_req"] = ""
+        rerun_seccion()
 
-            tz = pytz.timezone("America/Mexico_City")
-            hoy = datetime.now(tz).date()
-            diferencia_dias = (fecha_requerida - hoy).days
+    if send_req:
+        errores = []
 
-            if ceco_destino != "Flautas Lamartine":
-                if diferencia_dias < 4:
-                    st.warning(
-                        "NO ES POSIBLE GENERAR PEDIDOS CON UN TIEMPO MENOR A 4 DÍAS "
-                        f"(hoy: {hoy.isoformat()}, fecha requerida: {fecha_requerida.isoformat()})."
-                    )
-                    errores.append(
-                        "La *Fecha requerida* debe ser al menos 4 días después de la fecha actual."
-                    )
+        hoy = datetime.now(ZONA_HORARIA).date()
+        diferencia_dias = (fecha_requerida - hoy).days
 
-            if fecha_requerida.weekday() >= 5:
+        if ceco_destino != "Flautas Lamartine":
+            if diferencia_dias < 4:
+                st.warning(
+                    "NO ES POSIBLE GENERAR PEDIDOS CON UN TIEMPO MENOR A 4 DÍAS "
+                    f"(hoy: {hoy.isoformat()}, fecha requerida: {fecha_requerida.isoformat()})."
+                )
                 errores.append(
-                    "La *Fecha requerida* no puede ser sábado ni domingo. "
-                    "Elige un día hábil (lunes a viernes)."
+                    "La *Fecha requerida* debe ser al menos 4 días después de la fecha actual."
                 )
 
-            if not ceco_destino:
-                errores.append("Debes seleccionar el *CECO destino*.")
-            if not st.session_state["carrito_req"]:
-                errores.append("El carrito está vacío. Agrega al menos un producto.")
+        if fecha_requerida.weekday() >= 5:
+            errores.append(
+                "La *Fecha requerida* no puede ser sábado ni domingo. "
+                "Elige un día hábil (lunes a viernes)."
+            )
 
-            if errores:
-                st.error("No se pudo enviar el requerimiento:")
-                for e in errores:
-                    st.write("-", e)
-            else:
-                folio_req, fecha_creacion, hora_creacion = generar_folio_requerimiento()
-                st.info(f"Folio de requerimiento generado: **{folio_req}**")
-
-                lista_req_data = []
-
-                for item in st.session_state["carrito_req"]:
-                    req_data = {
-                        "FECHA DE PEDIDO": fecha_creacion,
-                        "PROVEDOR": item.get("PROVEDOR", ""),
-                        "INSUMO": item["INSUMO"],
-                        "UNIDAD DE MEDIDA": item["UNIDAD DE MEDIDA"],
-                        "COSTO UNIDAD": "",
-                        "CANTIDAD": item["CANTIDAD"],
-                        "COSTO TOTAL": "",
-                        "FECHA DESEADA": fecha_requerida.isoformat(),
-                        "OBSERVACIONES": item["Observaciones"],
-                        "ESTATUS": "Pendiente",
-                        "ID_REQ": folio_req,
-                        "Hora": hora_creacion,
-                        "CECO_DESTINO": ceco_destino,
-                        "CATEGORIA": item.get("Categoria", "Sin categoría"),
-                        "Fecha aproximada de entrega": fecha_requerida.isoformat(),
-                        "SKU": item.get("SKU", ""),
-                    }
-
-                    lista_req_data.append(req_data)
-
-                lista_req_data = sorted(
-                    lista_req_data,
-                    key=lambda x: (x.get("CATEGORIA", ""), x.get("INSUMO", "")),
-                )
+        if not ceco_destino:
+            errores.append("Debes seleccionar el *CECO destino*.")
+        if not st.session_state["carrito_req"]:
+            errores.append("El carrito está vacío. Agrega al menos un producto.")
+        sin_cantidad = [
+            item["INSUMO"] for item in st.session_state["carrito_req"]
+            if pd.isna(item.get("CANTIDAD")) or item["CANTIDAD"] <= 0
+        ]
+        if sin_cantidad:
+            errores.append(
+                "La cantidad debe ser mayor a 0 en: " + ", ".join(sin_cantidad) + "."
+            )
 
-                enviar_requerimientos_a_gsheet(lista_req_data)
+        if errores:
+            st.error("No se pudo enviar el requerimiento:")
+            for e in errores:
+                st.write("-", e)
+        else:
+            folio_req, fecha_creacion, hora_creacion = generar_folio_requerimiento()
+
+            lista_req_data = []
+
+            for item in st.session_state["carrito_req"]:
+                req_data = {
+                    "FECHA DE PEDIDO": fecha_creacion,
+                    "PROVEDOR": item.get("PROVEDOR", ""),
+                    "INSUMO": item["INSUMO"],
+                    "UNIDAD DE MEDIDA": item["UNIDAD DE MEDIDA"],
+                    "COSTO UNIDAD": "",
+                    "CANTIDAD": item["CANTIDAD"],
+                    "COSTO TOTAL": "",
+                    "FECHA DESEADA": fecha_requerida.isoformat(),
+                    "OBSERVACIONES": item["Observaciones"],
+                    "ESTATUS": "Pendiente",
+                    "ID_REQ": folio_req,
+                    "Hora": hora_creacion,
+                    "CECO_DESTINO": ceco_destino,
+                    "CATEGORIA": item.get("Categoria", "Sin categoría"),
+                    "Fecha aproximada de entrega": fecha_requerida.isoformat(),
+                    "SKU": item.get("SKU", ""),
+                }
+
+                lista_req_data.append(req_data)
+
+            lista_req_data = sorted(
+                lista_req_data,
+                key=lambda x: (x.get("CATEGORIA", ""), x.get("INSUMO", "")),
+            )
+
+            if encolar_requerimientos(lista_req_data):
                 st.session_state["carrito_req"] = []
+                st.session_state["carrito_version"] += 1
+                # El editor sigue mostrando las filas hasta el siguiente rerun.
+                st.session_state["aviso_envio_req"] = folio_req
+                rerun_seccion()
 
-    else:
-        send_req = False
 
+
+@seccion("estatus de requerimientos")
+def consulta_estatus():
+    """Listado paginado de estatus (rango de fechas y CECO) o detalle de un folio."""
     st.subheader("🔍 Consultar estatus de requerimientos")
 
-    _, col_f2 = st.columns(2)
+    col_f1, col_f2 = st.columns(2)
+    rango_pedido = col_f1.date_input(
+        "Fecha de pedido (desde – hasta)",
+        value=(date.today() - timedelta(days=DIAS_ESTATUS), date.today()),
+        key="estatus_rango_fechas",
+        help="No se aplica al buscar un folio específico.",
+    )
     filtro_folio = col_f2.text_input(
         "Buscar por folio (ID_REQ) (opcional, coincidencia exacta)",
         value="",
     )
 
-    if st.button("🔄 Actualizar listado"):
+    # El listado sigue visible al cambiar filtros o de página; el botón
+    # sólo fuerza a revisar si la hoja cambió.
+    revalidar_estatus = st.button("🔄 Actualizar listado")
+    if revalidar_estatus:
+        st.session_state["estatus_listado"] = True
+
+    if st.session_state["estatus_listado"]:
         try:
-            load_requerimientos_from_gsheet.clear()
-            req_df = load_requerimientos_from_gsheet()
+            req_df = load_requerimientos_from_gsheet(revalidar=revalidar_estatus)
 
             if "ID_REQ" not in req_df.columns or "ESTATUS" not in req_df.columns:
                 st.error(
@@ -1310,157 +602,84 @@ elif vista == "📦 Requerimientos de producto":
                     f"Columnas leídas: {list(req_df.columns)}\n\n"
                     "Revisa que el CSV de requerimientos tenga esos encabezados en la fila 1."
                 )
-                st.stop()
-
-            if "FECHA DE PEDIDO" in req_df.columns and "Hora" in req_df.columns:
-                req_df_sorted = req_df.sort_values(
-                    by=["FECHA DE PEDIDO", "Hora"], ascending=[True, True]
-                )
-            else:
-                req_df_sorted = req_df.copy()
+                return
 
             if filtro_folio:
-                mask = (
-                        req_df_sorted["ID_REQ"].astype(str).str.lower()
-                        == filtro_folio.lower()
-                )
-                df_filtrado = req_df_sorted[mask].copy()
+                df_filtrado = buscar_folio_requerimiento(filtro_folio)
 
                 if df_filtrado.empty:
                     st.warning("No se encontró ningún requerimiento con ese ID_REQ.")
-                    st.stop()
+                    return
+                resumen = resumen_estatus(df_filtrado)
             else:
-                df_filtrado = req_df_sorted
-
-            agg_dict = {"ESTATUS": "last"}
-            cols_resumen = ["ID_REQ", "ESTATUS"]
-
-            if "FECHA DE PEDIDO" in df_filtrado.columns:
-                agg_dict["FECHA DE PEDIDO"] = "last"
-                cols_resumen.append("FECHA DE PEDIDO")
-            if "FECHA DESEADA" in df_filtrado.columns:
-                agg_dict["FECHA DESEADA"] = "last"
-                cols_resumen.append("FECHA DESEADA")
-
-            resumen = df_filtrado.groupby("ID_REQ", as_index=False).agg(agg_dict)
-
-            st.markdown("### 📊 Resumen de requerimiento de compra")
-            st.dataframe(
-                resumen[cols_resumen].reset_index(drop=True),
-                use_container_width=True,
-                hide_index=True,
-            )
-
-            if filtro_folio:
-                st.markdown(f"### 📄 Detalle de productos del folio: `{filtro_folio}`")
-                detalle = df_filtrado.copy()
-
-                cols_detalle = [
-                    c
-                    for c in [
-                        "ID_REQ",
-                        "INSUMO",
-                        "UNIDAD DE MEDIDA",
-                        "CANTIDAD",
-                        "FECHA DESEADA"
-                        if "FECHA DESEADA" in detalle.columns
-                        else None,
-                        "ESTATUS",
-                        "OBSERVACIONES",
-                    ]
-                    if c is not None and c in detalle.columns
-                ]
-
-                st.dataframe(
-                    detalle[cols_detalle].reset_index(drop=True),
-                    use_container_width=True,
-                    hide_index=True,
+                opciones_ceco = (
+                    sorted(c for c in req_df["CECO_DESTINO"].unique().astype(str) if c)
+                    if "CECO_DESTINO" in req_df.columns else []
+                )
+                filtro_ceco = st.multiselect(
+                    "CECO destino", opciones_ceco, key="estatus_filtro_ceco"
+                )
+                # Mientras se elige el rango, date_input devuelve sólo la fecha inicial.
+                desde, hasta = (tuple(rango_pedido) + (None, None))[:2]
+                resumen = resumen_estatus(
+                    requerimientos_con_archivo(desde, hasta), desde, hasta, filtro_ceco
                 )
 
-        except Exception as e:
-            st.error(
-                "No se pudo cargar la hoja de requerimientos desde Google Sheets. "
-                "Revisa REQUERIMIENTOS_CSV_URL en secrets y la publicación del archivo."
-            )
-            st.exception(e)
-
-# --------------------------------------------------
-# VISTA: Recepción de producto
-# --------------------------------------------------
-elif vista == "📥 Recepción":
-    st.header("📥 Recepción de producto")
-
-    st.markdown(
-        "1) Consulta un requerimiento por folio **ID_REQ**.  \n"
-        "2) Se cargará una tabla con los insumos del pedido.  \n"
-        "3) En esa misma tabla, por **cada fila** captura: Fecha de recepción, Factura/Ticket, "
-        "Recibió, Cantidad recibida, Temperatura, Calidad, Observaciones y fecha de caducidad.  \n"
-        "4) Registra todo en la hoja de Google mediante un solo botón."
-    )
-
-    try:
-        catalogo_df = load_catalogo_productos()
-    except Exception:
-        catalogo_df = pd.DataFrame()
-
-    col_buscar1, col_buscar2 = st.columns([2, 1])
-    id_req_input = col_buscar1.text_input(
-        "Folio de requerimiento (ID_REQ)",
-        value=st.session_state.get("req_recepcion_id", ""),
-        help="Es el mismo folio que se generó en Requerimientos (REQ-YYYYMMDD-HHMMSS).",
-    )
-    btn_buscar_req = col_buscar2.button("🔍 Buscar requerimiento")
-
-    if btn_buscar_req:
-        if not id_req_input.strip():
-            st.error("Debes capturar un folio de requerimiento (ID_REQ).")
-        else:
-            try:
-                load_requerimientos_from_gsheet.clear()
-                req_df = load_requerimientos_from_gsheet()
-
-                if "ID_REQ" not in req_df.columns:
-                    st.error(
-                        "No se encontró la columna 'ID_REQ' en la hoja de requerimientos. "
-                        f"Columnas leídas: {list(req_df.columns)}"
-                    )
-                    st.stop()
-
-                mask = req_df["ID_REQ"].astype(str).str.strip() == id_req_input.strip()
-                df_req_folio = req_df[mask].copy()
-
-                if df_req_folio.empty:
-                    st.warning(
-                        f"No se encontraron registros con el folio ID_REQ = '{id_req_input}'."
-                    )
-                    st.session_state["req_recepcion_df"] = None
-                    st.session_state["req_recepcion_id"] = id_req_input.strip()
-                else:
-                    if "INSUMO" in df_req_folio.columns:
-                        df_req_folio = df_req_folio[df_req_folio["INSUMO"].notna()].copy()
-                        df_req_folio["INSUMO"] = df_req_folio["INSUMO"].astype(str).str.strip()
-                        df_req_folio = df_req_folio[df_req_folio["INSUMO"] != ""]
-                        df_req_folio = df_req_folio.sort_values("INSUMO")
+            cols_resumen = [
+                c for c in ["ID_REQ", "ESTATUS", "FECHA DE PEDIDO", "FECHA DESEADA"]
+                if c in resumen.columns
+            ]
 
-                    if "CANTIDAD" in df_req_folio.columns:
-                        df_req_folio["CANTIDAD"] = pd.to_numeric(
-                            df_req_folio["CANTIDAD"], errors="coerce"
-                        ).fillna(0.0)
+            st.markdown("### 📊 Resumen de requerimiento de compra")
+            if resumen.empty:
+                st.info("No hay requerimientos con esos filtros.")
+            else:
+                mostrar_pagina(
+                    resumen[cols_resumen],
+                    "estatus_pagina",
+                    ESTATUS_POR_PAGINA,
+                    "requerimiento(s)",
+                    column_config=COLUMN_CONFIG_FECHAS,
+                )
 
-                    st.session_state["req_recepcion_df"] = df_req_folio
-                    st.session_state["req_recepcion_id"] = id_req_input.strip()
-                    st.session_state["editor_version"] += 1
+            if filtro_folio:
+                st.markdown(f"### 📄 Detalle de productos del folio: `{filtro_folio}`")
+                detalle = df_filtrado.copy()
 
-                    st.success("Requerimiento cargado correctamente.")
-                    st.rerun()
+                cols_detalle = [
+                    c
+                    for c in [
+                        "ID_REQ",
+                        "INSUMO",
+                        "UNIDAD DE MEDIDA",
+                        "CANTIDAD",
+                        "FECHA DESEADA"
+                        if "FECHA DESEADA" in detalle.columns
+                        else None,
+                        "ESTATUS",
+                        "OBSERVACIONES",
+                    ]
+                    if c is not None and c in detalle.columns
+                ]
 
-            except Exception as e:
-                st.error(
-                    "No se pudo cargar la hoja de requerimientos desde Google Sheets. "
-                    "Revisa REQUERIMIENTOS_CSV_URL en secrets y la publicación del archivo."
+                st.dataframe(
+                    detalle[cols_detalle].reset_index(drop=True),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config=COLUMN_CONFIG_FECHAS,
                 )
-                st.exception(e)
 
+        except Exception as e:
+            st.error(
+                "No se pudo cargar la hoja de requerimientos desde Google Sheets. "
+                "Revisa REQUERIMIENTOS_CSV_URL en secrets y la publicación del archivo."
+            )
+            st.exception(e)
+
+
+@seccion("registro de recepción")
+def registro_recepcion():
+    """Pendientes, historial y editor de recepción del folio buscado."""
     df_req_folio = st.session_state.get("req_recepcion_df", None)
     id_req_actual = st.session_state.get("req_recepcion_id", "")
 
@@ -1484,6 +703,7 @@ elif vista == "📥 Recepción":
             df_req_folio[cols_detalle_req].reset_index(drop=True),
             use_container_width=True,
             hide_index=True,
+            column_config=COLUMN_CONFIG_FECHAS,
         )
 
         st.markdown("### 📦 Registro de recepción por insumo")
@@ -1534,7 +754,7 @@ elif vista == "📥 Recepción":
                 base_df = pendientes_df[pendientes_df["CANTIDAD PENDIENTE"] > 0].copy()
                 if base_df.empty:
                     st.success("🎉 ¡Todos los productos de este requerimiento ya fueron recibidos!")
-                    st.stop()
+                    return
             else:
                 base_df = pendientes_df.copy()
 
@@ -1549,83 +769,84 @@ elif vista == "📥 Recepción":
 
             editor_key = f"editor_recepcion_{id_req_actual}_{st.session_state.get('editor_version', 0)}"
 
-            edited_df = st.data_editor(
-                base_df,
-                column_config={
-                    "INSUMO": st.column_config.TextColumn(
-                        "Producto",
-                        disabled=True,
-                    ),
-                    "SKU": st.column_config.TextColumn(
-                        "SKU",
-                        disabled=True,
-                    ),
-                    "CANTIDAD PO": st.column_config.NumberColumn(
-                        "Cantidad PO",
-                        disabled=True,
-                        help="Cantidad solicitada en el requerimiento original",
-                    ),
-                    "CANTIDAD RECIBIDA TOTAL": st.column_config.NumberColumn(
-                        "Ya Recibido",
-                        disabled=True,
-                        help="Cantidad ya recibida en recepciones anteriores",
-                    ),
-                    "CANTIDAD PENDIENTE": st.column_config.NumberColumn(
-                        "Pendiente",
-                        disabled=True,
-                        help="Cantidad que falta por recibir",
-                    ),
-                    "PROVEEDOR": st.column_config.TextColumn(
-                        "Proveedor",
-                        disabled=True,
-                    ),
-                    "Fecha de recepción": st.column_config.DateColumn(
-                        "Fecha de recepción",
-                        help="Fecha de esta recepción",
-                    ),
-                    "FACTURA / TICKET": st.column_config.TextColumn(
-                        "Factura / Ticket",
-                        help="Número de factura o ticket",
-                    ),
-                    "RECIBIÓ": st.column_config.TextColumn(
-                        "Recibió",
-                        help="Persona que recibe",
-                    ),
-                    "CANTIDAD A RECIBIR": st.column_config.NumberColumn(
-                        "🆕 Cantidad a Recibir",
-                        help="Cantidad que estás recibiendo AHORA (puede ser parcial)",
-                        min_value=0.0,
-                    ),
-                    "TEMP (°C)": st.column_config.NumberColumn(
-                        "Temp (°C)",
-                        help="Temperatura al recibir (si aplica)",
-                        min_value=-50.0,
-                        max_value=100.0,
-                        step=0.5,
-                    ),
-                    "CALIDAD (OK / RECHAZO)": st.column_config.SelectboxColumn(
-                        "Calidad",
-                        options=["OK", "RECHAZO"],
-                        help="Indica si se acepta o rechaza",
-                    ),
-                    "OBSERVACIONES": st.column_config.TextColumn(
-                        "Observaciones",
-                        help="Obligatorio si hay rechazo",
-                    ),
-                    "fecha de caducidad": st.column_config.DateColumn(
-                        "Fecha caducidad",
-                        help="Fecha de caducidad del lote",
-                    ),
-                },
-                num_rows="fixed",
-                use_container_width=True,
-                key=editor_key,
-                column_order=[
-                    "INSUMO", "SKU", "CANTIDAD PO", "CANTIDAD RECIBIDA TOTAL", "CANTIDAD PENDIENTE",
-                    "PROVEEDOR", "Fecha de recepción", "FACTURA / TICKET", "RECIBIÓ",
-                    "CANTIDAD A RECIBIR", "TEMP (°C)", "CALIDAD (OK / RECHAZO)", "OBSERVACIONES", "fecha de caducidad"
-                ],
-            )
+            with medir("render: editor de recepción", filas=len(base_df)):
+                edited_df = st.data_editor(
+                    base_df,
+                    column_config={
+                        "INSUMO": st.column_config.TextColumn(
+                            "Producto",
+                            disabled=True,
+                        ),
+                        "SKU": st.column_config.TextColumn(
+                            "SKU",
+                            disabled=True,
+                        ),
+                        "CANTIDAD PO": st.column_config.NumberColumn(
+                            "Cantidad PO",
+                            disabled=True,
+                            help="Cantidad solicitada en el requerimiento original",
+                        ),
+                        "CANTIDAD RECIBIDA TOTAL": st.column_config.NumberColumn(
+                            "Ya Recibido",
+                            disabled=True,
+                            help="Cantidad ya recibida en recepciones anteriores",
+                        ),
+                        "CANTIDAD PENDIENTE": st.column_config.NumberColumn(
+                            "Pendiente",
+                            disabled=True,
+                            help="Cantidad que falta por recibir",
+                        ),
+                        "PROVEEDOR": st.column_config.TextColumn(
+                            "Proveedor",
+                            disabled=True,
+                        ),
+                        "Fecha de recepción": st.column_config.DateColumn(
+                            "Fecha de recepción",
+                            help="Fecha de esta recepción",
+                        ),
+                        "FACTURA / TICKET": st.column_config.TextColumn(
+                            "Factura / Ticket",
+                            help="Número de factura o ticket",
+                        ),
+                        "RECIBIÓ": st.column_config.TextColumn(
+                            "Recibió",
+                            help="Persona que recibe",
+                        ),
+                        "CANTIDAD A RECIBIR": st.column_config.NumberColumn(
+                            "🆕 Cantidad a Recibir",
+                            help="Cantidad que estás recibiendo AHORA (puede ser parcial)",
+                            min_value=0.0,
+                        ),
+                        "TEMP (°C)": st.column_config.NumberColumn(
+                            "Temp (°C)",
+                            help="Temperatura al recibir (si aplica)",
+                            min_value=-50.0,
+                            max_value=100.0,
+                            step=0.5,
+                        ),
+                        "CALIDAD (OK / RECHAZO)": st.column_config.SelectboxColumn(
+                            "Calidad",
+                            options=["OK", "RECHAZO"],
+                            help="Indica si se acepta o rechaza",
+                        ),
+                        "OBSERVACIONES": st.column_config.TextColumn(
+                            "Observaciones",
+                            help="Obligatorio si hay rechazo",
+                        ),
+                        "fecha de caducidad": st.column_config.DateColumn(
+                            "Fecha caducidad",
+                            help="Fecha de caducidad del lote",
+                        ),
+                    },
+                    num_rows="fixed",
+                    use_container_width=True,
+                    key=editor_key,
+                    column_order=[
+                        "INSUMO", "SKU", "CANTIDAD PO", "CANTIDAD RECIBIDA TOTAL", "CANTIDAD PENDIENTE",
+                        "PROVEEDOR", "Fecha de recepción", "FACTURA / TICKET", "RECIBIÓ",
+                        "CANTIDAD A RECIBIR", "TEMP (°C)", "CALIDAD (OK / RECHAZO)", "OBSERVACIONES", "fecha de caducidad"
+                    ],
+                )
 
             st.markdown(
                 "> **💡 Tip:** Solo se enviarán los productos donde captures una **'Cantidad a Recibir' > 0**.  \n"
@@ -1638,7 +859,7 @@ elif vista == "📥 Recepción":
 
             if btn_limpiar:
                 st.session_state["editor_version"] += 1
-                st.rerun()
+                rerun_seccion()
 
             if btn_enviar_recep:
                 errores = []
@@ -1742,17 +963,14 @@ elif vista == "📥 Recepción":
                         }
                         lista_recepcion_data.append(rec_data)
 
-                    if lista_recepcion_data:
-                        enviar_recepcion_a_gsheet(lista_recepcion_data)
-
+                    if lista_recepcion_data and encolar_recepcion(lista_recepcion_data):
                         st.session_state["editor_version"] += 1
-                        st.success(
-                            f"✅ Se registraron {len(lista_recepcion_data)} producto(s). "
-                            "Recargando datos actualizados..."
+                        st.session_state["aviso_recepcion"] = (
+                            f"✅ Recepción **{folio_recep}**: se registraron "
+                            f"{len(lista_recepcion_data)} producto(s). "
+                            "Se está enviando a Google Sheets en segundo plano."
                         )
-
-                        import time
-                        time.sleep(1.5)
+                        st.session_state["folios_recepcion_enviados"].append(folio_recep)
                         st.rerun()
 
     else:
@@ -1760,7 +978,10 @@ elif vista == "📥 Recepción":
             "Busca primero un folio de requerimiento (ID_REQ) para poder registrar la recepción."
         )
 
-    st.markdown("---")
+
+@seccion("pendientes por requerimiento")
+def consulta_pendientes():
+    """Productos pendientes de un ID_REQ (incluye recepciones en la bandeja)."""
     st.markdown("### 🔍 Consulta de pendientes por requerimiento")
 
     id_req_pend = st.text_input(
@@ -1775,79 +996,35 @@ elif vista == "📥 Recepción":
         else:
             try:
                 req_df = load_requerimientos_from_gsheet()
-                req_df.columns = req_df.columns.astype(str).str.strip()
 
                 if "ID_REQ" not in req_df.columns:
                     st.error(
                         "La hoja de Requerimientos no tiene la columna 'ID_REQ'. "
                         f"Columnas leídas: {list(req_df.columns)}"
                     )
-                    st.stop()
+                    return
 
-                req_folio = req_df[
-                    req_df["ID_REQ"].astype(str).str.strip() == id_req_pend.strip()
-                    ].copy()
+                pendientes = pendientes_de_folio(id_req_pend)
 
-                if req_folio.empty:
+                if pendientes.empty:
                     st.warning(
                         f"No se encontraron productos para el ID_REQ = '{id_req_pend}'."
                     )
-                    st.stop()
-
-                if "INSUMO" in req_folio.columns:
-                    col_prod_req = "INSUMO"
-                elif "PRODUCTO" in req_folio.columns:
-                    col_prod_req = "PRODUCTO"
-                else:
-                    st.error(
-                        "No se encontró una columna de producto ('INSUMO' o 'PRODUCTO') "
-                        "en la hoja de Requerimientos."
-                    )
-                    st.stop()
-
-                col_cant_pend = None
-                for c in req_folio.columns:
-                    if norm(c) == "cantidadpendiente":
-                        col_cant_pend = c
-                        break
-
-                if col_cant_pend is None:
-                    st.error(
-                        "No se encontró la columna de 'CANTIDAD PENDIENTE' "
-                        "en la hoja de Requerimientos. "
-                        f"Columnas leídas: {list(req_folio.columns)}"
-                    )
-                    st.stop()
+                    return
 
-                req_folio[col_cant_pend] = pd.to_numeric(
-                    req_folio[col_cant_pend], errors="coerce"
-                ).fillna(0.0)
-
-                req_pend = req_folio[req_folio[col_cant_pend] > 0].copy()
+                pend_df = pendientes[pendientes["CANTIDAD PENDIENTE"] > 0].rename(
+                    columns={"INSUMO": "PRODUCTO", "CANTIDAD PENDIENTE": "PENDIENTE"}
+                )
 
-                if req_pend.empty:
+                if pend_df.empty:
                     st.info(
                         f"El requerimiento `{id_req_pend}` no tiene productos pendientes. 🎉"
                     )
-                    st.stop()
-
-                cols_base = [col_prod_req, col_cant_pend]
-                if "SKU" in req_pend.columns:
-                    cols_base.insert(1, "SKU")
-
-                pend_df = req_pend[cols_base].copy()
-
-                rename_map = {col_prod_req: "PRODUCTO", col_cant_pend: "PENDIENTE"}
-                pend_df = pend_df.rename(columns=rename_map)
-
-                pend_df["PENDIENTE"] = pd.to_numeric(
-                    pend_df["PENDIENTE"], errors="coerce"
-                ).fillna(0.0)
-                pend_df = pend_df[pend_df["PENDIENTE"] > 0]
+                    return
 
                 pend_df = pend_df.sort_values("PENDIENTE", ascending=False)
 
-                if "SKU" in pend_df.columns:
+                if (pend_df["SKU"] != "").any():
                     cols_mostrar = ["SKU", "PRODUCTO", "PENDIENTE"]
                 else:
                     cols_mostrar = ["PRODUCTO", "PENDIENTE"]
@@ -1871,3 +1048,314 @@ elif vista == "📥 Recepción":
             except Exception as e:
                 st.error("Ocurrió un error al calcular los pendientes.")
                 st.exception(e)
+
+
+@seccion("folios abiertos")
+def tablero_folios():
+    """Resumen por CECO y proveedor y listado paginado de folios abiertos."""
+    revalidar_folios = st.button("🔄 Actualizar", key="btn_actualizar_folios")
+
+    try:
+        abiertos = folios_abiertos(revalidar=revalidar_folios)
+    except Exception as e:
+        st.error(
+            "No se pudo cargar la hoja de requerimientos desde Google Sheets. "
+            "Revisa REQUERIMIENTOS_CSV_URL en secrets y la publicación del archivo."
+        )
+        st.exception(e)
+        return
+
+    if abiertos.empty:
+        st.success("🎉 No hay folios con productos pendientes.")
+        return
+
+    col_f1, col_f2 = st.columns(2)
+    filtro_ceco = col_f1.multiselect(
+        "CECO destino",
+        sorted(abiertos["CECO_DESTINO"].unique().tolist()),
+        key="folios_filtro_ceco",
+    )
+    filtro_prov = col_f2.multiselect(
+        "Proveedor",
+        sorted(abiertos["PROVEEDOR"].unique().tolist()),
+        key="folios_filtro_proveedor",
+    )
+    if filtro_ceco:
+        abiertos = abiertos[abiertos["CECO_DESTINO"].isin(filtro_ceco)]
+    if filtro_prov:
+        abiertos = abiertos[abiertos["PROVEEDOR"].isin(filtro_prov)]
+
+    col_m1, col_m2, col_m3 = st.columns(3)
+    col_m1.metric("📄 Folios abiertos", f"{abiertos['ID_REQ'].nunique()}")
+    col_m2.metric("📦 Total PO", f"{abiertos['CANTIDAD PO'].sum():.0f}")
+    col_m3.metric("⏳ Pendiente", f"{abiertos['CANTIDAD PENDIENTE'].sum():.0f}")
+
+    st.markdown("### 🏷️ Por CECO destino y proveedor")
+    por_grupo = abiertos.groupby(["CECO_DESTINO", "PROVEEDOR"], as_index=False).agg(**{
+        "FOLIOS": ("ID_REQ", "nunique"),
+        "CANTIDAD PO": ("CANTIDAD PO", "sum"),
+        "CANTIDAD RECIBIDA TOTAL": ("CANTIDAD RECIBIDA TOTAL", "sum"),
+        "CANTIDAD PENDIENTE": ("CANTIDAD PENDIENTE", "sum"),
+    })
+    por_grupo["% RECIBIDO"] = (
+        (por_grupo["CANTIDAD PO"] - por_grupo["CANTIDAD PENDIENTE"])
+        / por_grupo["CANTIDAD PO"].where(por_grupo["CANTIDAD PO"] > 0)
+        * 100
+    ).fillna(100.0)
+    st.dataframe(
+        por_grupo.sort_values("CANTIDAD PENDIENTE", ascending=False).reset_index(drop=True),
+        use_container_width=True,
+        hide_index=True,
+        column_config=COLUMN_CONFIG_AVANCE,
+    )
+
+    st.markdown("### 📄 Folios")
+    cols_folios = [
+        "ID_REQ", "CECO_DESTINO", "PROVEEDOR", "FECHA DE PEDIDO", "FECHA DESEADA",
+        "ESTATUS", "PRODUCTOS", "CANTIDAD PO", "CANTIDAD RECIBIDA TOTAL",
+        "CANTIDAD PENDIENTE", "% RECIBIDO",
+    ]
+    mostrar_pagina(
+        abiertos[cols_folios],
+        "folios_pagina",
+        FOLIOS_POR_PAGINA,
+        "folio(s)/proveedor",
+        column_config={**COLUMN_CONFIG_FECHAS, **COLUMN_CONFIG_AVANCE},
+    )
+
+
+# --------------------------------------------------
+# Selector de vista
+# --------------------------------------------------
+vista = st.sidebar.radio(
+    "Selecciona el proceso:",
+    (
+        "📦 Requerimientos de producto",
+        "📥 Recepción",
+        "📊 Folios abiertos",
+        "🧾 Carga de inventario",
+        "❓ FAQs",
+    ),
+)
+st.session_state["perfil_rerun"].contexto["vista"] = vista
+
+if st.sidebar.toggle("⏱️ Tiempos del rerun", key="perfil_visible"):
+    mostrar_perfil(st.session_state["perfil_anterior"])
+
+with st.sidebar.expander("📮 Envíos a Google Sheets", expanded=False):
+    mostrar_envios()
+
+# --------------------------------------------------
+# VISTA FAQs
+# --------------------------------------------------
+if vista == "❓ FAQs":
+    st.title("Carga de inventario")
+    st.write(
+        "Flujo:\n"
+        "1) Descarga la plantilla, puedes encontrar el vínculo de descarga en la vista Carga de Inventario.\n"
+        "2) Llenan la hoja **Movimientos_Inventario** en Excel/CSV, **las primeras 4 columnas quedan vacías**.\n"
+        "3) Sube el archivo.\n"
+        "4) Anota el folio generado para futuras consultas.\n"
+    )
+
+    st.title("Requerimientos de producto")
+    st.write(
+        "Flujo:\n"
+        "1) Selecciona CECO Destino.\n"
+        "2) Selecciona productos por categoría.\n"
+        "3) Agrega las cantidades necesarias y observaciones.\n"
+        "4) Una vez que confirmaste cantidades da clic en **Agregar producto al requerimiento**.\n"
+        "5) Verifica los productos agregados y cantidades nuevamente, da clic en **Confirmar y enviar requerimiento**.\n"
+        "6) Anota el folio generado para futuras consultas.\n"
+    )
+
+# --------------------------------------------------
+# VISTA: Requerimientos de producto (con carrito)
+# --------------------------------------------------
+elif vista == "📦 Requerimientos de producto":
+    st.header("📦 Requerimientos de producto")
+
+    try:
+        productos_df = load_catalogo_productos()
+        st.success("Catálogo de productos cargado exitosamente.")
+    except Exception as e:
+        st.error(
+            "No se pudo cargar el catálogo de productos desde la plantilla de inventario. "
+            "Revisa que exista la hoja 'Catálogo'."
+        )
+        st.exception(e)
+        st.stop()
+
+    st.subheader("📝 Crear nuevo requerimiento (carrito de productos)")
+
+    with st.container():
+        col1, col2 = st.columns(2)
+
+        opciones_ceco = [
+            "Flautas Lamartine",
+            "Burritos Masaryk",
+            "Burritos Miyana",
+            "Comisariato",
+            "Waldos & Crispier",
+            "Eventos",
+        ]
+        ceco_destino = col1.selectbox("CECO Destino", opciones_ceco)
+
+        fecha_requerida = col2.date_input(
+            "Fecha requerida (fecha de entrega)",
+            value=date.today(),
+        )
+
+        seleccion_producto(productos_df)
+
+    with st.expander("📤 Importar productos desde archivo (CSV / Excel)", expanded=False):
+        st.caption(
+            "Columnas: **SKU** y/o **Producto**, **Cantidad** y, opcional, **Observaciones**. "
+            f"En Excel se lee la hoja '{HOJA_IMPORTAR_REQUERIMIENTO}' (o la primera)."
+        )
+        archivo_req = st.file_uploader(
+            "Archivo del requerimiento",
+            type=["csv", "xlsx", "xls"],
+            key="archivo_importar_req",
+        )
+
+        if archivo_req is not None and st.button("📥 Agregar productos del archivo al carrito"):
+            try:
+                lineas_df = leer_archivo_movimientos(archivo_req, hoja=HOJA_IMPORTAR_REQUERIMIENTO)
+                encontradas, no_encontradas = resolver_lineas(lineas_df, productos_df)
+            except ValueError as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error("No se pudo leer el archivo.")
+                st.exception(e)
+            else:
+                if not encontradas.empty:
+                    st.session_state["carrito_req"].extend(encontradas.to_dict("records"))
+                    st.session_state["carrito_version"] += 1
+                    st.success(f"Se agregaron {len(encontradas)} producto(s) al carrito.")
+                if not no_encontradas.empty:
+                    st.warning(
+                        f"{len(no_encontradas)} línea(s) no se agregaron. "
+                        "Corrígelas en el archivo y vuelve a importarlas."
+                    )
+                    st.dataframe(no_encontradas, use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    st.subheader("🛒 Carrito de requerimientos")
+
+    carrito_requerimiento(ceco_destino, fecha_requerida)
+
+    consulta_estatus()
+
+# --------------------------------------------------
+# VISTA: Recepción de producto
+# --------------------------------------------------
+elif vista == "📥 Recepción":
+    st.header("📥 Recepción de producto")
+
+    st.markdown(
+        "1) Consulta un requerimiento por folio **ID_REQ**.  \n"
+        "2) Se cargará una tabla con los insumos del pedido.  \n"
+        "3) En esa misma tabla, por **cada fila** captura: Fecha de recepción, Factura/Ticket, "
+        "Recibió, Cantidad recibida, Temperatura, Calidad, Observaciones y fecha de caducidad.  \n"
+        "4) Registra todo en la hoja de Google mediante un solo botón."
+    )
+
+    if st.session_state["aviso_recepcion"]:
+        st.success(st.session_state["aviso_recepcion"])
+        st.session_state["aviso_recepcion"] = None
+    if st.session_state["folios_recepcion_enviados"]:
+        with st.expander("📮 Estado de envío de tus recepciones", expanded=True):
+            mostrar_envios(folios=st.session_state["folios_recepcion_enviados"][-10:])
+
+    col_buscar1, col_buscar2 = st.columns([2, 1])
+    id_req_input = col_buscar1.text_input(
+        "Folio de requerimiento (ID_REQ)",
+        value=st.session_state.get("req_recepcion_id", ""),
+        help="Es el mismo folio que se generó en Requerimientos (REQ-YYYYMMDD-HHMMSS-…).",
+    )
+    btn_buscar_req = col_buscar2.button("🔍 Buscar requerimiento")
+
+    if btn_buscar_req:
+        if not id_req_input.strip():
+            st.error("Debes capturar un folio de requerimiento (ID_REQ).")
+        else:
+            try:
+                req_df = load_requerimientos_from_gsheet(revalidar=True)
+
+                if "ID_REQ" not in req_df.columns:
+                    st.error(
+                        "No se encontró la columna 'ID_REQ' en la hoja de requerimientos. "
+                        f"Columnas leídas: {list(req_df.columns)}"
+                    )
+                    st.stop()
+
+                df_req_folio = buscar_folio_requerimiento(id_req_input)
+
+                if df_req_folio.empty:
+                    st.warning(
+                        f"No se encontraron registros con el folio ID_REQ = '{id_req_input}'."
+                    )
+                    st.session_state["req_recepcion_df"] = None
+                    st.session_state["req_recepcion_id"] = id_req_input.strip()
+                else:
+                    if "INSUMO" in df_req_folio.columns:
+                        df_req_folio = df_req_folio[df_req_folio["INSUMO"] != ""]
+                        df_req_folio = df_req_folio.sort_values("INSUMO")
+
+                    st.session_state["req_recepcion_df"] = df_req_folio
+                    st.session_state["req_recepcion_id"] = id_req_input.strip()
+                    st.session_state["editor_version"] += 1
+
+                    st.success("Requerimiento cargado correctamente.")
+                    st.rerun()
+
+            except Exception as e:
+                st.error(
+                    "No se pudo cargar la hoja de requerimientos desde Google Sheets. "
+                    "Revisa REQUERIMIENTOS_CSV_URL en secrets y la publicación del archivo."
+                )
+                st.exception(e)
+
+    registro_recepcion()
+
+    st.markdown("---")
+    consulta_pendientes()
+
+# --------------------------------------------------
+# VISTA: Folios abiertos
+# --------------------------------------------------
+elif vista == "📊 Folios abiertos":
+    st.header("📊 Folios abiertos")
+    st.caption(
+        "Requerimientos con cantidad pendiente de recibir, por CECO destino y proveedor."
+    )
+
+    tablero_folios()
+
+# --------------------------------------------------
+# VISTA: Carga de inventario (movimientos al consolidado)
+# --------------------------------------------------
+elif vista == "🧾 Carga de inventario":
+    st.header("🧾 Carga de inventario")
+    st.markdown(
+        "1) Descarga la plantilla y llena la hoja **Movimientos_Inventario** "
+        "(las primeras 4 columnas quedan vacías).  \n"
+        "2) Sube el archivo (Excel o CSV) y da clic en **Cargar movimientos**.  \n"
+        "3) Anota el folio generado para futuras consultas."
+    )
+    st.link_button("⬇️ Descargar plantilla", PLANTILLA_INVENTARIO_XLSX_URL)
+
+    archivo_mov = st.file_uploader(
+        "Archivo de movimientos",
+        type=["csv", "xlsx", "xls"],
+        key="archivo_movimientos",
+    )
+    if archivo_mov is not None and st.button("📤 Cargar movimientos", key="btn_cargar_movimientos"):
+        # Se lee, valida y registra por bloques: el archivo no se carga completo en memoria.
+        folio_inv = cargar_movimientos_por_bloques(archivo_mov)
+        if folio_inv:
+            st.session_state["ultimo_inventario_folio"] = folio_inv
+
+    if st.session_state["ultimo_inventario_folio"]:
+        st.info(f"Último folio de inventario: **{st.session_state['ultimo_inventario_folio']}**")
@@ -0,0 +1 @@
+"""Benchmarks fuera de línea. Ejecutar desde la raíz: python -m benchmarks.<nombre>"""
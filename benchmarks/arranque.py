@@ -0,0 +1,118 @@
+"""
+Arranque en frío y costo por rerun de la app, ejecutada con AppTest contra
+las hojas de `benchmarks.hojas_locales`.
+
+    python -m benchmarks.arranque [--app app.py] [--procesos 5] [--reruns 20] [--filas 5000]
+
+Cada arranque es un proceso nuevo: se mide la primera ejecución del script
+(importaciones, configuración del módulo y primer render, con la copia local
+de las hojas ya en disco, como al reiniciar el servidor) y después la mediana
+de `--reruns` ejecuciones más en el mismo proceso. Se cuenta sólo el tiempo
+del hilo del script, no la espera de AppTest, y el script se compila una
+sola vez por proceso, como en el servidor. Se reporta también qué
+dependencias pesadas quedaron importadas sin que se usaran.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.hojas_locales import ServidorHojas, hojas_sinteticas
+
+PESADAS = ["altair", "openpyxl", "xlsxwriter"]
+
+_HIJO = r"""
+import json, sys, time
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+from streamlit.testing.v1 import AppTest
+
+# Se mide la ejecución del script en su hilo, sin la espera de AppTest.
+duraciones = []
+_run_script = ScriptRunner._run_script
+
+def _medido(self, rerun_data):
+    inicio = time.perf_counter()
+    try:
+        return _run_script(self, rerun_data)
+    finally:
+        duraciones.append(time.perf_counter() - inicio)
+
+ScriptRunner._run_script = _medido
+
+# AppTest crea un ScriptCache por ejecución y recompila app.py cada vez; el
+# servidor lo compila una vez por proceso. Se comparte el bytecode para medir
+# los reruns como en el servidor (la 1.ª ejecución sí incluye la compilación).
+_bytecode = {}
+_get_bytecode = ScriptCache.get_bytecode
+
+def _compartido(self, script_path):
+    if script_path not in _bytecode:
+        _bytecode[script_path] = _get_bytecode(self, script_path)
+    return _bytecode[script_path]
+
+ScriptCache.get_bytecode = _compartido
+
+app, secrets, reruns, pesadas = json.loads(sys.argv[1])
+at = AppTest.from_file(app, default_timeout=300)
+for clave, valor in secrets.items():
+    at.secrets[clave] = valor
+
+at.run()
+errores = [str(e.value) for e in at.exception]
+for _ in range(reruns):
+    at.run()
+
+print(json.dumps({
+    "primera": duraciones[0],
+    "reruns": duraciones[1:],
+    "errores": errores,
+    "importadas": [m for m in pesadas if m in sys.modules],
+}))
+"""
+
+
+def _arrancar(app: str, secrets: dict, reruns: int) -> dict:
+    salida = subprocess.run(
+        [sys.executable, "-c", _HIJO, json.dumps([app, secrets, reruns, PESADAS])],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(app)),
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--procesos", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--filas", type=int, default=5_000, help="renglones de cada hoja")
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+
+    with ServidorHojas(hojas_sinteticas(args.filas)) as servidor:
+        secrets = {**servidor.secrets(), "LOCAL_DATA_DIR": tempfile.mkdtemp(prefix="arranque-")}
+        # Primer proceso: descarga las hojas y deja la copia local, no se cuenta.
+        previo = _arrancar(app, secrets, 0)
+        assert not previo["errores"], previo["errores"]
+
+        resultados = [_arrancar(app, secrets, args.reruns) for _ in range(args.procesos)]
+
+    for r in resultados:
+        assert not r["errores"], r["errores"]
+    primeras = [r["primera"] * 1000 for r in resultados]
+    reruns = [t * 1000 for r in resultados for t in r["reruns"]]
+    print(f"app: {args.app}  procesos: {args.procesos}  reruns por proceso: {args.reruns}")
+    print(f"arranque (1.ª ejecución): mediana {statistics.median(primeras):8.1f} ms  "
+          f"(mín {min(primeras):.1f}, máx {max(primeras):.1f})")
+    if reruns:
+        print(f"rerun:                    mediana {statistics.median(reruns):8.1f} ms  "
+              f"(mín {min(reruns):.1f})")
+    print(f"importadas al arrancar:   {', '.join(resultados[0]['importadas']) or 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compara la lectura de un .xlsx de movimientos con `pd.read_excel` (como se
+hacía antes, incluido el segundo parseo cuando la hoja no se llama
+"Movimientos_Inventario") contra `HojaExcel` en modo sólo lectura.
+
+    python -m benchmarks.excel_movimientos [--filas 100000] [--repeticiones 3]
+"""
+import argparse
+import io
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from inventario.movimientos import HojaExcel
+
+HOJA = "Movimientos_Inventario"
+
+# Mismas columnas que USER_COLUMNS en inventario.esquemas.
+COLUMNAS = [
+    "Tipo", "CECO_Origen", "CECO_Destino", "Proveedor", "Pedido_Ref", "SKU",
+    "Producto", "Cantidad", "UoM", "Precio_Unitario", "Subtotal", "Lote",
+    "Caducidad", "Temperatura", "Observaciones",
+]
+# Columnas de trabajo que los usuarios agregan a la plantilla y no se leen.
+EXTRA = ["Notas_Almacen", "Revisado_Por", "Semana"]
+
+
+def libro_sintetico(filas: int, hoja: str, semilla: int = 7) -> bytes:
+    import xlsxwriter
+
+    rnd = random.Random(semilla)
+    salida = io.BytesIO()
+    libro = xlsxwriter.Workbook(salida, {"in_memory": True})
+    ws = libro.add_worksheet(hoja)
+    formato_fecha = libro.add_format({"num_format": "yyyy-mm-dd"})
+    ws.write_row(0, 0, COLUMNAS + EXTRA)
+
+    base = datetime(2024, 1, 1)
+    for i in range(1, filas + 1):
+        cantidad = rnd.randint(1, 200)
+        precio = round(rnd.uniform(5, 900), 2)
+        ws.write_row(i, 0, [
+            rnd.choice(["Entrada", "Salida", "Traspaso"]),
+            f"CECO-{rnd.randint(1, 40):03d}",
+            f"CECO-{rnd.randint(1, 40):03d}",
+            f"Proveedor {rnd.randint(1, 60)}",
+            f"PO-{rnd.randint(1, 99999):05d}",
+            rnd.randint(100000, 999999),
+            f"Producto {rnd.randint(1, 20000)}",
+            cantidad, "kg", precio, round(cantidad * precio, 2),
+            f"L{rnd.randint(1, 9999)}",
+        ])
+        ws.write_datetime(i, 12, base + timedelta(days=rnd.randint(0, 365)), formato_fecha)
+        ws.write_row(i, 13, [
+            rnd.choice(["Ambiente", "Refrigerado", "Congelado"]),
+            "" if i % 7 else "Revisar empaque",
+            "ok", "JL", rnd.randint(1, 52),
+        ])
+    libro.close()
+    return salida.getvalue()
+
+
+def leer_pandas(contenido: bytes) -> pd.DataFrame:
+    archivo = io.BytesIO(contenido)
+    try:
+        df = pd.read_excel(archivo, sheet_name=HOJA)
+    except ValueError:
+        archivo.seek(0)
+        df = pd.read_excel(archivo)
+    df.columns = df.columns.astype(str).str.strip()
+    return df[COLUMNAS]
+
+
+def leer_openpyxl(contenido: bytes) -> pd.DataFrame:
+    return HojaExcel(io.BytesIO(contenido), HOJA, COLUMNAS).leer()
+
+
+def _mejor_tiempo(func, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    casos = {
+        "hoja correcta": libro_sintetico(args.filas, HOJA),
+        "otra hoja (respaldo)": libro_sintetico(args.filas, "Hoja1"),
+    }
+
+    print(f"filas: {args.filas:,}  columnas leídas: {len(COLUMNAS)} de {len(COLUMNAS) + len(EXTRA)}")
+    for caso, contenido in casos.items():
+        esperado = leer_pandas(contenido)
+        obtenido = leer_openpyxl(contenido)
+        pd.testing.assert_frame_equal(
+            esperado.astype(str), obtenido.astype(str), check_dtype=False
+        )
+
+        t_pandas = _mejor_tiempo(lambda: leer_pandas(contenido), args.repeticiones)
+        t_hoja = _mejor_tiempo(lambda: leer_openpyxl(contenido), args.repeticiones)
+        print(f"\n{caso} ({len(contenido) / 1e6:.1f} MB)")
+        print(f"  pd.read_excel: {t_pandas:8.2f} s")
+        print(f"  HojaExcel:     {t_hoja:8.2f} s")
+        print(f"  aceleración:   {t_pandas / t_hoja:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Prueba de carga de `GeneradorFolios`: varios procesos con varios hilos piden
+folios al mismo contador y se verifica que no se repita ninguno.
+
+    python -m benchmarks.folios [--procesos 4] [--hilos 4] [--folios 5000]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from inventario.folios import GeneradorFolios
+
+
+def _trabajador(ruta: str, hilos: int, folios: int, cola) -> None:
+    generador = GeneradorFolios(ruta, nodo="B1")
+    resultados: list[list[str]] = [[] for _ in range(hilos)]
+
+    def pedir(i: int) -> None:
+        resultados[i] = [generador.nuevo("REQ")[0] for _ in range(folios)]
+
+    trabajadores = [threading.Thread(target=pedir, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    cola.put([f for lista in resultados for f in lista])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--folios", type=int, default=5000, help="por hilo")
+    args = parser.parse_args()
+
+    ruta = os.path.join(tempfile.mkdtemp(), "folios.sqlite3")
+    GeneradorFolios(ruta)  # crea la tabla antes de arrancar los procesos
+
+    cola = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(target=_trabajador, args=(ruta, args.hilos, args.folios, cola))
+        for _ in range(args.procesos)
+    ]
+    inicio = time.perf_counter()
+    for p in procesos:
+        p.start()
+    folios = [f for _ in procesos for f in cola.get()]
+    for p in procesos:
+        p.join()
+    transcurrido = time.perf_counter() - inicio
+
+    assert len(folios) == len(set(folios)), "folios repetidos"
+    print(f"procesos: {args.procesos}  hilos: {args.hilos}  folios: {len(folios):,}")
+    print(f"únicos:   {len(set(folios)):,}")
+    print(f"tiempo:   {transcurrido:8.2f} s  ({len(folios) / transcurrido:,.0f} folios/s)")
+    print(f"ejemplo:  {min(folios)} … {max(folios)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Sustituto local de Google Sheets y Apps Script con hojas sintéticas.
+
+    python -m benchmarks.hojas_locales [--filas 100000] [--puerto 8765] [--latencia-ms 0]
+
+Sirve el catálogo, los requerimientos y la recepción como CSV publicados
+(`GET /hojas/<nombre>.csv`, con ETag y 304 igual que Google) y acepta los
+POST de los Apps Script (`POST /apps-script/<nombre>`, responde
+`{"status": "ok", "inserted": n}`). Al arrancar imprime los secrets para
+apuntar la app a este servidor (`.streamlit/secrets.toml`) y usar el panel
+de tiempos sin tocar las hojas reales; `benchmarks.suite` lo usa en proceso.
+"""
+import argparse
+import hashlib
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.normalizacion import PALABRAS, PRESENTACIONES
+from inventario.serializacion import dumps_json, loads_json
+
+PROVEEDORES = [f"Proveedor {i:02d}" for i in range(1, 31)]
+CECOS = [
+    "Burritos Masaryk", "Comisariato", "Polanco", "Roma", "Condesa",
+    "Santa Fe", "Coyoacán", "Satélite",
+]
+CATEGORIAS = ["Abarrotes", "Verduras", "Lácteos", "Carnes", "Bebidas", "Desechables", "Limpieza"]
+UNIDADES = ["pz", "kg", "lt", "caja", "bolsa"]
+
+# Días de historia de la hoja de requerimientos (los folios se reparten ahí).
+DIAS_HISTORIA = 730
+# Renglones promedio por folio.
+LINEAS_POR_FOLIO = 4
+
+COLUMNAS_REQUERIMIENTOS = [
+    "FECHA DE PEDIDO", "PROVEDOR", "INSUMO", "UNIDAD DE MEDIDA", "COSTO UNIDAD",
+    "CANTIDAD", "COSTO TOTAL", "FECHA DESEADA", "OBSERVACIONES", "ESTATUS", "ID_REQ",
+    "Hora", "CECO_DESTINO", "CATEGORIA", "Fecha aproximada de entrega", "SKU",
+    "CANTIDAD RECIBIDA", "CANTIDAD PENDIENTE", "Folio Generado de Recepcion",
+]
+COLUMNAS_PLANTILLA = [
+    "Tipo", "CECO_Origen", "CECO_Destino", "Proveedor", "Pedido_Ref", "SKU", "Producto",
+    "Cantidad", "UoM", "Precio_Unitario", "Subtotal", "Lote", "Caducidad", "Temperatura",
+    "Observaciones", "Folio", "Usuario", "Chofer", "Unidad", "Recibido", "CECO_DESTINO",
+]
+
+# Secret de la app → hoja servida o Apps Script.
+SECRETS_HOJAS = {
+    "CATALOGO_CSV_URL": "catalogo",
+    "REQUERIMIENTOS_CSV_URL": "requerimientos",
+    "RECEPCION_CSV_URL": "recepcion",
+    "MOVIMIENTOS_TEMPLATE_CSV_URL": "plantilla",
+}
+APPS_SCRIPTS = ["consolidado", "requerimientos", "recepcion", "catalogo"]
+
+
+# --------------------------------------------------
+# Hojas sintéticas
+# --------------------------------------------------
+def catalogo_sintetico(filas: int, semilla: int = 7) -> pd.DataFrame:
+    """Hoja 'Catálogo' con los encabezados tal como vienen de Google."""
+    rnd = np.random.default_rng(semilla)
+    palabras = np.array(PALABRAS, dtype=object)
+    presentaciones = np.array(PRESENTACIONES, dtype=object)
+    nombres = (
+        palabras[rnd.integers(0, len(palabras), filas)] + " "
+        + palabras[rnd.integers(0, len(palabras), filas)] + " "
+        + palabras[rnd.integers(0, len(palabras), filas)] + " "
+        + presentaciones[rnd.integers(0, len(presentaciones), filas)]
+    )
+    return pd.DataFrame({
+        "Nombre": nombres,
+        "Categoría de producto": rnd.choice(CATEGORIAS, filas),
+        "Referencia interna": [f"SKU-{i:07d}" for i in range(1, filas + 1)],
+        "UdM de compra": rnd.choice(UNIDADES, filas),
+        "Proveedor": rnd.choice(PROVEEDORES, filas),
+    })
+
+
+def requerimientos_sinteticos(
+        filas: int,
+        catalogo: pd.DataFrame,
+        hoy: date | None = None,
+        semilla: int = 7,
+) -> pd.DataFrame:
+    """
+    Hoja de requerimientos con ~`LINEAS_POR_FOLIO` renglones por folio, en
+    orden de captura, repartidos en los últimos `DIAS_HISTORIA` días. Los
+    folios de más de un mes casi todos están cerrados; los recientes quedan
+    pendientes o parciales.
+    """
+    rnd = np.random.default_rng(semilla)
+    n_folios = max(1, filas // LINEAS_POR_FOLIO)
+
+    inicio = pd.Timestamp(hoy or date.today()) - pd.Timedelta(days=DIAS_HISTORIA)
+    momentos = inicio + pd.to_timedelta(
+        np.sort(rnd.integers(0, DIAS_HISTORIA * 86400, n_folios)), unit="s"
+    )
+    secuencia = pd.Index(np.arange(n_folios) % 10000).astype(str).str.zfill(4)
+    sufijos = momentos.strftime("%Y%m%d-%H%M%S") + "-BN-" + secuencia
+    ids = ("REQ-" + sufijos).to_numpy()
+    ids_recepcion = ("REC-" + sufijos).to_numpy()
+    fechas = momentos.strftime("%Y-%m-%d").to_numpy()
+    deseadas = (momentos + pd.Timedelta(days=7)).strftime("%Y-%m-%d").to_numpy()
+    horas = momentos.strftime("%H:%M:%S").to_numpy()
+
+    antiguedad = (pd.Timestamp(hoy or date.today()) - momentos).days.to_numpy()
+    azar = rnd.random(n_folios)
+    estatus = np.where(
+        antiguedad > 30,
+        np.where(azar < 0.9, "Cerrado", np.where(azar < 0.95, "Recibido", "Parcial")),
+        np.where(azar < 0.5, "Pendiente", np.where(azar < 0.8, "Parcial", "Cerrado")),
+    )
+    proveedores = rnd.choice(PROVEEDORES, n_folios)
+    cecos = rnd.choice(CECOS, n_folios)
+
+    folio = np.sort(rnd.integers(0, n_folios, filas))
+    producto = rnd.integers(0, len(catalogo), filas)
+    costo = rnd.uniform(5, 900, filas).round(2)
+    cantidad = rnd.integers(1, 50, filas).astype(float)
+
+    estatus_fila = estatus[folio]
+    recibida = np.where(
+        np.isin(estatus_fila, ["Cerrado", "Recibido"]), cantidad,
+        np.where(estatus_fila == "Parcial", np.floor(cantidad * rnd.random(filas)), 0.0),
+    )
+    folio_recepcion = np.where(recibida > 0, ids_recepcion[folio], "")
+
+    return pd.DataFrame({
+        "FECHA DE PEDIDO": fechas[folio],
+        "PROVEDOR": proveedores[folio],
+        "INSUMO": catalogo["Nombre"].to_numpy()[producto],
+        "UNIDAD DE MEDIDA": catalogo["UdM de compra"].to_numpy()[producto],
+        "COSTO UNIDAD": costo,
+        "CANTIDAD": cantidad,
+        "COSTO TOTAL": (costo * cantidad).round(2),
+        "FECHA DESEADA": deseadas[folio],
+        "OBSERVACIONES": np.where(np.arange(filas) % 11 == 0, "Urgente", ""),
+        "ESTATUS": estatus_fila,
+        "ID_REQ": ids[folio],
+        "Hora": horas[folio],
+        "CECO_DESTINO": cecos[folio],
+        "CATEGORIA": catalogo["Categoría de producto"].to_numpy()[producto],
+        "Fecha aproximada de entrega": deseadas[folio],
+        "SKU": catalogo["Referencia interna"].to_numpy()[producto],
+        "CANTIDAD RECIBIDA": recibida,
+        "CANTIDAD PENDIENTE": cantidad - recibida,
+        "Folio Generado de Recepcion": folio_recepcion,
+    }, columns=COLUMNAS_REQUERIMIENTOS)
+
+
+def recepcion_sintetica(filas: int, requerimientos: pd.DataFrame, semilla: int = 7) -> pd.DataFrame:
+    """Hoja 'Recepción' con `filas` renglones de lo ya recibido en `requerimientos`."""
+    rnd = np.random.default_rng(semilla)
+    recibidos = requerimientos[requerimientos["CANTIDAD RECIBIDA"] > 0]
+    if recibidos.empty:
+        recibidos = requerimientos
+    muestra = recibidos.iloc[np.sort(rnd.integers(0, len(recibidos), filas))]
+    return pd.DataFrame({
+        "Fecha de recepción": muestra["FECHA DESEADA"].to_numpy(),
+        "PROVEEDOR": muestra["PROVEDOR"].to_numpy(),
+        "FACTURA / TICKET": [f"F-{i:07d}" for i in range(1, filas + 1)],
+        "SKU": muestra["SKU"].to_numpy(),
+        "PRODUCTO": muestra["INSUMO"].to_numpy(),
+        "UNIDAD DE MEDIDA": muestra["UNIDAD DE MEDIDA"].to_numpy(),
+        "CANTIDAD PO": muestra["CANTIDAD"].to_numpy(),
+        "CANTIDAD RECIBIDA": muestra["CANTIDAD RECIBIDA"].to_numpy(),
+        "TEMP (°C)": 4,
+        "CALIDAD (OK / RECHAZO)": "OK",
+        "OBSERVACIONES": "",
+        "RECIBIÓ": "Almacén",
+        "FOLIO": "",
+        "APROBÓ": "Gerente",
+        "ID DE REQUERIMIENTO AL QUE CORRESPONDE": muestra["ID_REQ"].to_numpy(),
+        "Folio Generado de Recepcion": muestra["Folio Generado de Recepcion"].to_numpy(),
+        "fecha de caducidad": "",
+    })
+
+
+def a_csv(df: pd.DataFrame, encabezado: bool = True) -> bytes:
+    """CSV como lo publica Google Sheets (UTF-8, sin índice)."""
+    return df.to_csv(index=False, header=encabezado).encode("utf-8")
+
+
+def hojas_sinteticas(filas: int, hoy: date | None = None, semilla: int = 7) -> dict[str, bytes]:
+    """CSV de catálogo, requerimientos y recepción de `filas` renglones cada uno."""
+    catalogo = catalogo_sintetico(filas, semilla)
+    requerimientos = requerimientos_sinteticos(filas, catalogo, hoy, semilla)
+    return {
+        "catalogo": a_csv(catalogo),
+        "requerimientos": a_csv(requerimientos),
+        "recepcion": a_csv(recepcion_sintetica(filas, requerimientos, semilla)),
+        "plantilla": (",".join(COLUMNAS_PLANTILLA) + "\n").encode("utf-8"),
+    }
+
+
+# --------------------------------------------------
+# Servidor
+# --------------------------------------------------
+class ServidorHojas:
+    """
+    Servidor HTTP en un hilo. `publicar(nombre, csv)` cambia el contenido de
+    una hoja (cambia también su ETag); `filas_recibidas(nombre)` cuenta las
+    filas que llegaron a cada Apps Script. `latencia` (segundos) se agrega a
+    cada petición para simular la red hasta Google.
+    """
+
+    def __init__(self, hojas: dict[str, bytes] | None = None, latencia: float = 0.0, puerto: int = 0):
+        self.latencia = latencia
+        self._lock = threading.Lock()
+        self._hojas: dict[str, tuple[bytes, str]] = {}
+        self._filas: dict[str, int] = {}
+        self.peticiones = 0
+        for nombre, contenido in (hojas or {}).items():
+            self.publicar(nombre, contenido)
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_port}"
+
+    def url_hoja(self, nombre: str) -> str:
+        return f"{self.url}/hojas/{nombre}.csv"
+
+    def url_apps_script(self, nombre: str) -> str:
+        return f"{self.url}/apps-script/{nombre}"
+
+    def secrets(self) -> dict[str, str]:
+        """Secrets de la app apuntando a este servidor."""
+        secrets = {clave: self.url_hoja(nombre) for clave, nombre in SECRETS_HOJAS.items()}
+        for nombre in APPS_SCRIPTS:
+            secrets[f"APPS_SCRIPT_{nombre.upper()}_URL"] = self.url_apps_script(nombre)
+        return secrets
+
+    def publicar(self, nombre: str, contenido: bytes) -> None:
+        etag = '"%s"' % hashlib.sha1(contenido).hexdigest()
+        with self._lock:
+            self._hojas[nombre] = (contenido, etag)
+
+    def hoja(self, nombre: str) -> bytes:
+        with self._lock:
+            return self._hojas[nombre][0]
+
+    def filas_recibidas(self, nombre: str) -> int:
+        with self._lock:
+            return self._filas.get(nombre, 0)
+
+    def iniciar(self) -> "ServidorHojas":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def servir(self) -> None:
+        """Atiende en el hilo actual hasta Ctrl+C."""
+        try:
+            self._servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._servidor.server_close()
+
+    def detener(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self) -> "ServidorHojas":
+        return self.iniciar()
+
+    def __exit__(self, *exc) -> None:
+        self.detener()
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            # Keep-alive, como la sesión de requests contra Google; sin Nagle
+            # para que encabezados y cuerpo no esperen el ACK retrasado.
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _responder(self, status: int, cuerpo: bytes = b"", headers: dict | None = None):
+                self.send_response(status)
+                for clave, valor in (headers or {}).items():
+                    self.send_header(clave, valor)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def _esperar(self):
+                with servidor._lock:
+                    servidor.peticiones += 1
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+
+            def do_GET(self):
+                self._esperar()
+                ruta = self.path.split("?")[0]
+                nombre = ruta[len("/hojas/"):-len(".csv")] if ruta.startswith("/hojas/") else ""
+                with servidor._lock:
+                    hoja = servidor._hojas.get(nombre)
+                if hoja is None:
+                    self._responder(404)
+                    return
+                contenido, etag = hoja
+                if self.headers.get("If-None-Match") == etag:
+                    self._responder(304, headers={"ETag": etag})
+                    return
+                self._responder(200, contenido, {"ETag": etag, "Content-Type": "text/csv; charset=utf-8"})
+
+            def do_POST(self):
+                self._esperar()
+                nombre = self.path.split("?")[0].rsplit("/", 1)[-1]
+                datos = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    payload = loads_json(datos) if datos else {}
+                except ValueError:
+                    self._responder(400, dumps_json({"status": "error", "message": "JSON inválido"}))
+                    return
+                filas = payload.get("rows")
+                insertadas = len(filas) if isinstance(filas, list) else 1
+                with servidor._lock:
+                    servidor._filas[nombre] = servidor._filas.get(nombre, 0) + insertadas
+                self._responder(
+                    200,
+                    dumps_json({"status": "ok", "inserted": insertadas}),
+                    {"Content-Type": "application/json"},
+                )
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=100_000, help="renglones de cada hoja")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    hojas = hojas_sinteticas(args.filas)
+    print(f"hojas de {args.filas:,} filas generadas en {time.perf_counter() - inicio:.1f} s")
+
+    servidor = ServidorHojas(hojas, latencia=args.latencia_ms / 1000, puerto=args.puerto)
+    print("\n# .streamlit/secrets.toml")
+    for clave, valor in servidor.secrets().items():
+        print(f'{clave} = "{valor}"')
+    print(f"\nEscuchando en {servidor.url} (Ctrl+C para salir)")
+    servidor.servir()
+
+
+if __name__ == "__main__":
+    main()
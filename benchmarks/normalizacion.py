@@ -0,0 +1,67 @@
+"""
+Compara `df["Producto"].apply(norm_producto)` contra `normalizar_serie`
+sobre un catálogo sintético.
+
+    python -m benchmarks.normalizacion [--filas 50000] [--repeticiones 5]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from inventario.normalizacion import norm_producto, normalizar_serie
+
+PALABRAS = [
+    "Tortilla", "harina", "maíz", "Aguacate", "Hass", "Crema", "ácida", "Queso",
+    "Oaxaca", "Chipotle", "adobado", "Jalapeño", "Cebolla", "morada", "Limón",
+    "Frijol", "refrito", "Salsa", "verde", "Piña", "Jamón", "Café", "Azúcar",
+    "Pechuga", "Res", "Cilantro", "Chile", "güero", "Camarón", "Champiñón",
+]
+PRESENTACIONES = ["1 kg", "500 g", "(caja 12 pz)", "1/2 lt", "#3", "- bolsa", "4.5 kg"]
+
+
+def catalogo_sintetico(filas: int, semilla: int = 7) -> pd.Series:
+    rnd = random.Random(semilla)
+    nombres = [
+        f"  {' '.join(rnd.sample(PALABRAS, rnd.randint(2, 4)))} {rnd.choice(PRESENTACIONES)} "
+        for _ in range(filas)
+    ]
+    serie = pd.Series(nombres, dtype=object)
+    serie.iloc[::997] = None
+    return serie
+
+
+def _mejor_tiempo(func, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    serie = catalogo_sintetico(args.filas)
+    normalizar_serie(serie.head(10))  # construye la tabla de acentos fuera de la medición
+
+    esperado = serie.apply(norm_producto)
+    obtenido = normalizar_serie(serie)
+    assert esperado.astype(str).tolist() == obtenido.astype(str).tolist(), "resultados distintos"
+
+    t_apply = _mejor_tiempo(lambda: serie.apply(norm_producto), args.repeticiones)
+    t_serie = _mejor_tiempo(lambda: normalizar_serie(serie), args.repeticiones)
+
+    print(f"filas: {args.filas:,} (únicos: {serie.nunique():,})")
+    print(f"apply(norm_producto): {t_apply * 1000:8.1f} ms")
+    print(f"normalizar_serie:     {t_serie * 1000:8.1f} ms")
+    print(f"aceleración:          {t_apply / t_serie:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
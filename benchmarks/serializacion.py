@@ -0,0 +1,87 @@
+"""
+Compara la serialización anterior de movimientos (`df.map(to_jsonable)` +
+`where` + `tolist` + `json.dumps`) contra `filas_json` + `dumps_json`.
+
+    python -m benchmarks.serializacion [--filas 200000] [--repeticiones 3]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from inventario.serializacion import dumps_json, filas_json, orjson
+
+
+def movimientos_sinteticos(filas: int, semilla: int = 7) -> pd.DataFrame:
+    rnd = np.random.default_rng(semilla)
+    cantidad = rnd.integers(1, 200, filas).astype(float)
+    cantidad[::53] = np.nan
+    caducidad = pd.Timestamp("2024-01-01") + pd.to_timedelta(rnd.integers(0, 365, filas), unit="D")
+    caducidad = pd.Series(caducidad)
+    caducidad.iloc[::17] = pd.NaT
+    observaciones = pd.Series(["Revisar empaque", None, "", "ok"] * (filas // 4 + 1))[:filas]
+    return pd.DataFrame({
+        "ID": "INV-20240101-120000",
+        "Tipo": rnd.choice(["Entrada", "Salida", "Traspaso"], filas),
+        "CECO_Origen": [f"CECO-{i:03d}" for i in rnd.integers(1, 40, filas)],
+        "SKU": rnd.integers(100000, 999999, filas),
+        "Producto": [f"Producto {random.Random(i).randint(1, 20000)}" for i in range(filas)],
+        "Cantidad": cantidad,
+        "Precio_Unitario": rnd.uniform(5, 900, filas).round(2),
+        "Caducidad": caducidad.to_numpy(),
+        "Observaciones": observaciones.to_numpy(),
+        "Fecha_Carga": "2024-01-01",
+    })
+
+
+def anterior(df: pd.DataFrame) -> bytes:
+    def to_jsonable(x):
+        if isinstance(x, (pd.Timestamp, datetime, date)):
+            return x.isoformat()
+        return x
+
+    df_json = df.map(to_jsonable)
+    df_json = df_json.astype(object).where(pd.notnull(df_json), None)
+    return json.dumps({"rows": df_json.values.tolist()}).encode("utf-8")
+
+
+def nueva(df: pd.DataFrame) -> bytes:
+    return dumps_json({"rows": filas_json(df)})
+
+
+def _mejor_tiempo(func, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    df = movimientos_sinteticos(args.filas)
+    # La versión anterior mandaba las fechas vacías como "NaT" (pd.NaT es un
+    # datetime); ahora van como null, igual que el resto de los nulos.
+    esperado = [[None if v == "NaT" else v for v in fila] for fila in json.loads(anterior(df))["rows"]]
+    assert esperado == json.loads(nueva(df))["rows"], "resultados distintos"
+
+    t_anterior = _mejor_tiempo(lambda: anterior(df), args.repeticiones)
+    t_nueva = _mejor_tiempo(lambda: nueva(df), args.repeticiones)
+
+    print(f"filas: {args.filas:,}  orjson: {'sí' if orjson is not None else 'no'}")
+    print(f"map + json.dumps:        {t_anterior * 1000:8.1f} ms")
+    print(f"filas_json + dumps_json: {t_nueva * 1000:8.1f} ms")
+    print(f"aceleración:             {t_anterior / t_nueva:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Tiempos de las rutas calientes de la app contra hojas sintéticas locales.
+
+    python -m benchmarks.suite [--filas 1000 10000 100000] [--repeticiones 3] [--casos catálogo folio]
+                               [--guardar base.json] [--comparar base.json] [--tolerancia 0.25]
+
+Las hojas las sirve `benchmarks.hojas_locales` en este mismo proceso, así
+que no hacen falta Google ni secrets. Los loaders y envíos de
+inventario.hojas e inventario.envios se llaman tal cual, con st.secrets
+apuntando a ese servidor (como lo hace AppTest); los demás casos ejecutan la
+ruta de `inventario` que recorre la función de la app indicada en la columna
+"app", con la misma configuración (sincronizador, almacén local, tablas por
+versión, archivo, serialización). De cada caso se reporta la mejor de
+`--repeticiones` mediciones; los estados fríos (sin copia local, versión
+nueva de la hoja, proceso nuevo) se preparan fuera de la medición.
+
+Con --comparar, un caso es regresión si tarda más de (1 + tolerancia) veces
+lo guardado y al menos --umbral-ms más; en ese caso el proceso sale con 1.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import config
+from streamlit.logger import set_log_level
+from streamlit.runtime.secrets import Secrets
+
+from benchmarks.hojas_locales import (
+    COLUMNAS_PLANTILLA,
+    LINEAS_POR_FOLIO,
+    ServidorHojas,
+    a_csv,
+    catalogo_sintetico,
+    recepcion_sintetica,
+    requerimientos_sinteticos,
+)
+from benchmarks.serializacion import movimientos_sinteticos
+from inventario.almacen import RETRASO_PUBLICACION, Almacen
+from inventario.archivo import ArchivoRequerimientos, folios_archivables
+from inventario.bandeja_salida import ENVIADO, FALLIDO
+from inventario.busqueda import IndiceProductos
+from inventario.catalogo import construir_vistas
+from inventario.config import bandeja
+from inventario.envios import enviar_a_consolidado
+from inventario.esquemas import (
+    DTYPES_CSV_REQ,
+    ESQUEMA_REQUERIMIENTOS,
+    REQUERIMIENTOS_COLUMNS,
+    tipar_requerimientos,
+)
+from inventario.hojas import load_catalogo_productos, load_recepcion_from_gsheet
+from inventario.indices import construir_indice_id_req, filas_por_id_req, indice_id_req
+from inventario.normalizacion import norm
+from inventario.pendientes import pendientes_por_id_req, tabla_pendientes
+from inventario.perfil import iniciar_rerun, medir
+from inventario.serializacion import dumps_json, filas_json, orjson
+from inventario.sincronizacion import Instantanea, SincronizadorHoja
+
+# Folios consultados por medición en las búsquedas por folio (< 1 ms cada una).
+FOLIOS_CONSULTADOS = 200
+# Fracción de filas que se agregan al final de la hoja en "filas nuevas".
+FRACCION_NUEVAS = 0.01
+# Mismo valor que DIAS_ARCHIVO_REQUERIMIENTOS por defecto en la app.
+DIAS_ARCHIVO = 180
+CONSULTAS_CATALOGO = ["queso oaxaca", "tortila harina", "chile", "aguacate hass 1 kg", "cafe"]
+# Segundos máximos para que la bandeja entregue un envío medido.
+ESPERA_ENTREGA = 120
+
+
+@dataclass
+class Caso:
+    nombre: str
+    app: str  # función de la app que recorre esta ruta
+    ejecutar: Callable[[], object]
+    preparar: Callable[[], None] | None = None
+    # Anotación de caché esperada en la medición o en una de las que abre
+    # por dentro: confirma que se midió la ruta que dice el nombre (p.ej. la
+    # instantánea del almacén y no una descarga).
+    cache: str | None = None
+    # Se corre antes de medir con el resultado de `ejecutar`.
+    verificar: Callable[[object], None] | None = None
+    veces: int = 1  # llamadas por medición; se reporta el tiempo por llamada
+    # Se corre después de la última medición (p.ej. esperar lo que quedó en segundo plano).
+    terminar: Callable[[], None] | None = None
+
+
+def _vaciar(directorio: str) -> str:
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio)
+    return directorio
+
+
+def _usar_secrets(secretos: dict) -> None:
+    """st.secrets de las funciones de la app (lo que hace AppTest); lee `secretos` en vivo."""
+    st.secrets = Secrets()
+    st.secrets._secrets = secretos
+    # Sin sesión de Streamlit, cada st.success/st.warning de la app avisa en el log.
+    config.set_option("logger.level", "error")
+    set_log_level("error")
+
+
+def _casos(servidor: ServidorHojas, filas: int, crecida: bytes, directorio: str) -> list[Caso]:
+    """
+    Casos sobre las hojas publicadas en `servidor`; `crecida` es la hoja de
+    requerimientos con filas agregadas al final.
+    """
+    rnd = np.random.default_rng(7)
+    estado: dict = {}
+    versiones = itertools.count()
+    datos = itertools.count()
+    secretos = {**servidor.secrets(), "PERFIL_REGISTRO": False}
+    _usar_secrets(secretos)
+
+    def datos_nuevos():
+        # LOCAL_DATA_DIR nuevo: sin copia local ni almacén, como un servidor recién instalado.
+        secretos["LOCAL_DATA_DIR"] = os.path.join(directorio, f"datos-{next(datos)}")
+
+    def datos_copiados():
+        # Copia de LOCAL_DATA_DIR en otra ruta: hojas y almacén en disco pero
+        # nada en memoria, como tras reiniciar el servidor.
+        destino = os.path.join(directorio, f"datos-{next(datos)}")
+        shutil.copytree(secretos["LOCAL_DATA_DIR"], destino)
+        secretos["LOCAL_DATA_DIR"] = destino
+
+    datos_nuevos()
+
+    # ---------------- catálogo ----------------
+    def catalogo_completo(df):
+        assert len(df) == filas, f"catálogo con {len(df)} filas, se esperaban {filas}"
+
+    def preparar_catalogo_df():
+        if "catalogo" not in estado:
+            estado["catalogo"] = load_catalogo_productos()
+
+    def preparar_busqueda():
+        if "indice_productos" not in estado:
+            preparar_catalogo_df()
+            estado["indice_productos"] = IndiceProductos(estado["catalogo"])
+
+    # ---------------- requerimientos ----------------
+    dir_req = os.path.join(directorio, "requerimientos")
+    opciones_req = dict(preparar=tipar_requerimientos, esquema=ESQUEMA_REQUERIMIENTOS, dtype=DTYPES_CSV_REQ)
+    publicada = servidor.hoja("requerimientos")
+    df_req = SincronizadorHoja(
+        "requerimientos", servidor.url_hoja("requerimientos"),
+        _vaciar(os.path.join(directorio, "requerimientos_base")), **opciones_req,
+    ).obtener(revalidar=True).df
+    inst = Instantanea(df_req, "banco-fija", time.time())
+
+    def nuevo_sinc_req():
+        estado["sinc_req"] = SincronizadorHoja(
+            "requerimientos", servidor.url_hoja("requerimientos"), dir_req, **opciones_req
+        )
+
+    def preparar_descarga_req():
+        servidor.publicar("requerimientos", publicada)
+        _vaciar(dir_req)
+        nuevo_sinc_req()
+
+    def preparar_filas_nuevas():
+        servidor.publicar("requerimientos", publicada)
+        nuevo_sinc_req()
+        estado["sinc_req"].obtener(revalidar=True)
+        estado["sinc_req"].intervalo_minimo = 0
+        servidor.publicar("requerimientos", crecida)
+
+    def incremental(inst_nueva):
+        assert inst_nueva.anterior is not None, "no se parseó de forma incremental"
+        assert len(inst_nueva.df) > len(df_req)
+
+    # ---------------- pendientes / folios ----------------
+    abiertos = df_req.loc[df_req["CANTIDAD PENDIENTE"] > 0, "ID_REQ"].unique()
+    candidatos = abiertos if len(abiertos) else df_req["ID_REQ"].unique()
+    folios = list(rnd.choice(candidatos, min(FOLIOS_CONSULTADOS, len(candidatos)), replace=False))
+
+    def preparar_tabla():
+        estado["inst_nueva"] = Instantanea(df_req, f"banco-{next(versiones)}", time.time())
+
+    def pendientes_completos(tabla):
+        esperado = df_req["CANTIDAD PENDIENTE"].sum()
+        obtenido = tabla.df["CANTIDAD PENDIENTE"].sum()
+        assert abs(esperado - obtenido) < 1e-6 * max(1.0, esperado), "pendientes distintos"
+
+    def pendientes_por_producto():
+        # calcular_pendientes_por_producto → pendientes_de_folio, sin los expanders de depuración.
+        for folio in folios:
+            pendientes = pendientes_por_id_req(inst, folio)
+            almacen.filas_sin_reflejar("recepciones", inst.obtenido_en - RETRASO_PUBLICACION)
+            pendientes.drop(columns="ID_REQ").sort_values(["INSUMO", "SKU"]).reset_index(drop=True)
+
+    def filas_de_folios():
+        for folio in folios:
+            filas_por_id_req(inst, folio)
+
+    # ---------------- almacén ----------------
+    ruta_almacen = os.path.join(_vaciar(os.path.join(directorio, "almacen")), "almacen.sqlite3")
+    almacen = Almacen(ruta_almacen)
+    almacen.importar("requerimientos", inst, ESQUEMA_REQUERIMIENTOS)
+    filas_folio = filas_json(df_req.loc[df_req["ID_REQ"] == folios[0], REQUERIMIENTOS_COLUMNS])
+    registrados = itertools.count()
+
+    def leer_almacen(alm: Almacen):
+        return alm.instantanea("requerimientos", tipar_requerimientos, ESQUEMA_REQUERIMIENTOS)
+
+    def preparar_importacion():
+        estado["inst_hoja"] = Instantanea(df_req, f"banco-{next(versiones)}", time.time())
+
+    def almacen_frio():
+        # Instancia nueva: nada en memoria, como tras reiniciar el servidor.
+        estado["almacen"] = Almacen(ruta_almacen)
+
+    def registrar_folio():
+        almacen.registrar(
+            "requerimientos", REQUERIMIENTOS_COLUMNS, filas_folio, "requerimiento",
+            f"REQ-banco-{next(registrados)}", servidor.url_apps_script("requerimientos"),
+        )
+        return leer_almacen(almacen)
+
+    def lectura_incremental(inst_almacen):
+        assert inst_almacen.anterior is not None, "no se leyó de forma incremental"
+        assert len(inst_almacen.df) >= len(df_req) + len(filas_folio)
+
+    # ---------------- archivo ----------------
+    dir_archivo = _vaciar(os.path.join(directorio, "archivo"))
+    tabla_pendientes(inst)
+    archivables = folios_archivables(inst, DIAS_ARCHIVO)
+    ArchivoRequerimientos(dir_archivo).archivar(df_req, archivables)
+    archivados = list(rnd.choice(archivables, min(FOLIOS_CONSULTADOS, len(archivables)), replace=False))
+
+    def preparar_archivo():
+        # Instancia nueva: particiones sin leer, como tras reiniciar el servidor.
+        estado["archivo"] = ArchivoRequerimientos(dir_archivo)
+
+    def buscar_archivados():
+        for folio in archivados:
+            estado["archivo"].buscar(folio)
+
+    # ---------------- recepción ----------------
+    def recepcion_completa(df):
+        assert len(df) == filas, f"recepción con {len(df)} filas, se esperaban {filas}"
+
+    # ---------------- consolidado ----------------
+    movimientos = movimientos_sinteticos(filas)
+    envios = itertools.count()
+
+    def esperar_entrega(folio: str):
+        limite = time.time() + ESPERA_ENTREGA
+        while time.time() < limite:
+            (envio,) = bandeja().envios(folios=[folio], limite=1)
+            if envio.estado in (ENVIADO, FALLIDO):
+                return envio
+            time.sleep(0.05)
+        raise AssertionError(f"la bandeja no entregó {folio} en {ESPERA_ENTREGA} s")
+
+    def preparar_consolidado():
+        # El envío anterior se entrega antes de medir: nada corre en segundo plano.
+        if "folio_consolidado" in estado:
+            esperar_entrega(estado["folio_consolidado"])
+        estado["folio_consolidado"] = f"INV-banco-{next(envios)}"
+        estado["movimientos"] = movimientos.assign(ID=estado["folio_consolidado"])
+        estado["recibidas"] = servidor.filas_recibidas("consolidado")
+
+    def enviar_consolidado():
+        enviar_a_consolidado(estado["movimientos"])
+        return estado["folio_consolidado"]
+
+    def envio_completo(folio):
+        envio = esperar_entrega(folio)
+        assert envio.estado == ENVIADO, f"envío fallido: {envio.ultimo_error}"
+        recibidas = servidor.filas_recibidas("consolidado") - estado["recibidas"]
+        assert recibidas == len(movimientos), f"llegaron {recibidas} de {len(movimientos)} filas"
+
+    casos = [
+        Caso("catálogo: descarga", "load_catalogo_productos (sin copia local)",
+             load_catalogo_productos, datos_nuevos, verificar=catalogo_completo),
+        Caso("catálogo: arranque", "load_catalogo_productos (proceso nuevo)",
+             load_catalogo_productos, datos_copiados, "instantánea", catalogo_completo),
+        Caso("catálogo: vistas e índice", "vistas_catalogo + indice_productos (versión nueva)",
+             lambda: (construir_vistas(estado["catalogo"]), IndiceProductos(estado["catalogo"])),
+             preparar_catalogo_df),
+        Caso("catálogo: búsqueda", "buscador de productos del requerimiento",
+             lambda: [estado["indice_productos"].buscar(c) for c in CONSULTAS_CATALOGO],
+             preparar_busqueda, veces=len(CONSULTAS_CATALOGO)),
+        Caso("requerimientos: descarga", "_instantanea_requerimientos (sin copia local)",
+             lambda: estado["sinc_req"].obtener(revalidar=True), preparar_descarga_req, "descarga"),
+        Caso("requerimientos: filas nuevas", "_instantanea_requerimientos (hoja creció al final)",
+             lambda: estado["sinc_req"].obtener(revalidar=True), preparar_filas_nuevas, "descarga",
+             incremental),
+        Caso("almacén: importar hoja", "_importar_requerimientos (versión nueva de la hoja)",
+             lambda: almacen.importar("requerimientos", estado["inst_hoja"], ESQUEMA_REQUERIMIENTOS),
+             preparar_importacion),
+        Caso("almacén: arranque", "load_requerimientos_from_gsheet (proceso nuevo)",
+             lambda: leer_almacen(estado["almacen"]), almacen_frio, "instantánea"),
+        Caso("almacén: registrar requerimiento", "encolar_requerimientos + lectura del almacén",
+             registrar_folio, lambda: leer_almacen(almacen), "incremental", lectura_incremental),
+        Caso("recepción: hoja", "load_recepcion_from_gsheet (sin copia local)",
+             load_recepcion_from_gsheet, datos_nuevos, verificar=recepcion_completa),
+        Caso("pendientes: tabla", "tabla_pendientes (versión nueva de la hoja)",
+             lambda: tabla_pendientes(estado["inst_nueva"]), preparar_tabla,
+             verificar=pendientes_completos),
+        Caso("recepción: pendientes por producto", "calcular_pendientes_por_producto",
+             pendientes_por_producto, lambda: tabla_pendientes(inst), veces=len(folios)),
+        Caso("folio: índice", "indice_id_req (versión nueva de la hoja)",
+             lambda: construir_indice_id_req(df_req)),
+        Caso("folio: filas", "buscar_folio_requerimiento (folio en la hoja)",
+             filas_de_folios, lambda: indice_id_req(inst), veces=len(folios)),
+        Caso("consolidado: serialización", "enviar_a_consolidado (filas_para_envio + JSON)",
+             lambda: dumps_json({"rows": filas_json(movimientos)})),
+        Caso("consolidado: envío", "enviar_a_consolidado (registro en el almacén)",
+             enviar_consolidado, preparar_consolidado, verificar=envio_completo,
+             terminar=lambda: esperar_entrega(estado["folio_consolidado"])),
+    ]
+    if archivados:
+        casos.insert(-2, Caso(
+            "folio: archivo", "buscar_folio_requerimiento (folio archivado)",
+            buscar_archivados, preparar_archivo, veces=len(archivados),
+        ))
+    return casos
+
+
+def _medir(caso: Caso, repeticiones: int) -> dict:
+    mejor = None
+    for i in range(repeticiones):
+        if caso.preparar is not None:
+            caso.preparar()
+        rerun = iniciar_rerun()
+        with medir(caso.nombre) as medicion:
+            resultado = caso.ejecutar()
+        if caso.cache is not None:
+            caches = [m.cache for m in rerun.mediciones if m.cache is not None]
+            assert caso.cache in caches, (
+                f"{caso.nombre}: se esperaba caché '{caso.cache}' y fue {caches or 'ninguna'}"
+            )
+        if i == 0 and caso.verificar is not None:
+            caso.verificar(resultado)
+        if mejor is None or medicion.ms < mejor.ms:
+            mejor = medicion
+    if caso.terminar is not None:
+        caso.terminar()
+    return {"ms": mejor.ms / caso.veces, "bytes": mejor.bytes, "app": caso.app}
+
+
+def _seleccionar(casos: list[Caso], filtros: list[str] | None) -> list[Caso]:
+    if not filtros:
+        return casos
+    filtros = [norm(f) for f in filtros]
+    return [c for c in casos if any(f in norm(c.nombre) for f in filtros)]
+
+
+def correr(filas: int, repeticiones: int, filtros: list[str] | None, latencia: float) -> dict[str, dict]:
+    inicio = time.perf_counter()
+    nuevas = max(LINEAS_POR_FOLIO, int(filas * FRACCION_NUEVAS))
+    catalogo = catalogo_sintetico(filas)
+    # Se generan de una vez las filas que se agregan después, para que la
+    # hoja crecida empiece exactamente con la publicada.
+    requerimientos = requerimientos_sinteticos(filas + nuevas, catalogo)
+    publicados = requerimientos.iloc[:filas]
+    hojas = {
+        "catalogo": a_csv(catalogo),
+        "requerimientos": a_csv(publicados),
+        "recepcion": a_csv(recepcion_sintetica(filas, publicados)),
+        "plantilla": (",".join(COLUMNAS_PLANTILLA) + "\n").encode("utf-8"),
+    }
+    crecida = hojas["requerimientos"] + a_csv(requerimientos.iloc[filas:], encabezado=False)
+    print(f"\n== {filas:,} filas (hojas generadas en {time.perf_counter() - inicio:.1f} s) ==")
+
+    directorio = tempfile.mkdtemp(prefix="banco-")
+    try:
+        with ServidorHojas(hojas, latencia=latencia) as servidor:
+            resultados = {}
+            for caso in _seleccionar(_casos(servidor, filas, crecida, directorio), filtros):
+                resultados[caso.nombre] = _medir(caso, repeticiones)
+                r = resultados[caso.nombre]
+                kb = f"{r['bytes'] / 1024:10,.0f} KB" if r["bytes"] else " " * 13
+                print(f"  {caso.nombre:<36} {r['ms']:10.2f} ms {kb}  {caso.app}")
+            return resultados
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def comparar(actual: dict, base: dict, tolerancia: float, umbral_ms: float) -> list[str]:
+    """Imprime la comparación por tamaño y devuelve las regresiones."""
+    regresiones = []
+    for filas, casos in actual.items():
+        anteriores = base.get(filas)
+        if not anteriores:
+            continue
+        print(f"\n== {int(filas):,} filas: contra la base ==")
+        print(f"  {'caso':<36} {'ms':>10} {'base':>10} {'cambio':>8}")
+        for nombre, r in casos.items():
+            previo = anteriores.get(nombre)
+            if previo is None:
+                print(f"  {nombre:<36} {r['ms']:10.2f} {'—':>10}")
+                continue
+            cambio = r["ms"] / previo["ms"] - 1 if previo["ms"] else 0.0
+            regresion = cambio > tolerancia and r["ms"] - previo["ms"] >= umbral_ms
+            marca = "  ⚠ regresión" if regresion else ""
+            print(f"  {nombre:<36} {r['ms']:10.2f} {previo['ms']:10.2f} {cambio:+8.1%}{marca}")
+            if regresion:
+                regresiones.append(f"{nombre} ({int(filas):,} filas): {previo['ms']:.2f} → {r['ms']:.2f} ms")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="tamaños de las hojas (hasta 1000000)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--casos", nargs="+", help="sólo los casos cuyo nombre contenga alguno")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="por petición al servidor local")
+    parser.add_argument("--guardar", help="JSON donde guardar esta corrida")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo permitido")
+    parser.add_argument("--umbral-ms", type=float, default=1.0, help="aumento absoluto mínimo para reportar")
+    args = parser.parse_args()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+
+    print(f"python {platform.python_version()}  pandas {pd.__version__}  "
+          f"orjson: {'sí' if orjson is not None else 'no'}  repeticiones: {args.repeticiones}")
+    resultados = {
+        str(filas): correr(filas, args.repeticiones, args.casos, args.latencia_ms / 1000)
+        for filas in args.filas
+    }
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "orjson": orjson is not None,
+                "repeticiones": args.repeticiones,
+                "latencia_ms": args.latencia_ms,
+                "resultados": resultados,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.guardar}")
+
+    if base is not None:
+        regresiones = comparar(resultados, base["resultados"], args.tolerancia, args.umbral_ms)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) de más de {args.tolerancia:.0%}:")
+            for r in regresiones:
+                print(f"  - {r}")
+            sys.exit(1)
+        print("\nSin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Capa de datos del sistema de inventario y requerimientos.
+
+Los módulos de este paquete se importan una sola vez por proceso de
+Streamlit, así que su estado (copias locales de las hojas, sesiones HTTP,
+etc.) se comparte entre todos los reruns y sesiones del servidor.
+"""
@@ -0,0 +1,557 @@
+"""
+Almacén local (SQLite) de requerimientos, recepciones, catálogo y
+movimientos: el registro de la app. Las hojas de Google quedan como réplica.
+
+- Escritura: `registrar()` guarda las filas en su tabla y su envío a Apps
+  Script en la misma transacción. La bandeja de salida vive en el mismo
+  archivo y su hilo replica el envío en segundo plano: o quedan las filas y
+  su envío, o ninguno.
+- Lectura: `instantanea()` publica cada tabla como `Instantanea`, con una
+  versión por revisión. Si desde la versión anterior sólo hubo altas, se leen
+  únicamente las filas nuevas (por rowid) y las estructuras derivadas
+  (pendientes, índices) se actualizan de forma incremental.
+- Hojas: `importar()` reemplaza una tabla con una versión de su hoja (lo que
+  se capturó directo en Sheets o cambió Apps Script) y conserva las filas de
+  la app que esa versión todavía no refleja. `vigilar()` lo repite en un
+  hilo, así que las lecturas no esperan a Google.
+- Depuración: `depurar()` saca de una tabla las claves que ya viven en otro
+  lado (los folios archivados, ver inventario.archivo); las importaciones
+  siguientes las omiten aunque la hoja todavía las traiga.
+
+Cada importación deja una instantánea Feather de las filas de la hoja: en un
+arranque en frío se lee esa instantánea y de SQLite sólo las filas agregadas
+después. Las columnas de cada tabla se guardan como c0, c1, … con su nombre
+en `columnas`, porque SQLite no distingue mayúsculas en los nombres
+(USER_COLUMNS trae CECO_Destino y CECO_DESTINO).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+from inventario.bandeja_salida import (
+    ENVIADO, ENVIANDO, PENDIENTE, BandejaSalida, insertar_envio, obtener_bandeja,
+)
+from inventario.esquemas import RECEPCION_COLUMNS, REQUERIMIENTOS_COLUMNS, USER_COLUMNS
+from inventario.perfil import anotar
+from inventario.serializacion import dumps_json, filas_json, loads_json
+from inventario.sincronizacion import Instantanea, concatenar
+
+logger = logging.getLogger(__name__)
+
+# Segundos que puede tardar Google en publicar en el CSV una fila que Apps
+# Script ya escribió: hasta entonces la fila local sigue contando.
+RETRASO_PUBLICACION = 300
+
+
+@dataclass(frozen=True)
+class Tabla:
+    columnas: tuple[str, ...]  # las que escribe la app; las de la hoja se agregan al importar
+    indices: tuple[str, ...]
+    # Columna que identifica en la hoja las filas de un envío de la app.
+    clave: str | None = None
+    # True: las filas de la app prevalecen sobre las de la hoja con su misma
+    # clave; False: la hoja las reemplaza en cuanto las refleja.
+    prevalece_local: bool = False
+
+
+TABLAS = {
+    "requerimientos": Tabla(
+        tuple(REQUERIMIENTOS_COLUMNS), ("ID_REQ", "SKU", "CECO_DESTINO"), clave="ID_REQ",
+    ),
+    "recepciones": Tabla(
+        tuple(RECEPCION_COLUMNS), ("ID DE REQUERIMIENTO AL QUE CORRESPONDE", "SKU"),
+        clave="Folio Generado de Recepcion", prevalece_local=True,
+    ),
+    "catalogo": Tabla(("Producto", "Categoria", "Referencia Interna"), ("Referencia Interna",)),
+    "movimientos": Tabla(
+        ("ID", *USER_COLUMNS, "Fecha_Carga", "Hora_Carga"), ("ID", "SKU", "CECO_DESTINO"),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class _Leida:
+    """Lo último que este proceso leyó de una tabla."""
+
+    reemplazo: int  # revisión de la importación de la que parte `df`
+    ultimo: int  # último rowid incluido en `df`
+    df: pd.DataFrame | None
+    esquema: str
+    inst: Instantanea | None = None  # None: la dejó importar(), aún sin publicar
+    # Sin publicar: versión publicada que `df` extiende (ver `_extiende`).
+    anterior: str | None = None
+
+
+def _claves(s: pd.Series) -> pd.Series:
+    return s.fillna("").astype(str).str.strip().str.lower()
+
+
+def _extiende(previa: Instantanea | None, df: pd.DataFrame) -> str | None:
+    """
+    Versión de `previa` si `df` empieza con sus mismas filas (p.ej. la hoja
+    sólo creció al final): las estructuras derivadas de `previa` (pendientes,
+    índices) se actualizan entonces sólo con las filas nuevas.
+    """
+    if previa is None or len(previa.df) > len(df) or not previa.df.columns.equals(df.columns):
+        return None
+    try:
+        # Por valor: las categorías de un categórico cambian cuando la hoja crece.
+        pd.testing.assert_frame_equal(
+            df.iloc[:len(previa.df)].reset_index(drop=True),
+            previa.df.reset_index(drop=True),
+            check_dtype=False, check_categorical=False, check_exact=True,
+        )
+    except AssertionError:
+        return None
+    return previa.version
+
+
+class Almacen:
+    """
+    Tablas de la app en un archivo SQLite compartido por todos los procesos
+    del servidor. Los DataFrames de `instantanea()` se comparten entre
+    sesiones: no modificarlos in-place.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.directorio = os.path.splitext(ruta)[0]  # instantáneas Feather
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._leidas: dict[str, _Leida] = {}
+        self._importadas: set[str] = set()
+        self._vigiladas: dict[str, tuple[Callable[[], object], float]] = {}
+        self._proximas: dict[str, float] = {}
+        self._despertar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self._hilo_lock = threading.Lock()
+
+        os.makedirs(self.directorio, exist_ok=True)
+        # La bandeja crea `envios` en este mismo archivo.
+        self.bandeja: BandejaSalida = obtener_bandeja(ruta)
+        with self._transaccion() as con:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS revisiones (
+                    tabla     TEXT PRIMARY KEY,
+                    revision  INTEGER NOT NULL DEFAULT 0,  -- sube con cada cambio
+                    reemplazo INTEGER NOT NULL DEFAULT 0,  -- revisión de la última importación
+                    hasta     INTEGER NOT NULL DEFAULT 0,  -- último rowid de las filas de la hoja
+                    hoja      TEXT NOT NULL DEFAULT '',    -- versión importada de la hoja
+                    importado REAL NOT NULL DEFAULT 0      -- cuándo se obtuvo esa versión
+                )
+                """
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS depurados ("
+                "tabla TEXT NOT NULL, clave TEXT NOT NULL, PRIMARY KEY (tabla, clave))"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS columnas ("
+                "tabla TEXT NOT NULL, nombre TEXT NOT NULL, columna TEXT NOT NULL, "
+                "PRIMARY KEY (tabla, nombre))"
+            )
+            for nombre, tabla in TABLAS.items():
+                con.execute(f"CREATE TABLE IF NOT EXISTS {nombre} (_envio INTEGER)")
+                con.execute(f"CREATE INDEX IF NOT EXISTS idx_{nombre}_envio ON {nombre}(_envio)")
+                con.execute("INSERT OR IGNORE INTO revisiones (tabla) VALUES (?)", (nombre,))
+                self._asegurar_columnas(con, nombre, tabla.columnas)
+
+    def _conexion(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    @contextmanager
+    def _transaccion(self, modo: str = "IMMEDIATE"):
+        """IMMEDIATE para escribir; DEFERRED para leer varias consultas de una misma revisión."""
+        con = self._conexion()
+        con.execute(f"BEGIN {modo}")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+    # ---------------- columnas ----------------
+    @staticmethod
+    def _columnas(con: sqlite3.Connection, tabla: str) -> tuple[list[str], list[str]]:
+        """(nombres, columnas SQLite) de `tabla`, en el orden en que se agregaron."""
+        filas = con.execute(
+            "SELECT nombre, columna FROM columnas WHERE tabla = ? ORDER BY rowid", (tabla,)
+        ).fetchall()
+        return [n for n, _ in filas], [c for _, c in filas]
+
+    @staticmethod
+    def _asegurar_columnas(con: sqlite3.Connection, tabla: str, nombres) -> list[str]:
+        """Columnas SQLite de `nombres`, agregando las que falten (dentro de una escritura)."""
+        existentes = dict(con.execute(
+            "SELECT nombre, columna FROM columnas WHERE tabla = ?", (tabla,)
+        ).fetchall())
+        fisicas = []
+        for nombre in map(str, nombres):
+            columna = existentes.get(nombre)
+            if columna is None:
+                columna = f"c{len(existentes)}"
+                con.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna}")
+                con.execute(
+                    "INSERT INTO columnas (tabla, nombre, columna) VALUES (?, ?, ?)",
+                    (tabla, nombre, columna),
+                )
+                if nombre in TABLAS[tabla].indices:
+                    con.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{columna} ON {tabla}({columna})"
+                    )
+                existentes[nombre] = columna
+            fisicas.append(columna)
+        return fisicas
+
+    @staticmethod
+    def _insertar(con: sqlite3.Connection, tabla: str, fisicas: list[str], filas) -> None:
+        """Inserta `filas` (tuplas de _envio + valores de `fisicas`)."""
+        con.executemany(
+            f"INSERT INTO {tabla} (_envio, {', '.join(fisicas)}) "
+            f"VALUES ({', '.join('?' * (len(fisicas) + 1))})",
+            filas,
+        )
+
+    def _leer(
+            self, con: sqlite3.Connection, tabla: str, desde: int, hasta: int | None = None,
+    ) -> tuple[pd.DataFrame | None, int]:
+        """Filas sin preparar con rowid en (desde, hasta] y el último rowid leído."""
+        nombres, fisicas = self._columnas(con, tabla)
+        sql = f"SELECT rowid, {', '.join(fisicas)} FROM {tabla} WHERE rowid > ?"
+        params = [desde]
+        if hasta is not None:
+            sql += " AND rowid <= ?"
+            params.append(hasta)
+        filas = con.execute(sql + " ORDER BY rowid", params).fetchall()
+        if not filas:
+            return None, desde
+        df = pd.DataFrame.from_records(filas, columns=["_rowid", *nombres])
+        return df.drop(columns="_rowid"), int(df["_rowid"].iloc[-1])
+
+    # ---------------- instantáneas Feather ----------------
+    def _ruta_instantanea(self, tabla: str, reemplazo: int, esquema: str) -> str:
+        return os.path.join(self.directorio, f"{tabla}-{reemplazo}-{esquema}.feather")
+
+    def _leer_instantanea(self, tabla: str, reemplazo: int, esquema: str) -> pd.DataFrame | None:
+        try:
+            return pd.read_feather(self._ruta_instantanea(tabla, reemplazo, esquema))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Instantánea ilegible de '%s'", tabla, exc_info=True)
+            return None
+
+    def _escribir_instantanea(self, tabla: str, reemplazo: int, esquema: str, df: pd.DataFrame) -> None:
+        ruta = self._ruta_instantanea(tabla, reemplazo, esquema)
+        try:
+            tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+            df.reset_index(drop=True).to_feather(tmp)
+            os.replace(tmp, ruta)
+            for nombre in os.listdir(self.directorio):
+                if nombre.startswith(f"{tabla}-") and nombre.endswith(".feather") \
+                        and not nombre.startswith(f"{tabla}-{reemplazo}-"):
+                    os.remove(os.path.join(self.directorio, nombre))
+        except Exception:
+            # Columnas con tipos mezclados, disco lleno, etc.: se sigue sin instantánea.
+            logger.warning("No se pudo guardar la instantánea de '%s'", tabla, exc_info=True)
+
+    # ---------------- escritura ----------------
+    def registrar(
+            self, tabla: str, columnas: list[str], filas: list, tipo: str, folio: str, url: str,
+            extra: dict | None = None,
+    ) -> int:
+        """
+        Guarda `filas` (listas alineadas con `columnas`) en `tabla` y encola su
+        envío a `url` en la misma transacción; el hilo de la bandeja lo replica
+        en la hoja. Devuelve el id del envío.
+        """
+        # En la tabla quedan los mismos valores que recibirá Apps Script.
+        valores = loads_json(dumps_json(filas))
+        with self._transaccion() as con:
+            fisicas = self._asegurar_columnas(con, tabla, columnas)
+            id_envio = insertar_envio(con, tipo, folio, url, filas, extra)
+            self._insertar(con, tabla, fisicas, [(id_envio, *fila) for fila in valores])
+            con.execute("UPDATE revisiones SET revision = revision + 1 WHERE tabla = ?", (tabla,))
+        self.bandeja.despertar()
+        return id_envio
+
+    # ---------------- hojas ----------------
+    def importada(self, tabla: str) -> bool:
+        """True si `tabla` ya recibió alguna versión de su hoja."""
+        if tabla not in self._importadas:
+            (hoja,) = self._conexion().execute(
+                "SELECT hoja FROM revisiones WHERE tabla = ?", (tabla,)
+            ).fetchone()
+            if not hoja:
+                return False
+            self._importadas.add(tabla)
+        return True
+
+    def importar(self, tabla: str, inst: Instantanea, esquema: str) -> bool:
+        """
+        Reemplaza las filas de la hoja en `tabla` con la versión `inst` (ya
+        preparada con `esquema`), una vez por versión, sin las claves
+        depuradas (ver `depurar`). Las filas registradas
+        desde la app se conservan después de las de la hoja, salvo que la hoja
+        prevalezca y ya las refleje: su clave aparece en `inst` o su envío se
+        entregó más de RETRASO_PUBLICACION segundos antes de obtenerla.
+        Devuelve False si esa versión ya estaba importada.
+        """
+        con = self._conexion()
+        (hoja,) = con.execute("SELECT hoja FROM revisiones WHERE tabla = ?", (tabla,)).fetchone()
+        if hoja == inst.version:
+            return False
+
+        definicion = TABLAS[tabla]
+        df = inst.df
+        claves_hoja = None
+        if definicion.clave is not None and definicion.clave in df.columns:
+            claves_hoja = _claves(df[definicion.clave])
+
+        with self._transaccion() as con:
+            (hoja,) = con.execute("SELECT hoja FROM revisiones WHERE tabla = ?", (tabla,)).fetchone()
+            if hoja == inst.version:
+                return False
+
+            if claves_hoja is not None:
+                depurados = [c for (c,) in con.execute(
+                    "SELECT clave FROM depurados WHERE tabla = ?", (tabla,)
+                )]
+                if depurados:
+                    vigentes = ~claves_hoja.isin(depurados)
+                    df, claves_hoja = df[vigentes], claves_hoja[vigentes]
+
+            nombres, fisicas = self._columnas(con, tabla)
+            locales = pd.DataFrame.from_records(
+                con.execute(
+                    f"SELECT t._envio, e.estado, e.actualizado, {', '.join('t.' + c for c in fisicas)} "
+                    f"FROM {tabla} t JOIN envios e ON e.id = t._envio ORDER BY t.rowid"
+                ).fetchall(),
+                columns=["_envio", "_estado", "_actualizado", *nombres],
+            )
+            if definicion.prevalece_local:
+                conservar = locales
+                if claves_hoja is not None and not locales.empty:
+                    df = df[~claves_hoja.isin(_claves(locales[definicion.clave]))]
+            else:
+                reflejadas = (locales["_estado"] == ENVIADO) & (
+                    locales["_actualizado"] < inst.obtenido_en - RETRASO_PUBLICACION
+                )
+                if claves_hoja is not None and not locales.empty:
+                    reflejadas |= _claves(locales[definicion.clave]).isin(claves_hoja[claves_hoja != ""])
+                conservar = locales[~reflejadas]
+
+            con.execute(f"DELETE FROM {tabla}")
+            self._insertar(
+                con, tabla, self._asegurar_columnas(con, tabla, df.columns),
+                [(None, *fila) for fila in filas_json(df)],
+            )
+            (hasta,) = con.execute(f"SELECT coalesce(max(rowid), 0) FROM {tabla}").fetchone()
+            if not conservar.empty:
+                self._insertar(
+                    con, tabla, fisicas,
+                    conservar[["_envio", *nombres]].itertuples(index=False, name=None),
+                )
+            con.execute(
+                "UPDATE revisiones SET revision = revision + 1, reemplazo = revision + 1, "
+                "hasta = ?, hoja = ?, importado = ? WHERE tabla = ?",
+                (hasta, inst.version, inst.obtenido_en, tabla),
+            )
+            (reemplazo,) = con.execute(
+                "SELECT reemplazo FROM revisiones WHERE tabla = ?", (tabla,)
+            ).fetchone()
+
+        df = df.reset_index(drop=True)
+        self._escribir_instantanea(tabla, reemplazo, esquema, df)
+        with self._lock:
+            previa = self._leidas.get(tabla)
+        # Se compara fuera del lock (en el hilo del almacén, no en el del script).
+        anterior = _extiende(previa.inst if previa is not None and previa.esquema == esquema else None, df)
+        with self._lock:
+            # Las filas de la hoja ya están preparadas: sólo falta leer las locales.
+            self._leidas[tabla] = _Leida(reemplazo, hasta, df, esquema, anterior=anterior)
+        self._importadas.add(tabla)
+        logger.info(
+            "Hoja importada en '%s': %s fila(s), %s local(es) sin reflejar",
+            tabla, len(df), len(conservar),
+        )
+        return True
+
+    def depurar(self, tabla: str, claves) -> int:
+        """
+        Borra de `tabla` las filas cuyas `claves` (normalizadas como `_claves`)
+        ya se guardaron en otro lado, y las anota para que `importar` no las
+        vuelva a traer de la hoja. Cuenta como una importación: los lectores
+        rehacen la tabla desde SQLite. Devuelve cuántas filas se borraron.
+        """
+        columna = TABLAS[tabla].clave
+        claves = [(tabla, c) for c in dict.fromkeys(str(c).strip().lower() for c in claves) if c]
+        if not claves:
+            return 0
+        with self._transaccion() as con:
+            con.executemany("INSERT OR IGNORE INTO depurados (tabla, clave) VALUES (?, ?)", claves)
+            (fisica,) = con.execute(
+                "SELECT columna FROM columnas WHERE tabla = ? AND nombre = ?", (tabla, columna)
+            ).fetchone() or (None,)
+            if fisica is None:
+                return 0
+            borradas = con.execute(
+                f"DELETE FROM {tabla} WHERE lower(trim(coalesce({fisica}, ''))) IN "
+                "(SELECT clave FROM depurados WHERE tabla = ?)",
+                (tabla,),
+            ).rowcount
+            if borradas:
+                con.execute(
+                    "UPDATE revisiones SET revision = revision + 1, reemplazo = revision + 1 "
+                    "WHERE tabla = ?",
+                    (tabla,),
+                )
+        if borradas:
+            logger.info("%s fila(s) depuradas de '%s'", borradas, tabla)
+        return borradas
+
+    def vigilar(self, tabla: str, importar: Callable[[], object], intervalo: float) -> None:
+        """
+        Corre `importar` (revalidar la hoja de `tabla` e importarla) en el hilo
+        del almacén, ahora y cada `intervalo` segundos. Llamarla de nuevo sólo
+        reemplaza la tarea; un error se registra y se reintenta en el siguiente turno.
+        """
+        with self._hilo_lock:
+            if tabla not in self._vigiladas:
+                self._proximas[tabla] = time.time()
+                self._despertar.set()
+            self._vigiladas[tabla] = (importar, intervalo)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="almacen-hojas", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            with self._hilo_lock:
+                tareas = list(self._vigiladas.items())
+            for tabla, (importar, intervalo) in tareas:
+                if self._proximas[tabla] > time.time():
+                    continue
+                try:
+                    importar()
+                except Exception:
+                    logger.warning("No se pudo importar la hoja de '%s'", tabla, exc_info=True)
+                self._proximas[tabla] = time.time() + intervalo
+            espera = min(self._proximas.values()) - time.time()
+            self._despertar.wait(max(espera, 1.0))
+            self._despertar.clear()
+
+    # ---------------- lectura ----------------
+    def instantanea(
+            self, tabla: str, preparar: Callable[[pd.DataFrame], pd.DataFrame], esquema: str,
+    ) -> Instantanea:
+        """
+        Versión actual de `tabla` preparada con `preparar` (la misma función y
+        `esquema` de su hoja; debe aceptar también filas ya preparadas, que es
+        lo que guarda `importar`). De SQLite sólo se leen las filas que no
+        estén ya en memoria o en la instantánea de la última importación.
+        """
+        with self._lock:
+            # Lo común: la tabla no cambió y basta una consulta, sin transacción.
+            leida = self._leidas.get(tabla)
+            if leida is not None and leida.inst is not None and leida.esquema == esquema:
+                (revision,) = self._conexion().execute(
+                    "SELECT revision FROM revisiones WHERE tabla = ?", (tabla,)
+                ).fetchone()
+                if leida.inst.version == self._version(tabla, revision):
+                    anotar(cache="memoria")
+                    return leida.inst
+            return self._instantanea(tabla, preparar, esquema)
+
+    def _version(self, tabla: str, revision: int) -> str:
+        # La ruta distingue almacenes en un mismo proceso (las tablas por
+        # versión de inventario.pendientes e inventario.indices son globales).
+        return f"{self.ruta}:{tabla}:{revision}"
+
+    def _instantanea(
+            self, tabla: str, preparar: Callable[[pd.DataFrame], pd.DataFrame], esquema: str,
+    ) -> Instantanea:
+        with self._transaccion("DEFERRED") as con:
+            revision, reemplazo, hasta, importado = con.execute(
+                "SELECT revision, reemplazo, hasta, importado FROM revisiones WHERE tabla = ?",
+                (tabla,),
+            ).fetchone()
+            version = self._version(tabla, revision)
+            leida = self._leidas.get(tabla)
+            if leida is not None and (leida.reemplazo, leida.esquema) == (reemplazo, esquema):
+                if leida.inst is not None and leida.inst.version == version:
+                    anotar(cache="memoria")
+                    return leida.inst
+                base, desde = leida.df, leida.ultimo
+                anterior = leida.inst.version if leida.inst is not None else leida.anterior
+                anotar(cache="incremental")
+            else:
+                base, desde, anterior = self._leer_instantanea(tabla, reemplazo, esquema), hasta, None
+                if base is None:
+                    crudas, _ = self._leer(con, tabla, 0, hasta)
+                    if crudas is not None:
+                        base = preparar(crudas)
+                        self._escribir_instantanea(tabla, reemplazo, esquema, base)
+                    anotar(cache="sqlite")
+                else:
+                    anotar(cache="instantánea")
+                # Otro proceso importó la hoja: si sólo creció, se conserva el camino incremental.
+                if base is not None and leida is not None and leida.esquema == esquema:
+                    anterior = _extiende(leida.inst, base)
+            nuevas, ultimo = self._leer(con, tabla, desde)
+
+            if nuevas is not None:
+                anotar(filas=len(nuevas))
+                nuevas = preparar(nuevas)
+                base = nuevas if base is None else concatenar(base, nuevas)
+            if base is None:
+                base = pd.DataFrame(columns=self._columnas(con, tabla)[0])
+
+            inst = Instantanea(base, version, importado, anterior, origen=f"{self.ruta}:{tabla}")
+            self._leidas[tabla] = _Leida(reemplazo, ultimo, base, esquema, inst)
+            return inst
+
+    def filas_sin_reflejar(self, tabla: str, desde: float) -> pd.DataFrame:
+        """
+        Filas de `tabla` registradas desde la app (sin preparar) cuyo envío
+        sigue en cola o enviándose, o se entregó después de `desde`. Los
+        fallidos no cuentan: nunca llegarán a la hoja.
+        """
+        con = self._conexion()
+        nombres, fisicas = self._columnas(con, tabla)
+        filas = con.execute(
+            f"SELECT {', '.join('t.' + c for c in fisicas)} "
+            f"FROM {tabla} t JOIN envios e ON e.id = t._envio "
+            "WHERE e.estado IN (?, ?) OR (e.estado = ? AND e.actualizado > ?) ORDER BY t.rowid",
+            (PENDIENTE, ENVIANDO, ENVIADO, desde),
+        ).fetchall()
+        return pd.DataFrame.from_records(filas, columns=nombres)
+
+
+_almacenes: dict[str, Almacen] = {}
+_almacenes_lock = threading.Lock()
+
+
+def obtener_almacen(ruta: str) -> Almacen:
+    """Almacén de `ruta` (uno por proceso), con su bandeja de salida en marcha."""
+    with _almacenes_lock:
+        almacen = _almacenes.get(ruta)
+        if almacen is None:
+            almacen = Almacen(ruta)
+            _almacenes[ruta] = almacen
+        return almacen
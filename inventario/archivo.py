@@ -0,0 +1,232 @@
+"""
+Archivo histórico de requerimientos, particionado por mes.
+
+Los folios cerrados (sin cantidad pendiente o con un estatus de cierre) cuya
+fecha —la que va en el propio folio, REQ-YYYYMMDD-HHMMSS— tiene más de
+`dias` días se copian a `<directorio>/AAAA-MM.feather` y salen de la tabla
+del almacén (y con ella de sus índices, que sólo cargan con los folios
+vigentes), aunque la hoja publicada todavía los traiga. Una búsqueda por
+ID_REQ que ya no está en el almacén va directo a la partición del mes del
+folio, así nada del historial se pierde.
+
+Las particiones se reescriben de forma atómica y sólo cuando reciben folios
+nuevos; las lecturas se guardan en memoria mientras el archivo no cambie.
+"""
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Callable
+
+import pandas as pd
+
+from inventario.indices import normalizar_folio
+from inventario.normalizacion import norm
+from inventario.pendientes import atributos_por_folio, tabla_pendientes
+from inventario.sincronizacion import Instantanea
+
+logger = logging.getLogger(__name__)
+
+# Estatus (normalizados con `norm`) con los que un folio se da por cerrado
+# aunque le quede cantidad pendiente.
+ESTATUS_CERRADOS = {"cerrado", "cancelado", "completo", "recibido"}
+
+# Particiones leídas que se mantienen en memoria.
+_MAX_PARTICIONES = 6
+
+_PATRON_FECHA = r"^[A-Za-z]+-(\d{8})-\d{6}"
+_PATRON_MES = re.compile(r"^\d{4}-\d{2}$")
+
+
+def fecha_de_folio(folio) -> date | None:
+    """Fecha codificada en el folio (REQ-YYYYMMDD-HHMMSS) o None si no la trae."""
+    encontrado = re.match(_PATRON_FECHA, str(folio).strip())
+    if not encontrado:
+        return None
+    fecha = pd.to_datetime(encontrado.group(1), format="%Y%m%d", errors="coerce")
+    return None if pd.isna(fecha) else fecha.date()
+
+
+def _fechas_de_folios(folios: pd.Series) -> pd.Series:
+    digitos = folios.astype(str).str.strip().str.extract(_PATRON_FECHA, expand=False)
+    return pd.to_datetime(digitos, format="%Y%m%d", errors="coerce")
+
+
+def folios_archivables(inst: Instantanea, dias: int, hoy: date | None = None) -> pd.Index:
+    """
+    ID_REQ normalizados de `inst` cerrados y con fecha de folio anterior a
+    hoy - `dias`. Los folios sin fecha en el folio no se archivan (no se
+    podrían encontrar después).
+    """
+    pendientes = tabla_pendientes(inst).df
+    if pendientes.empty:
+        return pd.Index([], dtype=object)
+
+    claves = pendientes["ID_REQ"].str.lower()
+    pendiente = pendientes["CANTIDAD PENDIENTE"].groupby(claves.to_numpy(), sort=False).sum()
+    cerrados = pendiente.index[pendiente.to_numpy() <= 0]
+
+    estatus = atributos_por_folio(inst)["ESTATUS"].astype(str).map(norm)
+    cerrados = cerrados.union(estatus.index[estatus.isin(ESTATUS_CERRADOS)])
+
+    limite = pd.Timestamp((hoy or date.today()) - timedelta(days=dias))
+    fechas = _fechas_de_folios(pd.Series(cerrados, index=cerrados))
+    return cerrados[(fechas < limite).to_numpy()]
+
+
+class ArchivoRequerimientos:
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()
+        self._particiones: OrderedDict[str, tuple[float, pd.DataFrame]] = OrderedDict()
+        self._version_archivada: str | None = None
+        # ID_REQ normalizados ya archivados; se carga la primera vez que se archiva.
+        self._archivados: set[str] | None = None
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, mes: str) -> str:
+        return os.path.join(self.directorio, f"{mes}.feather")
+
+    def meses(self) -> list[str]:
+        """Meses (AAAA-MM) con partición en disco, en orden."""
+        return sorted(
+            nombre[:-len(".feather")] for nombre in os.listdir(self.directorio)
+            if nombre.endswith(".feather") and _PATRON_MES.match(nombre[:-len(".feather")])
+        )
+
+    def leer_mes(self, mes: str) -> pd.DataFrame:
+        """Filas archivadas de `mes` (vacío si no hay partición). No modificar in-place."""
+        ruta = self._ruta(mes)
+        try:
+            modificado = os.path.getmtime(ruta)
+        except OSError:
+            return pd.DataFrame()
+
+        with self._lock:
+            guardada = self._particiones.get(mes)
+            if guardada is not None and guardada[0] == modificado:
+                self._particiones.move_to_end(mes)
+                return guardada[1]
+
+        df = pd.read_feather(ruta)
+        with self._lock:
+            self._particiones[mes] = (modificado, df)
+            self._particiones.move_to_end(mes)
+            while len(self._particiones) > _MAX_PARTICIONES:
+                self._particiones.popitem(last=False)
+        return df
+
+    def buscar(self, folio: str) -> pd.DataFrame:
+        """Copia de las filas archivadas de `folio`, leyendo sólo la partición de su mes."""
+        fecha = fecha_de_folio(folio)
+        if fecha is None:
+            return pd.DataFrame()
+        df = self.leer_mes(fecha.strftime("%Y-%m"))
+        if df.empty:
+            return df
+        return df[df["ID_REQ"].str.lower() == normalizar_folio(folio)].copy()
+
+    def entre(self, desde: date | None, hasta: date | None) -> pd.DataFrame:
+        """Filas archivadas de los meses (del folio) que tocan el rango [desde, hasta]."""
+        meses = self.meses()
+        if desde is not None:
+            meses = [m for m in meses if m >= desde.strftime("%Y-%m")]
+        if hasta is not None:
+            meses = [m for m in meses if m <= hasta.strftime("%Y-%m")]
+        partes = [df for df in (self.leer_mes(m) for m in meses) if not df.empty]
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, ignore_index=True)
+
+    def _folios_archivados(self) -> set[str]:
+        if self._archivados is None:
+            archivados: set[str] = set()
+            for mes in self.meses():
+                folios = pd.read_feather(self._ruta(mes), columns=["ID_REQ"])["ID_REQ"]
+                archivados.update(folios.str.lower())
+            self._archivados = archivados
+        return self._archivados
+
+    def archivar(self, df: pd.DataFrame, folios: pd.Index) -> int:
+        """
+        Copia a su partición las filas de `df` de los `folios` (normalizados)
+        que aún no estén archivados. Devuelve cuántos folios se agregaron.
+        """
+        archivados = self._folios_archivados()
+        folios = folios.difference(pd.Index(list(archivados), dtype=object))
+        if folios.empty:
+            return 0
+        claves = df["ID_REQ"].str.lower()
+        filas = df[claves.isin(folios)]
+        if filas.empty:
+            return 0
+
+        # Categóricas como texto: cada partición trae sus propias categorías.
+        filas = filas.assign(**{
+            col: filas[col].astype(str)
+            for col in filas.columns if isinstance(filas[col].dtype, pd.CategoricalDtype)
+        })
+        meses = _fechas_de_folios(filas["ID_REQ"]).dt.strftime("%Y-%m")
+
+        agregados = 0
+        for mes, grupo in filas.groupby(meses.to_numpy(), sort=True):
+            claves_mes = grupo["ID_REQ"].str.lower()
+            previas = self.leer_mes(mes)
+            # Otro proceso pudo haber archivado ya algunos.
+            nuevas = (
+                grupo if previas.empty
+                else grupo[~claves_mes.isin(previas["ID_REQ"].str.lower())]
+            )
+            if not nuevas.empty:
+                particion = pd.concat([previas, nuevas]) if not previas.empty else nuevas
+                ruta = self._ruta(mes)
+                tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+                particion.reset_index(drop=True).to_feather(tmp)
+                os.replace(tmp, ruta)
+                agregados += nuevas["ID_REQ"].str.lower().nunique()
+            archivados.update(claves_mes)
+        return agregados
+
+    def archivar_instantanea(
+            self, inst: Instantanea, dias: int, depurar: Callable[[list[str]], object] | None = None,
+    ) -> int:
+        """
+        Archiva los folios cerrados con más de `dias` días de `inst`, una vez
+        por versión de la hoja. Ya escritas las particiones, `depurar` recibe
+        los folios de `inst` que están en el archivo para sacarlos de la tabla
+        caliente (ver Almacen.depurar). Un error se registra, no interrumpe la
+        app y se reintenta con la siguiente importación.
+        """
+        with self._lock_escritura:
+            if self._version_archivada == inst.version:
+                return 0
+            try:
+                folios = folios_archivables(inst, dias)
+                agregados = self.archivar(inst.df, folios)
+                if depurar is not None:
+                    archivados = self._folios_archivados()
+                    depurar([f for f in folios if f in archivados])
+            except Exception:
+                logger.warning("No se pudo actualizar el archivo de requerimientos", exc_info=True)
+                return 0
+            self._version_archivada = inst.version
+        if agregados:
+            logger.info("%s folio(s) archivados en %s", agregados, self.directorio)
+        return agregados
+
+
+_archivos: dict[str, ArchivoRequerimientos] = {}
+_archivos_lock = threading.Lock()
+
+
+def obtener_archivo(directorio: str) -> ArchivoRequerimientos:
+    """Archivo de `directorio` (uno por proceso)."""
+    with _archivos_lock:
+        archivo = _archivos.get(directorio)
+        if archivo is None:
+            archivo = ArchivoRequerimientos(directorio)
+            _archivos[directorio] = archivo
+        return archivo
@@ -0,0 +1,298 @@
+"""
+Bandeja de salida (outbox) para los envíos a Apps Script.
+
+Los requerimientos y recepciones se guardan primero en una cola SQLite en
+disco y un hilo en segundo plano los entrega con `enviar_filas_en_lotes`.
+Así el script de Streamlit no espera la ida y vuelta a Google, y un envío
+que falla se reintenta solo (con backoff) sin perder las filas. Al
+entregarse, el envío conserva sólo sus datos de control: las filas ya están
+en la hoja (y en la tabla del almacén que lo registró).
+La cola puede compartir archivo con otras tablas: `insertar_envio` encola
+dentro de una transacción ajena (así lo hace inventario.almacen).
+
+Estados de cada envío: pendiente → enviando → enviado | fallido.
+Varios procesos pueden compartir la misma cola: cada envío se reclama de
+forma atómica y, si el proceso que lo tenía muere, se libera tras
+`LEASE_SEGUNDOS`. Cada lote confirmado se anota en `lotes_enviados`, y un
+reintento retoma desde el siguiente. Un lote que quedó sin respuesta (pudo
+aplicarse) sólo se reintenta solo si `servidor_deduplica` está activo (el
+Apps Script descarta claves de idempotencia repetidas); si no, el envío
+pasa a fallido para revisarlo en la hoja antes de reintentarlo a mano.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from inventario.cliente_http import enviar_filas_en_lotes
+from inventario.serializacion import dumps_json, loads_json
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE = "pendiente"
+ENVIANDO = "enviando"
+ENVIADO = "enviado"
+FALLIDO = "fallido"
+
+MAX_INTENTOS = 6
+LEASE_SEGUNDOS = 300
+SONDEO_SEGUNDOS = 5.0
+
+
+@dataclass(frozen=True)
+class Envio:
+    id: int
+    tipo: str
+    folio: str
+    estado: str
+    intentos: int
+    filas: int
+    insertadas: int | None
+    ultimo_error: str
+    creado: float
+    actualizado: float
+
+
+def insertar_envio(
+        con: sqlite3.Connection, tipo: str, folio: str, url: str, filas: list,
+        extra: dict | None = None,
+) -> int:
+    """
+    Inserta un envío pendiente con la conexión `con`, dentro de la transacción
+    de quien llama (ver inventario.almacen). Devuelve su id.
+    """
+    ahora = time.time()
+    cur = con.execute(
+        "INSERT INTO envios (tipo, folio, url, filas, extra, n_filas, estado, "
+        "creado, actualizado, proximo_intento) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            tipo, folio, url,
+            dumps_json(filas).decode("utf-8"),
+            json.dumps(extra or {}, ensure_ascii=False),
+            len(filas), PENDIENTE, ahora, ahora, ahora,
+        ),
+    )
+    return cur.lastrowid
+
+
+class BandejaSalida:
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        # True sólo si el Apps Script descarta claves de idempotencia ya aplicadas.
+        self.servidor_deduplica = False
+        self._local = threading.local()
+        self._despertar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self._hilo_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        con = self._conexion()
+        with con:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS envios (
+                    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tipo            TEXT NOT NULL,
+                    folio           TEXT NOT NULL,
+                    url             TEXT NOT NULL,
+                    filas           TEXT NOT NULL,
+                    extra           TEXT NOT NULL,
+                    n_filas         INTEGER NOT NULL,
+                    estado          TEXT NOT NULL,
+                    intentos        INTEGER NOT NULL DEFAULT 0,
+                    insertadas      INTEGER,
+                    ultimo_error    TEXT NOT NULL DEFAULT '',
+                    creado          REAL NOT NULL,
+                    actualizado     REAL NOT NULL,
+                    proximo_intento REAL NOT NULL,
+                    lotes_enviados  INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columnas = {c[1] for c in con.execute("PRAGMA table_info(envios)")}
+            if "lotes_enviados" not in columnas:
+                con.execute(
+                    "ALTER TABLE envios ADD COLUMN lotes_enviados INTEGER NOT NULL DEFAULT 0"
+                )
+            con.execute(
+                "CREATE INDEX IF NOT EXISTS idx_envios_estado ON envios(estado, proximo_intento)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_envios_folio ON envios(folio)")
+            # Colas anteriores guardaban las filas de los envíos ya entregados.
+            con.execute(
+                "UPDATE envios SET filas = '[]' WHERE estado = ? AND filas != '[]'", (ENVIADO,)
+            )
+
+    def _conexion(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    # ---------------- encolado / consulta ----------------
+    def encolar(self, tipo: str, folio: str, url: str, filas: list, extra: dict | None = None) -> int:
+        """Guarda el envío en disco y despierta al hilo de entrega."""
+        con = self._conexion()
+        with con:
+            id_envio = insertar_envio(con, tipo, folio, url, filas, extra)
+        self.despertar()
+        return id_envio
+
+    def despertar(self) -> None:
+        """Avisa al hilo de entrega que hay envíos nuevos (p.ej. tras `insertar_envio`)."""
+        self.iniciar()
+        self._despertar.set()
+
+    def envios(self, folios: list[str] | None = None, limite: int = 20) -> list[Envio]:
+        """Envíos más recientes (opcionalmente sólo de ciertos folios)."""
+        sql = (
+            "SELECT id, tipo, folio, estado, intentos, n_filas, insertadas, ultimo_error, "
+            "creado, actualizado FROM envios"
+        )
+        params: list = []
+        if folios:
+            sql += f" WHERE folio IN ({','.join('?' * len(folios))})"
+            params.extend(folios)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limite)
+        return [Envio(*fila) for fila in self._conexion().execute(sql, params).fetchall()]
+
+    def reintentar(self, id_envio: int) -> None:
+        """
+        Devuelve un envío fallido a la cola; retoma desde el primer lote sin
+        confirmar.
+        """
+        ahora = time.time()
+        con = self._conexion()
+        with con:
+            con.execute(
+                "UPDATE envios SET estado = ?, intentos = 0, proximo_intento = ?, actualizado = ? "
+                "WHERE id = ? AND estado = ?",
+                (PENDIENTE, ahora, ahora, id_envio, FALLIDO),
+            )
+        self.despertar()
+
+    # ---------------- entrega ----------------
+    def _reclamar(self) -> tuple | None:
+        ahora = time.time()
+        con = self._conexion()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            fila = con.execute(
+                "SELECT id, folio, url, filas, extra, intentos, lotes_enviados, insertadas "
+                "FROM envios "
+                "WHERE (estado = ? AND proximo_intento <= ?) OR (estado = ? AND actualizado < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDIENTE, ahora, ENVIANDO, ahora - LEASE_SEGUNDOS),
+            ).fetchone()
+            if fila is not None:
+                con.execute(
+                    "UPDATE envios SET estado = ?, actualizado = ? WHERE id = ?",
+                    (ENVIANDO, ahora, fila[0]),
+                )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return fila
+
+    def procesar_uno(self) -> bool:
+        """Entrega el siguiente envío listo. False si no había ninguno."""
+        fila = self._reclamar()
+        if fila is None:
+            return False
+
+        id_envio, folio, url, filas, extra, intentos, lotes_enviados, insertadas = fila
+        con = self._conexion()
+
+        def al_confirmar_lote(lote: int, insertadas_lote: int | None) -> None:
+            # Avance en disco: si el proceso muere, el reintento no repite este lote.
+            nonlocal insertadas
+            if insertadas_lote is not None:
+                insertadas = (insertadas or 0) + insertadas_lote
+            with con:
+                con.execute(
+                    "UPDATE envios SET lotes_enviados = ?, insertadas = ?, actualizado = ? "
+                    "WHERE id = ?",
+                    (lote, insertadas, time.time(), id_envio),
+                )
+
+        res = enviar_filas_en_lotes(
+            url, loads_json(filas), folio=folio, extra=json.loads(extra),
+            desde_lote=lotes_enviados + 1,
+            servidor_deduplica=self.servidor_deduplica,
+            al_confirmar_lote=al_confirmar_lote,
+        )
+
+        ahora = time.time()
+        with con:
+            if res.ok:
+                con.execute(
+                    "UPDATE envios SET estado = ?, intentos = ?, ultimo_error = '', "
+                    "filas = '[]', actualizado = ? WHERE id = ?",
+                    (ENVIADO, intentos + 1, ahora, id_envio),
+                )
+            else:
+                if res.error is not None:
+                    error = f"{type(res.error).__name__}: {res.error}"
+                elif res.status_code != 200:
+                    error = f"HTTP {res.status_code}"
+                else:
+                    error = f"Respuesta: {res.data if res.data is not None else res.texto[:200]}"
+                if res.lotes_totales > 1:
+                    error += f" (lotes enviados: {res.lotes_enviados}/{res.lotes_totales})"
+
+                intentos += 1
+                estado = FALLIDO if intentos >= MAX_INTENTOS else PENDIENTE
+                if res.sin_confirmar and not self.servidor_deduplica:
+                    # Repetir el lote podría duplicar filas en la hoja.
+                    estado = FALLIDO
+                    error = f"Sin confirmar el lote {res.lotes_enviados + 1}; revisa la hoja. {error}"
+                espera = min(300.0, 5.0 * 2 ** (intentos - 1))
+                con.execute(
+                    "UPDATE envios SET estado = ?, intentos = ?, ultimo_error = ?, "
+                    "actualizado = ?, proximo_intento = ? WHERE id = ?",
+                    (estado, intentos, error, ahora, ahora + espera, id_envio),
+                )
+                logger.warning("Envío %s (%s) falló: %s", id_envio, folio, error)
+        return True
+
+    def _bucle(self) -> None:
+        while True:
+            try:
+                if self.procesar_uno():
+                    continue
+            except Exception:
+                logger.exception("Error en la bandeja de salida")
+            self._despertar.wait(SONDEO_SEGUNDOS)
+            self._despertar.clear()
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de entrega de este proceso (idempotente)."""
+        with self._hilo_lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="bandeja-salida", daemon=True
+                )
+                self._hilo.start()
+
+
+_bandejas: dict[str, BandejaSalida] = {}
+_bandejas_lock = threading.Lock()
+
+
+def obtener_bandeja(ruta: str) -> BandejaSalida:
+    """Bandeja de `ruta` con su hilo de entrega ya en marcha (una por proceso)."""
+    with _bandejas_lock:
+        bandeja = _bandejas.get(ruta)
+        if bandeja is None:
+            bandeja = BandejaSalida(ruta)
+            _bandejas[ruta] = bandeja
+    bandeja.iniciar()
+    return bandeja
@@ -0,0 +1,124 @@
+"""
+Búsqueda aproximada de productos del catálogo.
+
+El índice se arma una sola vez por versión del catálogo sobre PRODUCTO_KEY,
+la referencia interna (SKU) y la categoría, normalizados con `norm_producto`
+(sin acentos, mayúsculas ni signos). Cada palabra de la consulta se compara
+por trigramas, así que tolera errores de captura ("tortila" encuentra
+"Tortilla de harina"); las coincidencias exactas, de prefijo y de SKU suben
+en el ranking.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from inventario.normalizacion import norm_producto, normalizar_serie
+from inventario.perfil import anotar, medido
+from inventario.sincronizacion import VersionesPorOrigen
+
+# Fracción mínima de trigramas de cada palabra que debe aparecer en el producto.
+UMBRAL_TRIGRAMAS = 0.5
+
+
+def _trigramas(texto: str) -> set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceProductos:
+    """Índice invertido de trigramas sobre las filas de un catálogo."""
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        self.claves = (
+            df["PRODUCTO_KEY"].to_numpy(dtype=object) if "PRODUCTO_KEY" in df.columns
+            else normalizar_serie(df["Producto"]).to_numpy()
+        )
+        self.skus = (
+            normalizar_serie(df["Referencia Interna"]).to_numpy()
+            if "Referencia Interna" in df.columns else np.full(n, "", dtype=object)
+        )
+        categorias = (
+            normalizar_serie(df["Categoria"]).to_numpy()
+            if "Categoria" in df.columns else np.full(n, "", dtype=object)
+        )
+        # Texto donde se buscan subcadenas; el separador no sobrevive a la
+        # normalización, así que no forma trigramas entre campos.
+        self.documentos = pd.Series(
+            [f"{c}|{s}|{g}" for c, s, g in zip(self.claves, self.skus, categorias)],
+            dtype=str,
+        )
+        self._claves_serie = pd.Series(self.claves, dtype=str)
+        self.longitudes = np.fromiter((len(c) for c in self.claves), dtype=np.int32, count=n)
+
+        postings: dict[str, list[int]] = {}
+        for fila, (c, s, g) in enumerate(zip(self.claves, self.skus, categorias)):
+            for trigrama in _trigramas(c) | _trigramas(s) | _trigramas(g):
+                postings.setdefault(trigrama, []).append(fila)
+        self.postings = {t: np.asarray(filas, dtype=np.int32) for t, filas in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def _puntaje_palabra(self, palabra: str) -> np.ndarray:
+        """Entre 0 y 1 por fila: trigramas compartidos (o 1/0 si la palabra es corta)."""
+        trigramas = _trigramas(palabra)
+        if not trigramas:
+            return self.documentos.str.contains(palabra, regex=False).to_numpy(dtype=np.float64)
+        listas = [self.postings[t] for t in trigramas if t in self.postings]
+        if not listas:
+            return np.zeros(len(self))
+        conteo = np.bincount(np.concatenate(listas), minlength=len(self))
+        return conteo / len(trigramas)
+
+    def buscar(self, consulta: str, k: int = 20, mascara: np.ndarray | None = None) -> np.ndarray:
+        """
+        Posiciones (en el DataFrame indexado) de los `k` mejores resultados,
+        de mejor a peor. `mascara` restringe las filas candidatas.
+        """
+        palabras = [p for p in (norm_producto(w) for w in str(consulta).split()) if p]
+        if not palabras or len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        puntajes = [self._puntaje_palabra(p) for p in palabras]
+        candidatas = np.minimum.reduce(puntajes) >= UMBRAL_TRIGRAMAS
+        if mascara is not None:
+            candidatas &= mascara
+        filas = np.flatnonzero(candidatas)
+        if len(filas) == 0:
+            return filas
+
+        puntaje = np.add.reduce(puntajes)[filas]
+        documentos = self.documentos.iloc[filas]
+        contiene = np.logical_and.reduce([
+            documentos.str.contains(p, regex=False).to_numpy(dtype=bool) for p in palabras
+        ])
+        puntaje += 1.0 * contiene
+        puntaje += 0.5 * self._claves_serie.iloc[filas].str.startswith(palabras[0]).to_numpy(dtype=bool)
+        puntaje += 2.0 * (self.skus[filas] == "".join(palabras))
+
+        # Mayor puntaje primero; a igualdad, el nombre más corto (más específico).
+        orden = np.lexsort((self.longitudes[filas], -puntaje))
+        return filas[orden[:k]]
+
+
+_indices = VersionesPorOrigen()  # IndiceProductos
+_lock = threading.Lock()
+
+
+@medido("búsqueda: índice")
+def indice_productos(df: pd.DataFrame, version: tuple[str, str] | None) -> IndiceProductos:
+    """
+    Índice del catálogo `df` para su `version`, (origen, versión) como en
+    `vistas_catalogo` (se arma una vez por versión).
+    Sin versión conocida se arma al vuelo sin guardarlo.
+    """
+    if version is None:
+        return IndiceProductos(df)
+    with _lock:
+        indice = _indices.get(*version)
+        anotar(cache="memoria" if indice is not None else "fallo")
+        if indice is None:
+            indice = IndiceProductos(df)
+            _indices.guardar(*version, indice)
+        return indice
@@ -0,0 +1,300 @@
+"""
+Caché compartida con TTL, límite de tamaño y sello de versión.
+
+Sustituye a `@st.cache_data` en los loaders: el valor se serializa (pickle)
+en un backend que pueden compartir varios procesos de Streamlit (SQLite en
+disco) y cada proceso guarda además una copia deserializada en memoria, que
+sólo se vuelve a leer cuando cambia el sello de versión del backend.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol
+
+from inventario.perfil import anotar
+
+# Cambiar si cambia el formato de lo que guardan los loaders: invalida todo.
+ESQUEMA_CACHE = 1
+
+
+@dataclass(frozen=True)
+class MetaEntrada:
+    version: str
+    creado: float
+    expira: float
+
+
+class BackendCache(Protocol):
+    def consultar(self, clave: str) -> MetaEntrada | None:
+        """Metadatos de la entrada (sin leer el valor)."""
+
+    def leer(self, clave: str) -> tuple[MetaEntrada, bytes] | None:
+        ...
+
+    def guardar(self, clave: str, valor: bytes, version: str, ttl: float) -> MetaEntrada:
+        ...
+
+    def renovar(self, clave: str, version: str, ttl: float) -> bool:
+        """Extiende el TTL si la entrada sigue en `version` (sin reescribir el valor)."""
+
+    def borrar(self, prefijo: str) -> None:
+        ...
+
+
+class CacheMemoria:
+    """Backend en memoria (un solo proceso). Útil en desarrollo."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2, max_entradas: int = 256):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._datos: OrderedDict[str, tuple[MetaEntrada, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consultar(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            return entrada[0] if entrada else None
+
+    def leer(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, valor, version, ttl):
+        ahora = time.time()
+        meta = MetaEntrada(version, ahora, ahora + ttl)
+        with self._lock:
+            self._datos[clave] = (meta, valor)
+            self._datos.move_to_end(clave)
+            total = sum(len(v) for _, v in self._datos.values())
+            while len(self._datos) > 1 and (
+                    len(self._datos) > self.max_entradas or total > self.max_bytes
+            ):
+                _, (_, viejo) = self._datos.popitem(last=False)
+                total -= len(viejo)
+        return meta
+
+    def renovar(self, clave, version, ttl):
+        ahora = time.time()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0].version != version:
+                return False
+            self._datos[clave] = (MetaEntrada(version, ahora, ahora + ttl), entrada[1])
+            return True
+
+    def borrar(self, prefijo):
+        with self._lock:
+            for clave in [c for c in self._datos if c.startswith(prefijo)]:
+                del self._datos[clave]
+
+
+class CacheSQLite:
+    """
+    Backend en un archivo SQLite (modo WAL), compartido por todos los
+    procesos que apunten a la misma ruta. Desaloja primero lo expirado y
+    después por LRU cuando se superan `max_bytes` o `max_entradas`.
+    """
+
+    def __init__(self, ruta: str, max_bytes: int = 512 * 1024 ** 2, max_entradas: int = 512):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with self._conexion() as con:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    clave    TEXT PRIMARY KEY,
+                    version  TEXT NOT NULL,
+                    creado   REAL NOT NULL,
+                    expira   REAL NOT NULL,
+                    accedido REAL NOT NULL,
+                    tamano   INTEGER NOT NULL,
+                    valor    BLOB NOT NULL
+                )
+                """
+            )
+
+    def _conexion(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def consultar(self, clave):
+        fila = self._conexion().execute(
+            "SELECT version, creado, expira FROM cache WHERE clave = ?", (clave,)
+        ).fetchone()
+        return MetaEntrada(*fila) if fila else None
+
+    def leer(self, clave):
+        con = self._conexion()
+        fila = con.execute(
+            "SELECT version, creado, expira, valor FROM cache WHERE clave = ?", (clave,)
+        ).fetchone()
+        if fila is None:
+            return None
+        with con:
+            con.execute("UPDATE cache SET accedido = ? WHERE clave = ?", (time.time(), clave))
+        return MetaEntrada(*fila[:3]), fila[3]
+
+    def guardar(self, clave, valor, version, ttl):
+        ahora = time.time()
+        meta = MetaEntrada(version, ahora, ahora + ttl)
+        con = self._conexion()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (clave, version, ahora, ahora + ttl, ahora, len(valor), valor),
+            )
+            self._desalojar(con, ahora)
+        return meta
+
+    def renovar(self, clave, version, ttl):
+        ahora = time.time()
+        con = self._conexion()
+        with con:
+            cur = con.execute(
+                "UPDATE cache SET creado = ?, expira = ?, accedido = ? "
+                "WHERE clave = ? AND version = ?",
+                (ahora, ahora + ttl, ahora, clave, version),
+            )
+        return cur.rowcount > 0
+
+    def _desalojar(self, con: sqlite3.Connection, ahora: float) -> None:
+        n, total = con.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM cache").fetchone()
+        if n <= self.max_entradas and total <= self.max_bytes:
+            return
+
+        con.execute("DELETE FROM cache WHERE expira < ?", (ahora,))
+        filas = con.execute("SELECT clave, tamano FROM cache ORDER BY accedido DESC").fetchall()
+        acumulado = 0
+        for i, (clave, tamano) in enumerate(filas):
+            acumulado += tamano
+            # Siempre se conserva la entrada más reciente.
+            if i > 0 and (i >= self.max_entradas or acumulado > self.max_bytes):
+                con.execute("DELETE FROM cache WHERE clave = ?", (clave,))
+
+    def borrar(self, prefijo):
+        con = self._conexion()
+        with con:
+            con.execute(
+                "DELETE FROM cache WHERE substr(clave, 1, ?) = ?", (len(prefijo), prefijo)
+            )
+
+
+_backends: dict[tuple[str, str], BackendCache] = {}
+_backends_lock = threading.Lock()
+
+
+def obtener_backend_cache(tipo: str, ruta: str = "", **kwargs) -> BackendCache:
+    """
+    Backend de caché por proceso: "sqlite" (compartido entre procesos vía
+    `ruta`) o "memoria" (sólo este proceso).
+    """
+    clave = (tipo, ruta)
+    with _backends_lock:
+        if clave not in _backends:
+            if tipo == "sqlite":
+                _backends[clave] = CacheSQLite(ruta, **kwargs)
+            elif tipo == "memoria":
+                _backends[clave] = CacheMemoria(**kwargs)
+            else:
+                raise ValueError(f"Backend de caché desconocido: {tipo!r}")
+        return _backends[clave]
+
+
+def serializar(valor: Any) -> tuple[bytes, str]:
+    """Bytes del valor y su sello de versión (hash del contenido)."""
+    datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+    return datos, hashlib.sha256(datos).hexdigest()[:16]
+
+
+@dataclass
+class _EnMemoria:
+    version: str
+    expira: float
+    valor: Any
+
+
+# Copias deserializadas por función; viven en el módulo (no en el script de
+# Streamlit) para sobrevivir a los reruns.
+_memoria: dict[str, dict[str, _EnMemoria]] = {}
+_locks: dict[str, threading.Lock] = {}
+_memoria_lock = threading.Lock()
+
+
+def cache_compartido(ttl: float, backend: Callable[[], BackendCache]):
+    """
+    Decorador tipo `st.cache_data(ttl=...)` sobre un backend compartido.
+
+    `func.clear()` borra las entradas de la función en memoria y en el backend.
+
+    El valor devuelto se comparte entre sesiones: no modificarlo in-place.
+    """
+
+    def decorador(func):
+        nombre = f"v{ESQUEMA_CACHE}:{func.__module__}.{func.__qualname__}"
+        with _memoria_lock:
+            memoria = _memoria.setdefault(nombre, {})
+            lock = _locks.setdefault(nombre, threading.Lock())
+
+        def _clave(args, kwargs) -> str:
+            return f"{nombre}:{args!r}:{sorted(kwargs.items())!r}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            clave = _clave(args, kwargs)
+
+            with lock:
+                ahora = time.time()
+                local = memoria.get(clave)
+                if local is not None and local.expira > ahora:
+                    anotar(cache="memoria")
+                    return local.valor
+
+                cache = backend()
+                meta = cache.consultar(clave)
+                if meta is not None and meta.expira > ahora:
+                    if local is not None and local.version == meta.version:
+                        local.expira = meta.expira
+                        anotar(cache="memoria")
+                        return local.valor
+                    leido = cache.leer(clave)
+                    if leido is not None:
+                        meta, datos = leido
+                        valor = pickle.loads(datos)
+                        memoria[clave] = _EnMemoria(meta.version, meta.expira, valor)
+                        anotar(cache="compartida", bytes=len(datos))
+                        return valor
+
+                anotar(cache="fallo")
+                valor = func(*args, **kwargs)
+                datos, version = serializar(valor)
+                meta = cache.guardar(clave, datos, version, ttl)
+                memoria[clave] = _EnMemoria(version, meta.expira, valor)
+                return valor
+
+        def clear():
+            with lock:
+                memoria.clear()
+                backend().borrar(f"{nombre}:")
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorador
@@ -0,0 +1,256 @@
+"""
+Catálogo de productos: limpieza de la hoja 'Catálogo' y vistas derivadas
+(categorías, productos por categoría, datos de cada producto) que se
+calculan una sola vez por versión del catálogo.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from inventario.normalizacion import norm, normalizar_serie
+from inventario.perfil import anotar, medido
+from inventario.sincronizacion import VersionesPorOrigen
+
+# Cambiar cuando cambie preparar_catalogo: invalida instantáneas.
+ESQUEMA_CATALOGO = "catalogo-v1"
+
+COLUMNAS_CATEGORICAS_CATALOGO = ["Categoria", "Proveedor"]
+
+
+def preparar_catalogo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza columnas del CSV del catálogo y genera PRODUCTO_KEY.
+    Categoria y Proveedor quedan como categóricos.
+    """
+    rename_map = {}
+    for col in df.columns:
+        n = norm(col)
+        if n == "nombre":
+            rename_map[col] = "Producto"
+        elif n in ("categoriadeproducto", "categoríadeproducto"):
+            rename_map[col] = "Categoria"
+        elif n in ("referenciainterna", "sku"):
+            rename_map[col] = "Referencia Interna"
+        elif n in ("udmdecompra", "unidaddecompra", "udmcompra"):
+            rename_map[col] = "UdM de Compra"
+        elif n in ("proveedor", "provedor"):
+            rename_map[col] = "Proveedor"
+
+    df = df.rename(columns=rename_map)
+
+    required = ["Producto", "Categoria", "Referencia Interna"]
+    for c in required:
+        if c not in df.columns:
+            raise ValueError(
+                "La hoja 'Catálogo' debe contener al menos "
+                "'Nombre', 'Categoría de producto' y 'Referencia interna'. "
+                f"Columnas leídas: {list(df.columns)}"
+            )
+
+    df = df[df["Producto"].notna()].copy()
+    df["Producto"] = df["Producto"].astype(str).str.strip()
+    df["Categoria"] = df["Categoria"].astype(str).str.strip()
+    df["Referencia Interna"] = df["Referencia Interna"].astype(str).str.strip()
+
+    df["UdM de Compra"] = (
+        df.get("UdM de Compra", "pz")
+        .astype(str)
+        .fillna("pz")
+        .str.strip()
+    )
+    df["Proveedor"] = (
+        df.get("Proveedor", "")
+        .astype(str)
+        .fillna("")
+        .str.strip()
+    )
+
+    df = df[
+        (df["Producto"] != "") &
+        (df["Producto"].str.lower() != "nan")
+        ].reset_index(drop=True)
+
+    df["PRODUCTO_KEY"] = normalizar_serie(df["Producto"])
+
+    for col in COLUMNAS_CATEGORICAS_CATALOGO:
+        df[col] = df[col].astype("category")
+
+    return df
+
+
+# Encabezados aceptados (ya normalizados con `norm`) al importar un requerimiento.
+COLUMNAS_IMPORTACION = {
+    "SKU": ("sku", "referenciainterna", "referencia"),
+    "Producto": ("producto", "insumo", "nombre"),
+    "Cantidad": ("cantidad", "cantidadrequerida"),
+    "Observaciones": ("observaciones", "observacion", "obs", "comentarios"),
+}
+
+
+def _clave_sku(s: pd.Series) -> pd.Series:
+    """SKU comparable: sin espacios, minúsculas y sin el ".0" de Excel."""
+    return (
+        s.fillna("").astype(str).str.strip()
+        .str.replace(r"\.0$", "", regex=True)
+        .str.lower()
+    )
+
+
+def _buscar(claves_catalogo: pd.Series, buscadas: pd.Series) -> np.ndarray:
+    """Posición de la primera fila del catálogo con cada clave buscada (-1 si no hay)."""
+    primeras = claves_catalogo[claves_catalogo != ""].drop_duplicates()
+    encontrado = pd.Index(primeras).get_indexer(buscadas)
+    # El -1 final hace que "no encontrado" (-1) siga siendo -1.
+    return np.append(primeras.index.to_numpy(), -1)[encontrado]
+
+
+@medido("catálogo: resolver líneas")
+def resolver_lineas(lineas: pd.DataFrame, catalogo: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Resuelve contra el catálogo las líneas de un archivo de requerimiento
+    (SKU y/o producto, cantidad, observaciones). Se busca por SKU y, si no
+    coincide, por nombre normalizado; ambas búsquedas son un solo
+    `get_indexer` sobre el catálogo.
+
+    Devuelve (encontradas, no_encontradas): las encontradas con las columnas
+    del carrito de requerimientos; las otras con su número de línea en el
+    archivo y el motivo.
+    """
+    renombrar = {}
+    for col in lineas.columns:
+        n = norm(col)
+        for destino, aceptados in COLUMNAS_IMPORTACION.items():
+            if n in aceptados and destino not in renombrar.values():
+                renombrar[col] = destino
+    lineas = lineas.rename(columns=renombrar)
+
+    if "SKU" not in lineas.columns and "Producto" not in lineas.columns:
+        raise ValueError(
+            "El archivo debe tener una columna 'SKU' o 'Producto'. "
+            f"Columnas leídas: {list(lineas.columns)}"
+        )
+    if "Cantidad" not in lineas.columns:
+        raise ValueError(
+            f"El archivo debe tener una columna 'Cantidad'. Columnas leídas: {list(lineas.columns)}"
+        )
+
+    lineas = lineas.reset_index(drop=True)
+    # Número de fila en el archivo (la 1 es el encabezado).
+    lineas["LINEA"] = lineas.index + 2
+    for col in ("SKU", "Producto", "Observaciones"):
+        if col not in lineas.columns:
+            lineas[col] = ""
+        lineas[col] = lineas[col].fillna("").astype(str).str.strip()
+    lineas = lineas[(lineas["SKU"] != "") | (lineas["Producto"] != "")]
+    cantidad = pd.to_numeric(lineas["Cantidad"], errors="coerce").to_numpy()
+
+    catalogo = catalogo.reset_index(drop=True)
+    pos = _buscar(_clave_sku(catalogo["Referencia Interna"]), _clave_sku(lineas["SKU"]))
+    por_nombre = _buscar(catalogo["PRODUCTO_KEY"], normalizar_serie(lineas["Producto"]))
+    pos = np.where(pos >= 0, pos, por_nombre)
+
+    valida = ~np.isnan(cantidad) & (cantidad > 0)
+    ok = (pos >= 0) & valida
+
+    no_encontradas = lineas.loc[~ok, ["LINEA", "SKU", "Producto", "Cantidad"]].copy()
+    no_encontradas["MOTIVO"] = np.where(
+        pos[~ok] < 0, "No está en el catálogo", "Cantidad vacía o no mayor a 0"
+    )
+
+    filas = catalogo.iloc[pos[ok]]
+    encontradas = pd.DataFrame({
+        "INSUMO": filas["Producto"].to_numpy(),
+        "UNIDAD DE MEDIDA": filas["UdM de Compra"].to_numpy(),
+        "CANTIDAD": cantidad[ok],
+        "Observaciones": lineas.loc[ok, "Observaciones"].to_numpy(),
+        "SKU": filas["Referencia Interna"].to_numpy(),
+        "PROVEDOR": filas["Proveedor"].astype(str).to_numpy(),
+        "Categoria": filas["Categoria"].astype(str).to_numpy(),
+    })
+    return encontradas, no_encontradas.reset_index(drop=True)
+
+
+@dataclass(frozen=True)
+class ProductoCatalogo:
+    sku: str
+    udm: str
+    proveedor: str
+    categoria: str
+
+
+@dataclass(frozen=True)
+class VistasCatalogo:
+    categorias: list[str]  # ordenadas
+    productos: list[str]  # todos, ordenados y sin repetir
+    productos_por_categoria: dict[str, list[str]]
+    mascaras: dict[str, np.ndarray]  # categoría → filas del catálogo (bool)
+    datos: dict[str, ProductoCatalogo]
+    datos_por_categoria: dict[tuple[str, str], ProductoCatalogo]
+
+    def producto(self, nombre: str, categoria: str | None = None) -> ProductoCatalogo | None:
+        """
+        Datos de la primera fila del catálogo con ese nombre (dentro de
+        `categoria`, si se indica). None si no existe.
+        """
+        if categoria is None:
+            return self.datos.get(nombre)
+        return self.datos_por_categoria.get((categoria, nombre))
+
+
+def construir_vistas(df: pd.DataFrame) -> VistasCatalogo:
+    categoria = df["Categoria"].astype(str)
+    producto = df["Producto"].astype(str)
+
+    def _datos(filas: pd.DataFrame) -> list[ProductoCatalogo]:
+        return [
+            ProductoCatalogo(str(sku), str(udm), str(prov), str(cat))
+            for sku, udm, prov, cat in zip(
+                filas["Referencia Interna"], filas["UdM de Compra"],
+                filas["Proveedor"], filas["Categoria"],
+            )
+        ]
+
+    primeros = df.drop_duplicates("Producto")
+    primeros_cat = df.assign(Categoria=categoria).drop_duplicates(["Categoria", "Producto"])
+
+    return VistasCatalogo(
+        categorias=sorted(categoria.unique().tolist()),
+        productos=sorted(producto.unique().tolist()),
+        productos_por_categoria={
+            cat: sorted(nombres.unique().tolist())
+            for cat, nombres in producto.groupby(categoria, sort=False)
+        },
+        mascaras={
+            cat: (categoria == cat).to_numpy()
+            for cat in categoria.unique().tolist()
+        },
+        datos=dict(zip(primeros["Producto"].astype(str), _datos(primeros))),
+        datos_por_categoria=dict(zip(
+            zip(primeros_cat["Categoria"], primeros_cat["Producto"].astype(str)),
+            _datos(primeros_cat),
+        )),
+    )
+
+
+_vistas = VersionesPorOrigen()  # VistasCatalogo
+_lock = threading.Lock()
+
+
+@medido("catálogo: vistas")
+def vistas_catalogo(df: pd.DataFrame, version: tuple[str, str] | None) -> VistasCatalogo:
+    """
+    Vistas derivadas del catálogo `df` para su `version`, (origen, versión)
+    como la da `inventario.hojas.version_catalogo` (una vez por versión).
+    Sin versión conocida se calculan al vuelo sin guardarlas.
+    """
+    if version is None:
+        return construir_vistas(df)
+    with _lock:
+        vistas = _vistas.get(*version)
+        anotar(cache="memoria" if vistas is not None else "fallo")
+        if vistas is None:
+            vistas = construir_vistas(df)
+            _vistas.guardar(*version, vistas)
+        return vistas
@@ -0,0 +1,206 @@
+"""
+Cliente HTTP para los endpoints de Apps Script.
+
+- Una sola `requests.Session` por proceso (keep-alive y pool de conexiones).
+- Reintentos con backoff exponencial + jitter cuando el POST no llegó a
+  procesarse (no se pudo conectar, 429, 503).
+- Las listas grandes de filas se parten en lotes acotados.
+- Cada lote lleva una clave de idempotencia derivada del folio
+  (`<folio>:<lote>/<total>`), en el cuerpo (`idempotency_key`) y en la
+  cabecera `Idempotency-Key`, para que Apps Script pueda descartar
+  duplicados cuando un reintento llega después de que el primero se aplicó.
+- Un POST sin respuesta (timeout de lectura, conexión cortada, 500/502/504)
+  pudo aplicarse: sólo se repite si el servidor deduplica (ver
+  `post_apps_script`).
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from inventario.perfil import anotar
+from inventario.serializacion import dumps_json
+
+TAMANO_LOTE = 100
+INTENTOS = 4
+BACKOFF_BASE = 0.5  # segundos; se duplica en cada intento
+TIMEOUT = (5, 60)  # (conexión, lectura)
+# El servidor no procesó la petición: repetirla es seguro.
+STATUS_REINTENTABLES = {429, 503}
+# La petición pudo aplicarse antes del error: repetirla puede duplicar filas.
+STATUS_SIN_CONFIRMAR = {500, 502, 504}
+
+_sesion: requests.Session | None = None
+_sesion_lock = threading.Lock()
+
+
+def obtener_sesion() -> requests.Session:
+    """Sesión compartida por todo el proceso."""
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            _sesion = sesion
+        return _sesion
+
+
+@dataclass
+class ResultadoEnvio:
+    status_code: int | None = None
+    data: dict | None = None  # JSON de la última respuesta; None si no era JSON
+    texto: str = ""  # cuerpo crudo de la última respuesta (debug)
+    insertadas: int | None = None  # suma de "inserted" de todos los lotes
+    lotes_enviados: int = 0
+    lotes_totales: int = 0
+    error: Exception | None = None
+    # El último lote quedó sin respuesta (pudo aplicarse o no).
+    sin_confirmar: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return (
+                self.error is None
+                and self.status_code == 200
+                and self.data is not None
+                and self.data.get("status") == "ok"
+                and self.lotes_enviados == self.lotes_totales
+        )
+
+
+def _sin_conectar(e: Exception) -> bool:
+    """True si la petición falló antes de llegar al servidor."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    causa = e.args[0] if isinstance(e, requests.ConnectionError) and e.args else None
+    return isinstance(causa, MaxRetryError) and isinstance(causa.reason, NewConnectionError)
+
+
+class SinConfirmar(Exception):
+    """El POST pudo aplicarse pero no hubo respuesta que lo confirme."""
+
+
+def post_apps_script(
+        url: str,
+        payload: dict,
+        clave_idempotencia: str,
+        intentos: int = INTENTOS,
+        timeout=TIMEOUT,
+        servidor_deduplica: bool = False,
+) -> requests.Response:
+    """
+    POST con reintentos. Devuelve la última respuesta (aunque no sea 200);
+    si todos los intentos fallan por red, relanza la última excepción.
+
+    Sólo se reintenta sin más lo que el servidor no procesó: errores al
+    conectar y los códigos 429/503. Un timeout de lectura, una conexión
+    cortada a media respuesta o un 500/502/504 pueden llegar después de que
+    Apps Script ya insertó las filas; repetir ese POST sólo es seguro si el
+    script descarta las peticiones con un `idempotency_key` ya aplicado
+    (p.ej. guardando las claves en PropertiesService o en una hoja). Mientras
+    el endpoint no lo garantice, `servidor_deduplica` debe quedar en False:
+    la excepción sale envuelta en `SinConfirmar` (o se devuelve la respuesta
+    5xx) para que quien llama revise la hoja antes de volver a enviar.
+    """
+    sesion = obtener_sesion()
+    # Se serializa una sola vez (también sirve para los reintentos).
+    cuerpo = dumps_json({**payload, "idempotency_key": clave_idempotencia})
+    headers = {
+        "Idempotency-Key": clave_idempotencia,
+        "Content-Type": "application/json",
+    }
+    reintentables = STATUS_REINTENTABLES | (STATUS_SIN_CONFIRMAR if servidor_deduplica else set())
+
+    for intento in range(intentos):
+        ultimo = intento == intentos - 1
+        try:
+            anotar(bytes=len(cuerpo))
+            resp = sesion.post(url, data=cuerpo, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if not (_sin_conectar(e) or servidor_deduplica):
+                raise SinConfirmar(f"{type(e).__name__}: {e}") from e
+            if ultimo:
+                raise
+        else:
+            if resp.status_code not in reintentables or ultimo:
+                return resp
+
+        espera = BACKOFF_BASE * (2 ** intento)
+        time.sleep(espera + random.uniform(0, espera / 2))
+
+    raise AssertionError("inalcanzable")
+
+
+def _clave_base(folio: str | None, rows: list) -> str:
+    if folio:
+        return str(folio)
+    contenido = json.dumps(rows, sort_keys=True, default=str).encode("utf-8")
+    return "sha1-" + hashlib.sha1(contenido).hexdigest()
+
+
+def enviar_filas_en_lotes(
+        url: str,
+        rows: list,
+        folio: str | None = None,
+        extra: dict | None = None,
+        tamano_lote: int = TAMANO_LOTE,
+        desde_lote: int = 1,
+        servidor_deduplica: bool = False,
+        al_confirmar_lote: Callable[[int, int | None], None] | None = None,
+) -> ResultadoEnvio:
+    """
+    Envía `rows` en lotes de `tamano_lote` como {"rows": [...], **extra}.
+    Se detiene en el primer lote que no responda 200 con status "ok".
+
+    `desde_lote` retoma un envío interrumpido sin repetir los lotes ya
+    confirmados (`lotes_enviados` cuenta también esos). `al_confirmar_lote`
+    recibe (lote, insertadas de ese lote) apenas el servidor confirma cada
+    uno, para que quien llama guarde el avance.
+    """
+    lotes = [rows[i:i + tamano_lote] for i in range(0, len(rows), tamano_lote)] or [[]]
+    base = _clave_base(folio, rows)
+    res = ResultadoEnvio(lotes_totales=len(lotes), lotes_enviados=min(desde_lote - 1, len(lotes)))
+
+    for n, lote in enumerate(lotes, start=1):
+        if n < desde_lote:
+            continue
+        payload = {**(extra or {}), "rows": lote, "lote": n, "lotes": len(lotes)}
+        try:
+            resp = post_apps_script(
+                url, payload, f"{base}:{n}/{len(lotes)}", servidor_deduplica=servidor_deduplica
+            )
+        except Exception as e:
+            res.error = e
+            res.sin_confirmar = isinstance(e, SinConfirmar)
+            return res
+
+        res.status_code = resp.status_code
+        res.texto = resp.text
+        try:
+            data = resp.json()
+        except ValueError:
+            data = None
+        res.data = data if isinstance(data, dict) else None
+
+        if resp.status_code != 200 or res.data is None or res.data.get("status") != "ok":
+            res.sin_confirmar = resp.status_code in STATUS_SIN_CONFIRMAR
+            return res
+
+        res.lotes_enviados = n
+        insertadas = res.data.get("inserted")
+        insertadas = int(insertadas) if isinstance(insertadas, (int, float)) else None
+        if insertadas is not None:
+            res.insertadas = (res.insertadas or 0) + insertadas
+        if al_confirmar_lote is not None:
+            al_confirmar_lote(n, insertadas)
+
+    return res
@@ -0,0 +1,119 @@
+"""
+Configuración de la app tomada de st.secrets y recursos compartidos por el
+proceso: directorio de copias locales, caché de los loaders, almacén local
+(con su bandeja de salida), generador de folios y archivo de requerimientos.
+
+Los secrets se leen en cada llamada y no al importar: el módulo se importa
+una sola vez por proceso, y así un cambio en secrets.toml se toma sin
+reiniciar el servidor (como cuando todo vivía en app.py).
+"""
+import os
+
+import pytz
+import streamlit as st
+
+from inventario.almacen import Almacen, obtener_almacen
+from inventario.archivo import ArchivoRequerimientos, obtener_archivo
+from inventario.bandeja_salida import BandejaSalida, obtener_bandeja
+from inventario.cache import BackendCache, obtener_backend_cache
+from inventario.folios import GeneradorFolios, obtener_generador
+
+# TTL (segundos) de la caché compartida de cada loader
+CACHE_TTL_PLANTILLA = 3600
+
+# Cada cuántos segundos se importa cada hoja al almacén, en segundo plano
+IMPORTACION_REQUERIMIENTOS = 60
+IMPORTACION_CATALOGO = 600
+IMPORTACION_RECEPCION = 120
+
+ZONA_HORARIA = pytz.timezone("America/Mexico_City")
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def directorio_datos() -> str:
+    """
+    Copias locales de las hojas y bases SQLite, compartidas por todos los
+    procesos del servidor: el secret LOCAL_DATA_DIR o `data/` junto a app.py.
+    """
+    return st.secrets.get("LOCAL_DATA_DIR", os.path.join(_RAIZ, "data"))
+
+
+def directorio_hojas() -> str:
+    return os.path.join(directorio_datos(), "hojas")
+
+
+def directorio_archivo_requerimientos() -> str:
+    return os.path.join(directorio_datos(), "archivo", "requerimientos")
+
+
+def directorio_perfil() -> str:
+    """Registro diario (JSONL) de los tiempos medidos."""
+    return os.path.join(directorio_datos(), "perfil")
+
+
+def registro_perfil_activo() -> bool:
+    """PERFIL_REGISTRO = false apaga el registro JSONL de tiempos."""
+    return bool(st.secrets.get("PERFIL_REGISTRO", True))
+
+
+def dias_archivo_requerimientos() -> int:
+    """
+    Folios cerrados con más de estos días (por la fecha del folio) pasan al
+    archivo mensual en disco.
+    """
+    return int(st.secrets.get("DIAS_ARCHIVO_REQUERIMIENTOS", 180))
+
+
+def backend_cache() -> BackendCache:
+    """
+    Caché compartida de los loaders. Por defecto SQLite en LOCAL_DATA_DIR,
+    así todos los procesos del servidor reutilizan la misma descarga;
+    CACHE_BACKEND = "memoria" la limita al proceso actual.
+    """
+    tipo = st.secrets.get("CACHE_BACKEND", "sqlite")
+    if tipo == "memoria":
+        return obtener_backend_cache("memoria")
+    return obtener_backend_cache("sqlite", os.path.join(directorio_datos(), "cache.sqlite3"))
+
+
+def apps_script_deduplica() -> bool:
+    """
+    APPS_SCRIPT_DEDUPLICA = true declara que los Apps Script de
+    requerimientos/recepciones/movimientos descartan las peticiones con un
+    `idempotency_key` ya aplicado. Sólo entonces la bandeja reintenta sola un
+    lote que quedó sin respuesta (ver inventario.cliente_http.post_apps_script).
+    """
+    return bool(st.secrets.get("APPS_SCRIPT_DEDUPLICA", False))
+
+
+def almacen() -> Almacen:
+    """Registro local de requerimientos, recepciones, catálogo y movimientos (ver inventario.almacen)."""
+    datos = directorio_datos()
+    deduplica = apps_script_deduplica()
+    anterior = os.path.join(datos, "bandeja_salida.sqlite3")
+    if os.path.exists(anterior):
+        # Bandeja de antes del almacén: su hilo termina de entregar lo que quedó en cola.
+        obtener_bandeja(anterior).servidor_deduplica = deduplica
+    alm = obtener_almacen(os.path.join(datos, "almacen.sqlite3"))
+    alm.bandeja.servidor_deduplica = deduplica
+    return alm
+
+
+def bandeja() -> BandejaSalida:
+    """Cola de envíos a Apps Script; vive en el archivo del almacén."""
+    return almacen().bandeja
+
+
+def generador_folios() -> GeneradorFolios:
+    """Folios únicos entre sesiones y procesos (ver inventario.folios)."""
+    return obtener_generador(
+        os.path.join(directorio_datos(), "folios.sqlite3"),
+        nodo=st.secrets.get("FOLIO_NODO"),
+        tz=ZONA_HORARIA,
+    )
+
+
+def archivo_requerimientos() -> ArchivoRequerimientos:
+    """Archivo mensual de folios cerrados (ver inventario.archivo)."""
+    return obtener_archivo(directorio_archivo_requerimientos())
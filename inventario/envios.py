@@ -0,0 +1,347 @@
+"""
+Envíos a Apps Script (consolidado de inventario, requerimientos, recepciones
+y productos nuevos del catálogo), lectura de los archivos de movimientos que
+se cargan y generación de folios.
+
+Movimientos, requerimientos y recepciones se registran en el almacén local
+(inventario.almacen) en la misma transacción que su envío; la bandeja de
+salida los replica en Sheets en segundo plano. El producto nuevo del
+catálogo se sigue enviando al momento: Apps Script responde si ya existía.
+
+Los avisos al usuario se muestran con st.success/st.warning/st.error desde
+aquí mismo, como cuando estas funciones vivían en app.py.
+"""
+import os
+from io import BytesIO
+from itertools import chain
+
+import pandas as pd
+import streamlit as st
+
+from inventario.cliente_http import post_apps_script
+from inventario.config import almacen, generador_folios
+from inventario.esquemas import RECEPCION_COLUMNS, REQUERIMIENTOS_COLUMNS, USER_COLUMNS
+from inventario.movimientos import (
+    MOVIMIENTOS_POR_BLOQUE,
+    HojaExcel,
+    aviso_hoja,
+    iterar_movimientos,
+    sellar_bloque,
+    validar_encabezados,
+)
+from inventario.normalizacion import norm_producto
+from inventario.perfil import medido
+from inventario.serializacion import filas_json
+
+
+def _nuevo_folio(prefijo: str) -> tuple[str, str, str]:
+    folio, ahora = generador_folios().nuevo(prefijo)
+    return folio, ahora.date().isoformat(), ahora.strftime("%H:%M:%S")
+
+
+def df_to_excel_bytes(df: pd.DataFrame, sheet_name: str = "Movimientos") -> BytesIO:
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    output.seek(0)
+    return output
+
+
+def detectar_extension(nombre_archivo: str) -> str:
+    return os.path.splitext(nombre_archivo)[1].lower().replace(".", "")
+
+
+@medido("archivo: leer")
+def leer_archivo_movimientos(uploaded_file, hoja: str = "Movimientos_Inventario") -> pd.DataFrame:
+    nombre = uploaded_file.name
+    ext = detectar_extension(nombre)
+
+    if ext == "xlsx":
+        # Un solo parseo en modo sólo lectura, aunque la hoja no exista.
+        excel = HojaExcel(uploaded_file, hoja)
+        aviso = aviso_hoja(hoja, excel.hoja)
+        if aviso:
+            st.warning(aviso)
+        df = excel.leer()
+    elif ext == "xls":
+        try:
+            df = pd.read_excel(uploaded_file, sheet_name=hoja)
+        except ValueError:
+            st.warning(
+                f"El archivo Excel no tiene una hoja llamada '{hoja}'. "
+                "Se leerá la primera hoja disponible; revisa que sea la correcta."
+            )
+            df = pd.read_excel(uploaded_file)
+    elif ext == "csv":
+        try:
+            df = pd.read_csv(uploaded_file)
+        except UnicodeDecodeError:
+            df = pd.read_csv(uploaded_file, encoding="latin1")
+    else:
+        st.error(
+            f"Tipo de archivo no soportado: .{ext}. Usa archivos Excel (.xlsx, .xls) o CSV."
+        )
+        st.stop()
+
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+def validar_y_ordenar_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+
+    try:
+        validar_encabezados(list(df.columns), USER_COLUMNS)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    df = df[USER_COLUMNS].copy()
+    return df
+
+
+def generar_folio_inventario() -> tuple[str, str, str]:
+    return _nuevo_folio("INV")
+
+
+def agregar_campos_sistema(df: pd.DataFrame, folio: str, fecha: str, hora: str) -> pd.DataFrame:
+    df = df.copy()
+    df["ID"] = folio
+    df["Fecha_Carga"] = fecha
+    df["Hora_Carga"] = hora
+
+    ordered_cols = (
+            ["ID"] +
+            [c for c in USER_COLUMNS if c in df.columns] +
+            [c for c in ["Fecha_Carga", "Hora_Carga"] if c in df.columns]
+    )
+    df = df[ordered_cols]
+    return df
+
+
+@medido("envío: consolidado")
+def enviar_a_consolidado(df: pd.DataFrame):
+    """
+    Registra los movimientos en el almacén local; el envío al consolidado
+    ocurre en segundo plano desde la bandeja de salida.
+    """
+    url = st.secrets.get("APPS_SCRIPT_CONSOLIDADO_URL", "")
+
+    if not url:
+        st.warning(
+            "No se configuró APPS_SCRIPT_CONSOLIDADO_URL en secrets. No se enviará nada al consolidado."
+        )
+        return
+
+    folio = str(df["ID"].iloc[0]) if "ID" in df.columns and len(df) else ""
+    almacen().registrar(
+        "movimientos", list(df.columns), filas_para_envio(df), "consolidado", folio, url
+    )
+    st.success(
+        f"Movimientos registrados ({len(df)} fila(s)). "
+        "Se están enviando al consolidado en segundo plano."
+    )
+
+
+def filas_para_envio(df: pd.DataFrame) -> list:
+    """Filas del DataFrame serializables a JSON (fechas ISO, nulos → None)."""
+    return filas_json(df)
+
+
+@medido("envío: movimientos por bloques")
+def cargar_movimientos_por_bloques(
+        uploaded_file, tamano_bloque: int = MOVIMIENTOS_POR_BLOQUE
+) -> str | None:
+    """
+    Carga de inventario para archivos grandes: valida encabezados contra
+    USER_COLUMNS y después lee, sella (ID/Fecha_Carga/Hora_Carga) y registra
+    en el almacén bloque por bloque, sin tener el archivo completo en memoria.
+    Cada bloque es un envío al consolidado con el folio `<folio>:b<n>` como
+    base de sus claves de idempotencia. Devuelve el folio si se registraron
+    todos los bloques.
+
+    Un archivo sin filas se rechaza antes de pedir folio. Si un bloque falla a
+    la mitad (fila mal formada, error al registrar), los bloques anteriores ya
+    quedaron registrados y se enviarán: el aviso indica cuántos y desde qué
+    movimiento del archivo hay que volver a cargar.
+    """
+    url = st.secrets.get("APPS_SCRIPT_CONSOLIDADO_URL", "")
+    if not url:
+        st.warning(
+            "No se configuró APPS_SCRIPT_CONSOLIDADO_URL en secrets. No se enviará nada al consolidado."
+        )
+        return None
+
+    try:
+        bloques = iterar_movimientos(
+            uploaded_file, uploaded_file.name, USER_COLUMNS,
+            tamano_bloque=tamano_bloque, avisar=st.warning,
+        )
+        primero = next(bloques, None)
+    except pd.errors.EmptyDataError:
+        primero = None
+    except ValueError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"No se pudo leer el archivo de movimientos: {e}")
+        return None
+
+    if primero is None or primero.empty:
+        st.error("El archivo no tiene movimientos: no se registró nada ni se generó folio.")
+        return None
+
+    folio, fecha, hora = generar_folio_inventario()
+    filas_registradas = 0
+    registrados = 0
+    avance = st.empty()
+
+    try:
+        for n, bloque in enumerate(chain([primero], bloques), start=1):
+            bloque = sellar_bloque(bloque, folio, fecha, hora)
+            almacen().registrar(
+                "movimientos", list(bloque.columns), filas_para_envio(bloque), "consolidado",
+                f"{folio}:b{n}", url, extra={"bloque": n},
+            )
+            filas_registradas += len(bloque)
+            registrados = n
+            avance.info(f"Folio {folio}: {filas_registradas} fila(s) registradas ({n} bloque(s))…")
+    except Exception as e:
+        avance.error(
+            f"La carga del folio {folio} se detuvo en el bloque {registrados + 1} "
+            f"(a partir del movimiento {filas_registradas + 1} del archivo): {e}\n\n"
+            f"Quedaron registrados {registrados} bloque(s) con {filas_registradas} movimiento(s), "
+            "que se enviarán al consolidado. Corrige el archivo y vuelve a cargar sólo los "
+            f"movimientos desde el {filas_registradas + 1}."
+        )
+        return None
+
+    avance.success(
+        f"Folio {folio}: {filas_registradas} fila(s) registradas. "
+        "Se están enviando al consolidado en segundo plano."
+    )
+    return folio
+
+
+def generar_folio_requerimiento() -> tuple[str, str, str]:
+    return _nuevo_folio("REQ")
+
+
+def generar_folio_recepcion() -> tuple[str, str, str]:
+    return _nuevo_folio("REC")
+
+
+@medido("envío: encolar requerimiento")
+def encolar_requerimientos(lista_req_data) -> bool:
+    """
+    Registra el requerimiento en el almacén local junto con su envío a Apps
+    Script, que ocurre en segundo plano. Devuelve False si no hay endpoint
+    configurado.
+    """
+    url = st.secrets.get("APPS_SCRIPT_REQUERIMIENTOS_URL", "")
+
+    if not url:
+        st.warning(
+            "No se configuró APPS_SCRIPT_REQUERIMIENTOS_URL en secrets. No se enviarán los requerimientos."
+        )
+        return False
+
+    rows = []
+    for req_data in lista_req_data:
+        row = [req_data.get(col, "") for col in REQUERIMIENTOS_COLUMNS]
+        rows.append(row)
+
+    folio = lista_req_data[0].get("ID_REQ", "") if lista_req_data else ""
+    almacen().registrar("requerimientos", REQUERIMIENTOS_COLUMNS, rows, "requerimiento", folio, url)
+    return True
+
+
+@medido("envío: encolar recepción")
+def encolar_recepcion(lista_recepcion_data) -> bool:
+    """
+    Registra la recepción en el almacén local junto con su envío a Apps
+    Script, que ocurre en segundo plano. Devuelve False si no hay endpoint
+    configurado.
+    """
+    url = st.secrets.get("APPS_SCRIPT_RECEPCION_URL", "")
+
+    if not url:
+        st.warning(
+            "No se configuró APPS_SCRIPT_RECEPCION_URL en secrets. "
+            "La recepción NO se enviará a la hoja 'Requerimientos'."
+        )
+        return False
+
+    rows = []
+    for rec_data in lista_recepcion_data:
+        row = [rec_data.get(col, "") for col in RECEPCION_COLUMNS]
+        rows.append(row)
+
+    folio = lista_recepcion_data[0].get("Folio Generado de Recepcion", "") if lista_recepcion_data else ""
+    almacen().registrar(
+        "recepciones", RECEPCION_COLUMNS, rows, "recepcion", folio, url,
+        extra={"accion": "registrar_recepcion"},
+    )
+    return True
+
+
+@medido("envío: producto nuevo")
+def enviar_nuevo_producto_a_catalogo(nombre: str, categoria: str | None = None):
+    url = st.secrets.get("APPS_SCRIPT_CATALOGO_URL", "")
+    if not url:
+        st.warning(
+            "No se configuró APPS_SCRIPT_CATALOGO_URL en secrets. "
+            "El nuevo producto NO se enviará al catálogo."
+        )
+        return
+
+    if categoria is None or str(categoria).strip() == "":
+        categoria = "Sin categoría"
+
+    payload = {
+        "accion": "nuevo_producto",
+        "producto": nombre,
+        "categoria": categoria,
+    }
+
+    try:
+        # El script de catálogo responde "exists" si el producto ya está: repetir es seguro.
+        resp = post_apps_script(
+            url, payload, f"producto:{norm_producto(nombre)}", servidor_deduplica=True
+        )
+
+        st.markdown("#### Respuesta cruda de Apps Script (catálogo – debug)")
+        st.code(resp.text, language="json")
+
+        if resp.status_code != 200:
+            st.error(
+                f"No se pudo enviar el nuevo producto. Código HTTP: {resp.status_code}"
+            )
+            return
+
+        try:
+            data = resp.json()
+        except Exception as e:
+            st.warning(
+                "La respuesta de Apps Script (catálogo) no es un JSON válido. "
+                "Revisa el contenido mostrado arriba."
+            )
+            st.exception(e)
+            return
+
+        status = data.get("status")
+        if status == "ok":
+            if data.get("exists"):
+                st.info(f"El producto '{nombre}' ya existe en el catálogo.")
+            else:
+                st.success(f"Producto '{nombre}' enviado y agregado al catálogo.")
+        else:
+            st.warning(
+                "Apps Script de catálogo respondió con status distinto de 'ok'. "
+                f"Respuesta: {data}"
+            )
+
+    except Exception as e:
+        st.error("Error al enviar el nuevo producto al catálogo.")
+        st.exception(e)
@@ -0,0 +1,152 @@
+"""
+Tipos de columna de las hojas, aplicados una sola vez al cargarlas para que
+las copias locales (y sus instantáneas en disco) ya vengan tipadas.
+"""
+import pandas as pd
+
+from inventario.normalizacion import norm
+
+# Cambiar cuando cambie cualquier función de tipado: invalida instantáneas.
+ESQUEMA_REQUERIMIENTOS = "requerimientos-v2"
+
+# Claves de búsqueda/agrupación: texto sin espacios sobrantes, nulos → "".
+COLUMNAS_CLAVE_REQ = ["ID_REQ", "INSUMO", "SKU"]
+# Cantidades: float, vacío → 0.
+COLUMNAS_CANTIDAD_REQ = ["CANTIDAD", "CANTIDAD RECIBIDA", "CANTIDAD PENDIENTE"]
+# Importes: float, vacío → NaN (no es lo mismo "sin costo" que costo 0).
+COLUMNAS_COSTO_REQ = ["COSTO UNIDAD", "COSTO TOTAL"]
+COLUMNAS_CATEGORICAS_REQ = ["ESTATUS", "PROVEDOR", "CECO_DESTINO", "CATEGORIA"]
+COLUMNAS_FECHA_REQ = ["FECHA DE PEDIDO", "FECHA DESEADA"]
+
+# Tipos para read_csv: las claves se leen como texto desde el parseo, para
+# que un SKU numérico no se convierta en float ("1234" → "1234.0").
+DTYPES_CSV_REQ = {col: str for col in COLUMNAS_CLAVE_REQ}
+
+# Columnas que la app escribe en las hojas (plantilla de inventario,
+# requerimientos y recepción), en el orden que espera cada Apps Script.
+USER_COLUMNS = [
+    "Tipo",
+    "CECO_Origen",
+    "CECO_Destino",
+    "Proveedor",
+    "Pedido_Ref",
+    "SKU",
+    "Producto",
+    "Cantidad",
+    "UoM",
+    "Precio_Unitario",
+    "Subtotal",
+    "Lote",
+    "Caducidad",
+    "Temperatura",
+    "Observaciones",
+    "Folio",
+    "Usuario",
+    "Chofer",
+    "Unidad",
+    "Recibido",
+    "CECO_DESTINO",
+]
+
+REQUERIMIENTOS_COLUMNS = [
+    "FECHA DE PEDIDO",
+    "PROVEDOR",
+    "INSUMO",
+    "UNIDAD DE MEDIDA",
+    "COSTO UNIDAD",
+    "CANTIDAD",
+    "COSTO TOTAL",
+    "FECHA DESEADA",
+    "OBSERVACIONES",
+    "ESTATUS",
+    "ID_REQ",
+    "Hora",
+    "CECO_DESTINO",
+    "CATEGORIA",
+    "Fecha aproximada de entrega",
+    "SKU",
+]
+
+# Para enviar a Apps Script de recepción (hoja Recepción o script que actualiza Requerimientos)
+RECEPCION_COLUMNS = [
+    "Fecha de recepción",
+    "PROVEEDOR",
+    "FACTURA / TICKET",
+    "SKU",
+    "PRODUCTO",
+    "UNIDAD DE MEDIDA",
+    "CANTIDAD PO",
+    "CANTIDAD RECIBIDA",
+    "TEMP (°C)",
+    "CALIDAD (OK / RECHAZO)",
+    "OBSERVACIONES",
+    "RECIBIÓ",
+    "FOLIO",
+    "APROBÓ",
+    "ID DE REQUERIMIENTO AL QUE CORRESPONDE",
+    "Folio Generado de Recepcion",
+    "fecha de caducidad",
+]
+
+_NO_NUMERICO = r"[$,\s]"
+
+
+def a_fecha(s: pd.Series) -> pd.Series:
+    """
+    Fechas de la hoja: ISO (lo que escribe la app) y, para lo que no lo sea,
+    día/mes/año (formato de Google Sheets en es-MX). Lo ilegible queda NaT.
+    """
+    fechas = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    faltan = fechas.isna() & s.notna()
+    if faltan.any():
+        fechas[faltan] = pd.to_datetime(
+            s[faltan], errors="coerce", format="mixed", dayfirst=True
+        )
+    return fechas
+
+
+def a_numero(s: pd.Series, relleno: float | None = None) -> pd.Series:
+    """Números de la hoja como float (acepta "$1,234.50"); lo ilegible queda NaN o `relleno`."""
+    if not pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(
+            s.astype(str).str.replace(_NO_NUMERICO, "", regex=True), errors="coerce"
+        )
+    s = s.astype("float64")
+    return s if relleno is None else s.fillna(relleno)
+
+
+def a_clave(s: pd.Series) -> pd.Series:
+    """Texto sin espacios sobrantes (nulos → "")."""
+    return s.fillna("").astype(str).str.strip()
+
+
+def a_categoria(s: pd.Series) -> pd.Series:
+    """Texto sin espacios sobrantes como categórico (nulos → "")."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return s.fillna("").astype(str).str.strip().astype("category")
+
+
+def _columnas(df: pd.DataFrame, nombres: list[str]) -> list[str]:
+    """Columnas de `df` que corresponden a `nombres` (sin importar mayúsculas/espacios)."""
+    buscadas = {norm(n) for n in nombres}
+    return [c for c in df.columns if norm(c) in buscadas]
+
+
+def tipar_requerimientos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica el esquema de la hoja de requerimientos: claves limpias,
+    cantidades e importes numéricos, categóricos y fechas reales.
+    """
+    df = df.copy()
+    for col in _columnas(df, COLUMNAS_CLAVE_REQ):
+        df[col] = a_clave(df[col])
+    for col in _columnas(df, COLUMNAS_CANTIDAD_REQ):
+        df[col] = a_numero(df[col], relleno=0.0)
+    for col in _columnas(df, COLUMNAS_COSTO_REQ):
+        df[col] = a_numero(df[col])
+    for col in _columnas(df, COLUMNAS_CATEGORICAS_REQ):
+        df[col] = a_categoria(df[col])
+    for col in _columnas(df, COLUMNAS_FECHA_REQ):
+        df[col] = a_fecha(df[col])
+    return df
@@ -0,0 +1,134 @@
+"""
+Folios únicos para requerimientos, recepciones y cargas de inventario.
+
+Formato: `<PREFIJO>-AAAAMMDD-HHMMSS-<NODO>-<SEC>`, p.ej.
+`REQ-20261017-103015-K3-0001`. El inicio con fecha y hora no cambia, así
+que los folios se siguen ordenando por fecha como texto y la fecha se sigue
+leyendo del folio (ver `inventario.archivo.fecha_de_folio`).
+
+- NODO distingue servidores: el secret FOLIO_NODO o, si no se configura,
+  dos caracteres derivados del nombre del host. Con varios servidores
+  conviene fijarlo a mano para descartar colisiones entre hosts.
+- SEC es un consecutivo por (prefijo, segundo) compartido por todos los
+  procesos del servidor mediante un contador en SQLite. Cada proceso
+  reserva bloques de `BLOQUE` números, así que dentro de un mismo segundo
+  sólo toca el disco una vez cada `BLOQUE` folios. Los contadores se guardan
+  una hora, así que un reloj que se atrasa unos segundos no repite folios.
+"""
+import hashlib
+import os
+import socket
+import sqlite3
+import string
+import threading
+import time
+from datetime import datetime, tzinfo
+
+BLOQUE = 64
+MAX_SECUENCIA = 9999
+RETENCION_SEGUNDOS = 3600
+
+_ALFABETO = string.digits + string.ascii_uppercase
+
+
+def nodo_por_defecto() -> str:
+    """Dos caracteres [0-9A-Z] estables por host."""
+    n = int.from_bytes(hashlib.sha1(socket.gethostname().encode("utf-8")).digest()[:4], "big")
+    return _ALFABETO[n // 36 % 36] + _ALFABETO[n % 36]
+
+
+def validar_nodo(nodo: str) -> str:
+    nodo = str(nodo).strip().upper()
+    if not 1 <= len(nodo) <= 4 or any(c not in _ALFABETO for c in nodo):
+        raise ValueError(
+            f"FOLIO_NODO inválido: '{nodo}'. Usa de 1 a 4 letras o números (p.ej. 'M1')."
+        )
+    return nodo
+
+
+class GeneradorFolios:
+    def __init__(self, ruta: str, nodo: str | None = None, tz: tzinfo | None = None):
+        self.ruta = ruta
+        self.nodo = validar_nodo(nodo) if nodo else nodo_por_defecto()
+        self.tz = tz
+        self._lock = threading.Lock()
+        # prefijo → [segundo, siguiente, fin) del bloque reservado
+        self._bloques: dict[str, list] = {}
+        self._ultima_limpieza = 0.0
+
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._con = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS secuencias (
+                prefijo  TEXT NOT NULL,
+                segundo  TEXT NOT NULL,
+                valor    INTEGER NOT NULL,
+                creado   REAL NOT NULL,
+                PRIMARY KEY (prefijo, segundo)
+            )
+            """
+        )
+
+    def _reservar(self, prefijo: str, segundo: str) -> int:
+        """Primer número de un bloque nuevo de (prefijo, segundo)."""
+        ahora = time.time()
+        con = self._con
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute(
+                "INSERT OR IGNORE INTO secuencias (prefijo, segundo, valor, creado) VALUES (?, ?, 0, ?)",
+                (prefijo, segundo, ahora),
+            )
+            con.execute(
+                "UPDATE secuencias SET valor = valor + ? WHERE prefijo = ? AND segundo = ?",
+                (BLOQUE, prefijo, segundo),
+            )
+            (fin,) = con.execute(
+                "SELECT valor FROM secuencias WHERE prefijo = ? AND segundo = ?",
+                (prefijo, segundo),
+            ).fetchone()
+            if ahora - self._ultima_limpieza > 60:
+                con.execute("DELETE FROM secuencias WHERE creado < ?", (ahora - RETENCION_SEGUNDOS,))
+                self._ultima_limpieza = ahora
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return fin - BLOQUE + 1
+
+    def nuevo(self, prefijo: str) -> tuple[str, datetime]:
+        """Folio nuevo con `prefijo` (REQ, REC, INV…) y el momento que lleva."""
+        with self._lock:
+            while True:
+                ahora = datetime.now(self.tz)
+                segundo = ahora.strftime("%Y%m%d-%H%M%S")
+                bloque = self._bloques.get(prefijo)
+                if bloque is None or bloque[0] != segundo or bloque[1] >= bloque[2]:
+                    inicio = self._reservar(prefijo, segundo)
+                    bloque = [segundo, inicio, min(inicio + BLOQUE, MAX_SECUENCIA + 1)]
+                    self._bloques[prefijo] = bloque
+                if bloque[1] <= MAX_SECUENCIA:
+                    break
+                # Se agotó el consecutivo de este segundo: se espera al siguiente.
+                time.sleep(1 - ahora.microsecond / 1e6)
+
+            secuencia = bloque[1]
+            bloque[1] += 1
+        return f"{prefijo}-{segundo}-{self.nodo}-{secuencia:04d}", ahora
+
+
+_generadores: dict[str, GeneradorFolios] = {}
+_generadores_lock = threading.Lock()
+
+
+def obtener_generador(ruta: str, nodo: str | None = None, tz: tzinfo | None = None) -> GeneradorFolios:
+    """Generador de `ruta` (uno por proceso)."""
+    with _generadores_lock:
+        generador = _generadores.get(ruta)
+        if generador is None:
+            generador = GeneradorFolios(ruta, nodo=nodo, tz=tz)
+            _generadores[ruta] = generador
+        return generador
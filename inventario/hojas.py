@@ -0,0 +1,369 @@
+"""
+Loaders de las hojas (catálogo, requerimientos, recepción y plantilla de
+movimientos) y las consultas de folios que se sirven de ellas.
+
+Catálogo, requerimientos y recepción se leen del almacén local
+(inventario.almacen): cada hoja se revalida (inventario.sincronizacion) y se
+importa al almacén en segundo plano, así que el script no espera a Google
+salvo que se pida actualizar o la tabla nunca se haya importado. La
+plantilla de movimientos pasa por la caché compartida. Cada loader lee su
+URL de st.secrets; viven aquí y no en app.py para que sus funciones y
+cachés se creen una vez por proceso y no en cada rerun.
+"""
+import functools
+from datetime import date
+from typing import Callable
+
+import pandas as pd
+import streamlit as st
+
+from inventario.almacen import RETRASO_PUBLICACION, TABLAS, Almacen
+from inventario.archivo import ArchivoRequerimientos
+from inventario.cache import cache_compartido
+from inventario.catalogo import ESQUEMA_CATALOGO, preparar_catalogo
+from inventario.config import (
+    CACHE_TTL_PLANTILLA,
+    IMPORTACION_CATALOGO,
+    IMPORTACION_RECEPCION,
+    IMPORTACION_REQUERIMIENTOS,
+    almacen,
+    archivo_requerimientos,
+    backend_cache,
+    dias_archivo_requerimientos,
+    directorio_hojas,
+)
+from inventario.esquemas import (
+    DTYPES_CSV_REQ,
+    ESQUEMA_REQUERIMIENTOS,
+    tipar_requerimientos,
+)
+from inventario.indices import filas_por_id_req, indice_id_req
+from inventario.pendientes import (
+    agregar_requerimientos,
+    aplicar_recepciones,
+    atributos_por_folio,
+    pendientes_por_id_req,
+    resumen_folios,
+    tabla_pendientes,
+)
+from inventario.perfil import medido
+from inventario.sincronizacion import Instantanea, SincronizadorHoja, obtener_sincronizador
+
+# Cambiar cuando cambie preparar_recepcion: invalida instantáneas.
+ESQUEMA_RECEPCION = "recepcion-v1"
+
+
+@medido("hoja: plantilla movimientos")
+@cache_compartido(ttl=CACHE_TTL_PLANTILLA, backend=backend_cache)
+def load_movimientos_template_from_gsheet() -> pd.DataFrame:
+    sheet_url = st.secrets["MOVIMIENTOS_TEMPLATE_CSV_URL"]
+
+    try:
+        df = pd.read_csv(sheet_url, nrows=0)
+    except pd.errors.ParserError:
+        df_full = pd.read_csv(
+            sheet_url,
+            engine="python",
+            on_bad_lines="skip"
+        )
+        df = df_full.iloc[0:0].copy()
+
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _importar_hoja(alm: Almacen, tabla: str, sinc: SincronizadorHoja, esquema: str) -> Instantanea:
+    """Revalida la hoja de `sinc` y, si cambió, la importa a `tabla` del almacén."""
+    inst = sinc.obtener(revalidar=True)
+    alm.importar(tabla, inst, esquema)
+    return inst
+
+
+def _importar_requerimientos(
+        alm: Almacen, sinc: SincronizadorHoja, archivo: ArchivoRequerimientos, dias: int,
+) -> None:
+    inst = _importar_hoja(alm, "requerimientos", sinc, ESQUEMA_REQUERIMIENTOS)
+    # Una vez por versión de la hoja; sólo escribe los meses con folios nuevos
+    # y después saca del almacén los folios que ya están en el archivo.
+    archivo.archivar_instantanea(
+        inst, dias, depurar=functools.partial(alm.depurar, "requerimientos"),
+    )
+
+
+def _desde_almacen(
+        alm: Almacen,
+        tabla: str,
+        importar: Callable[[], object],
+        intervalo: float,
+        preparar: Callable[[pd.DataFrame], pd.DataFrame],
+        esquema: str,
+        revalidar: bool = False,
+) -> Instantanea:
+    """
+    `tabla` del almacén; `importar` la pone al día con su hoja en segundo
+    plano cada `intervalo` segundos. Sólo con revalidar=True o si la tabla
+    nunca se ha importado se espera aquí mismo a Google.
+    """
+    if revalidar or not alm.importada(tabla):
+        importar()
+    alm.vigilar(tabla, importar, intervalo)
+    return alm.instantanea(tabla, preparar, esquema)
+
+
+def _instantanea_catalogo() -> Instantanea:
+    url = st.secrets.get("CATALOGO_CSV_URL", "")
+    if not url:
+        raise ValueError(
+            "No se encontró CATALOGO_CSV_URL en secrets. "
+            "Debes apuntar al CSV de la hoja 'Catálogo'."
+        )
+
+    sinc = obtener_sincronizador(
+        "catalogo", url, directorio_hojas(),
+        preparar=preparar_catalogo, esquema=ESQUEMA_CATALOGO,
+    )
+    alm = almacen()
+    return _desde_almacen(
+        alm, "catalogo", functools.partial(_importar_hoja, alm, "catalogo", sinc, ESQUEMA_CATALOGO),
+        IMPORTACION_CATALOGO, preparar_catalogo, ESQUEMA_CATALOGO,
+    )
+
+
+@medido("hoja: catálogo")
+def load_catalogo_productos() -> pd.DataFrame:
+    """
+    Catálogo desde el almacén (hoja CATALOGO_CSV_URL), con columnas
+    normalizadas y PRODUCTO_KEY (ver preparar_catalogo).
+    """
+    return _instantanea_catalogo().df
+
+
+def version_catalogo(df: pd.DataFrame) -> tuple[str, str] | None:
+    """
+    (origen, versión) del catálogo `df` si sigue siendo el vigente (None si
+    no), para cachear sus vistas e índice: un fragmento puede reejecutarse
+    con el catálogo de la última ejecución completa.
+    """
+    inst = _instantanea_catalogo()
+    return (inst.origen, inst.version) if inst.df is df else None
+
+
+@medido("hoja: requerimientos")
+def _instantanea_requerimientos(revalidar: bool = False) -> Instantanea:
+    url = st.secrets.get("REQUERIMIENTOS_CSV_URL", "")
+    if not url:
+        raise ValueError("No se encontró REQUERIMIENTOS_CSV_URL en secrets.")
+
+    sinc = obtener_sincronizador(
+        "requerimientos", url, directorio_hojas(),
+        cache=backend_cache(),
+        preparar=tipar_requerimientos, esquema=ESQUEMA_REQUERIMIENTOS,
+        dtype=DTYPES_CSV_REQ,
+    )
+    alm = almacen()
+    importar = functools.partial(
+        _importar_requerimientos, alm, sinc, archivo_requerimientos(), dias_archivo_requerimientos(),
+    )
+    return _desde_almacen(
+        alm, "requerimientos", importar, IMPORTACION_REQUERIMIENTOS,
+        tipar_requerimientos, ESQUEMA_REQUERIMIENTOS, revalidar,
+    )
+
+
+def load_requerimientos_from_gsheet(revalidar: bool = False) -> pd.DataFrame:
+    """
+    Devuelve los requerimientos del almacén local: la hoja importada más los
+    registrados desde la app que aún no se reflejan en ella. Con
+    revalidar=True antes se consulta a Google con un GET condicional y, si la
+    hoja cambió, se vuelve a importar. Ya viene tipada con el esquema de
+    `inventario.esquemas` (claves limpias, cantidades numéricas, fechas). El
+    DataFrame es compartido entre sesiones: filtrar/copiar antes de modificarlo.
+    """
+    return _instantanea_requerimientos(revalidar).df
+
+
+@medido("folio: filas")
+def buscar_folio_requerimiento(id_req: str, revalidar: bool = False) -> pd.DataFrame:
+    """
+    Filas (copia) de un ID_REQ usando el índice por folio de la versión
+    actual de la hoja; si ya no está en la hoja, se busca en la partición del
+    archivo que corresponde a la fecha del folio. Vacío si no existe.
+    """
+    filas = filas_por_id_req(_instantanea_requerimientos(revalidar), id_req)
+    if filas.empty:
+        archivadas = archivo_requerimientos().buscar(id_req)
+        if not archivadas.empty:
+            return archivadas
+    return filas
+
+
+def _con_recepciones_en_cola(inst: Instantanea, pendientes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Suma a `pendientes` las recepciones registradas en el almacén que la
+    versión importada de la hoja de requerimientos (`inst`) todavía no
+    incluye: las que no se han entregado o se entregaron poco antes de
+    descargarla (la hoja tarda hasta `RETRASO_PUBLICACION` en reflejar un
+    envío), salvo que su folio ya aparezca en la hoja.
+    """
+    en_cola = almacen().filas_sin_reflejar(
+        "recepciones", inst.obtenido_en - RETRASO_PUBLICACION
+    )
+    if en_cola.empty:
+        return pendientes
+
+    clave = TABLAS["recepciones"].clave
+    if clave in inst.df.columns:
+        folios = en_cola[clave].fillna("").astype(str).str.strip()
+        en_cola = en_cola[~folios.isin(inst.df[clave])]
+        if en_cola.empty:
+            return pendientes
+
+    en_cola = en_cola.rename(columns={
+        "ID DE REQUERIMIENTO AL QUE CORRESPONDE": "ID_REQ",
+        "PRODUCTO": "INSUMO",
+    })
+    en_cola["CANTIDAD RECIBIDA"] = pd.to_numeric(
+        en_cola["CANTIDAD RECIBIDA"], errors="coerce"
+    ).fillna(0.0)
+    return aplicar_recepciones(pendientes, en_cola)
+
+
+@medido("folio: pendientes")
+def pendientes_de_folio(id_req: str, revalidar: bool = False) -> pd.DataFrame:
+    """
+    Pendientes por (INSUMO, SKU) de un ID_REQ desde la tabla materializada
+    de la versión actual del almacén, sumando las recepciones registradas
+    que la hoja importada todavía no incluye.
+    """
+    inst = _instantanea_requerimientos(revalidar)
+    pendientes = pendientes_por_id_req(inst, id_req)
+    if pendientes.empty:
+        archivadas = archivo_requerimientos().buscar(id_req)
+        if not archivadas.empty:
+            pendientes = agregar_requerimientos(archivadas)
+    return _con_recepciones_en_cola(inst, pendientes)
+
+
+@medido("folios abiertos")
+def folios_abiertos(revalidar: bool = False) -> pd.DataFrame:
+    """
+    Folios con cantidad pendiente, una fila por (ID_REQ, PROVEEDOR), con
+    totales, % recibido, CECO destino y fechas. Sale de la tabla de pendientes
+    (ya materializada) en una sola agrupación, sin recorrer folio por folio.
+    """
+    inst = _instantanea_requerimientos(revalidar)
+    pendientes = _con_recepciones_en_cola(inst, tabla_pendientes(inst).df)
+    resumen = resumen_folios(pendientes, atributos_por_folio(inst))
+    resumen = resumen[resumen["CANTIDAD PENDIENTE"] > 0].copy()
+    for col in ("CECO_DESTINO", "ESTATUS"):
+        resumen[col] = resumen[col].astype(object).fillna("").astype(str)
+    return resumen.sort_values(["FECHA DE PEDIDO", "ID_REQ"], na_position="last")
+
+
+@medido("estatus: hoja + archivo")
+def requerimientos_con_archivo(desde: date | None, hasta: date | None) -> pd.DataFrame:
+    """
+    Hoja de requerimientos más las filas archivadas de los meses del rango
+    cuyos folios ya no están en la hoja (sin duplicar los que siguen en ella).
+    """
+    inst = _instantanea_requerimientos()
+    archivadas = archivo_requerimientos().entre(desde, hasta)
+    if archivadas.empty:
+        return inst.df
+    en_hoja = archivadas["ID_REQ"].str.lower().isin(indice_id_req(inst).keys())
+    if en_hoja.all():
+        return inst.df
+    return pd.concat([inst.df, archivadas[~en_hoja]], ignore_index=True)
+
+
+@medido("estatus: resumen")
+def resumen_estatus(
+        df: pd.DataFrame,
+        desde: date | None = None,
+        hasta: date | None = None,
+        cecos: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Último estatus y fechas de cada ID_REQ, más recientes primero. El rango de
+    FECHA DE PEDIDO y los CECO destino se filtran sobre las filas antes de
+    ordenar y agrupar, así que el costo depende de lo filtrado, no del historial.
+    """
+    mascara = df["ID_REQ"] != ""
+    if "FECHA DE PEDIDO" in df.columns:
+        if desde is not None:
+            mascara &= df["FECHA DE PEDIDO"] >= pd.Timestamp(desde)
+        if hasta is not None:
+            mascara &= df["FECHA DE PEDIDO"] < pd.Timestamp(hasta) + pd.Timedelta(days=1)
+    if cecos and "CECO_DESTINO" in df.columns:
+        mascara &= df["CECO_DESTINO"].isin(cecos)
+    df = df[mascara]
+
+    if "FECHA DE PEDIDO" in df.columns and "Hora" in df.columns:
+        df = df.sort_values(by=["FECHA DE PEDIDO", "Hora"], ascending=[True, True])
+
+    agg_dict = {"ESTATUS": "last"}
+    for col in ("FECHA DE PEDIDO", "FECHA DESEADA"):
+        if col in df.columns:
+            agg_dict[col] = "last"
+
+    resumen = df.groupby("ID_REQ", as_index=False, observed=True).agg(agg_dict)
+    orden = [c for c in ("FECHA DE PEDIDO", "ID_REQ") if c in resumen.columns]
+    return resumen.sort_values(orden, ascending=False, na_position="last")
+
+
+def preparar_recepcion(df: pd.DataFrame) -> pd.DataFrame:
+    """Encabezados de la hoja de recepción sin espacios sobrantes."""
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+@medido("hoja: recepción")
+def load_recepcion_from_gsheet() -> pd.DataFrame:
+    """
+    Recepciones del almacén: la hoja RECEPCION_CSV_URL más las registradas
+    desde la app (éstas prevalecen sobre las filas de la hoja con su folio).
+    """
+    url = st.secrets.get("RECEPCION_CSV_URL", "")
+    if not url:
+        raise ValueError("No se encontró RECEPCION_CSV_URL en secrets.")
+
+    sinc = obtener_sincronizador(
+        "recepcion", url, directorio_hojas(),
+        preparar=preparar_recepcion, esquema=ESQUEMA_RECEPCION,
+    )
+    alm = almacen()
+    return _desde_almacen(
+        alm, "recepciones",
+        functools.partial(_importar_hoja, alm, "recepciones", sinc, ESQUEMA_RECEPCION),
+        IMPORTACION_RECEPCION, preparar_recepcion, ESQUEMA_RECEPCION,
+    ).df
+
+
+@medido("recepción: historial")
+def obtener_historial_recepciones(id_req: str) -> pd.DataFrame:
+    """
+    Obtiene el historial de recepciones para un requerimiento.
+    Como todo está en la misma hoja, filtra las filas que tienen folio de recepción.
+    Lee la versión actual del almacén sin consultar a Google: se llama en cada
+    rerun del registro de recepción; la hoja la pone al día el importador en
+    segundo plano (o "Buscar requerimiento").
+    """
+    try:
+        req_folio = buscar_folio_requerimiento(id_req)
+    except Exception:
+        return pd.DataFrame()
+
+    if req_folio.empty:
+        return pd.DataFrame()
+
+    col_folio_recep = None
+    for col in req_folio.columns:
+        if "folio" in col.lower() and "recep" in col.lower():
+            col_folio_recep = col
+            break
+
+    if col_folio_recep and col_folio_recep in req_folio.columns:
+        req_folio = req_folio[req_folio[col_folio_recep].notna() & (req_folio[col_folio_recep] != "")]
+
+    return req_folio
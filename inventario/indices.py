@@ -0,0 +1,47 @@
+"""
+Índices en memoria sobre las hojas sincronizadas.
+
+Se construyen una sola vez por versión de la hoja o tabla del almacén y se
+comparten entre todas las sesiones del proceso.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from inventario.sincronizacion import Instantanea, VersionesPorOrigen
+
+_indices_id_req = VersionesPorOrigen()  # dict[str, np.ndarray]
+_lock = threading.Lock()
+
+
+def normalizar_folio(folio) -> str:
+    """Clave de búsqueda de un ID_REQ: sin espacios y en minúsculas."""
+    return str(folio).strip().lower()
+
+
+def construir_indice_id_req(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Mapea cada ID_REQ normalizado a las posiciones de sus filas en `df`."""
+    if "ID_REQ" not in df.columns:
+        return {}
+
+    claves = df["ID_REQ"].astype(str).str.strip().str.lower()
+    return pd.Series(np.arange(len(df))).groupby(claves.to_numpy(), sort=False).indices
+
+
+def indice_id_req(inst: Instantanea) -> dict[str, np.ndarray]:
+    """Índice ID_REQ → posiciones para la versión `inst.version`."""
+    with _lock:
+        indice = _indices_id_req.get(inst.origen, inst.version)
+        if indice is None:
+            indice = construir_indice_id_req(inst.df)
+            _indices_id_req.guardar(inst.origen, inst.version, indice)
+        return indice
+
+
+def filas_por_id_req(inst: Instantanea, folio: str) -> pd.DataFrame:
+    """Copia de las filas de `inst.df` cuyo ID_REQ coincide con `folio`."""
+    posiciones = indice_id_req(inst).get(normalizar_folio(folio))
+    if posiciones is None:
+        return inst.df.iloc[0:0].copy()
+    return inst.df.iloc[posiciones].copy()
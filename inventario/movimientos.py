@@ -0,0 +1,207 @@
+"""
+Lectura por bloques de archivos de movimientos de inventario.
+
+Para cargas grandes (cierres de mes con cientos de miles de filas) el
+archivo no se carga completo: se validan primero los encabezados contra las
+columnas esperadas y después se leen, ordenan y sellan bloques de
+`tamano_bloque` filas, que el llamador va enviando uno por uno.
+
+Los .xlsx se leen con openpyxl en modo sólo lectura: el libro se abre una
+vez (si no existe la hoja pedida se usa la primera sin volver a parsear) y
+sólo se materializan las columnas que se piden.
+"""
+import codecs
+import os
+from operator import itemgetter
+from typing import IO, Callable, Iterator
+
+import pandas as pd
+
+MOVIMIENTOS_POR_BLOQUE = 5000
+
+# Bytes que se revisan para decidir si el CSV viene en UTF-8 o en latin1.
+_MUESTRA_CODIFICACION = 1024 * 1024
+
+
+def detectar_codificacion(archivo: IO[bytes]) -> str:
+    """UTF-8 si el inicio del archivo lo es; si no, latin1 (Excel en Windows)."""
+    archivo.seek(0)
+    muestra = archivo.read(_MUESTRA_CODIFICACION)
+    archivo.seek(0)
+    try:
+        # final=False: un carácter cortado al final de la muestra no es error.
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+    except UnicodeDecodeError:
+        return "latin1"
+    return "utf-8"
+
+
+def validar_encabezados(encabezados: list[str], columnas: list[str]) -> None:
+    """ValueError con la lista de columnas faltantes, si falta alguna."""
+    faltan = [c for c in columnas if c not in encabezados]
+    if faltan:
+        raise ValueError(
+            "El archivo cargado no contiene todas las columnas requeridas.\n"
+            f"Faltan las columnas: {faltan}\n\n"
+            "Asegúrate de haber usado la plantilla descargada y de no haber cambiado los nombres."
+        )
+
+
+def _bloques_csv(archivo: IO[bytes], columnas: list[str], tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    codificacion = detectar_codificacion(archivo)
+    encabezados = pd.read_csv(archivo, nrows=0, encoding=codificacion).columns
+    archivo.seek(0)
+
+    crudos = [str(c) for c in encabezados]
+    limpios = [c.strip() for c in crudos]
+    validar_encabezados(limpios, columnas)
+    # usecols con los nombres tal cual vienen (pueden traer espacios).
+    usar = [crudos[limpios.index(c)] for c in columnas]
+
+    lector = pd.read_csv(
+        archivo,
+        usecols=usar,
+        chunksize=tamano_bloque,
+        encoding=codificacion,
+        encoding_errors="replace",
+    )
+    with lector:
+        for bloque in lector:
+            bloque.columns = bloque.columns.str.strip()
+            yield bloque[columnas]
+
+
+def _bloques_xls(archivo: IO[bytes], hoja: str, columnas: list[str], tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    # .xls (formato viejo) no lo lee openpyxl: se carga la hoja y se entrega en bloques.
+    try:
+        df = pd.read_excel(archivo, sheet_name=hoja)
+    except ValueError:
+        archivo.seek(0)
+        df = pd.read_excel(archivo)
+    df.columns = df.columns.astype(str).str.strip()
+    validar_encabezados(list(df.columns), columnas)
+    df = df[columnas]
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque].copy()
+
+
+def _encabezado(valor, i: int) -> str:
+    return f"Unnamed: {i}" if valor is None else str(valor).strip()
+
+
+class HojaExcel:
+    """
+    Hoja de un .xlsx abierta en modo sólo lectura (streaming). Se cierra sola
+    al terminar de iterar `bloques()`/`leer()`, o con `cerrar()`.
+    """
+
+    def __init__(self, archivo: IO[bytes], hoja: str, columnas: list[str] | None = None):
+        import openpyxl
+
+        self._libro = openpyxl.load_workbook(
+            archivo, read_only=True, data_only=True, keep_links=False
+        )
+        try:
+            self.hoja = hoja if hoja in self._libro.sheetnames else self._libro.sheetnames[0]
+            self._filas = self._libro[self.hoja].iter_rows(values_only=True)
+            primera = next(self._filas, ())
+            encabezados = [_encabezado(v, i) for i, v in enumerate(primera)]
+
+            if columnas is None:
+                columnas = encabezados
+            else:
+                validar_encabezados(encabezados, columnas)
+            self.columnas = list(columnas)
+            self._posiciones = [encabezados.index(c) for c in self.columnas]
+        except Exception:
+            self.cerrar()
+            raise
+
+    def cerrar(self) -> None:
+        self._libro.close()
+
+    def _registros(self) -> Iterator[tuple]:
+        ancho = max(self._posiciones, default=-1) + 1
+        tomar = itemgetter(*self._posiciones) if len(self._posiciones) > 1 else None
+        try:
+            for fila in self._filas:
+                if len(fila) < ancho:
+                    fila = fila + (None,) * (ancho - len(fila))
+                valores = tomar(fila) if tomar else tuple(fila[p] for p in self._posiciones)
+                # Filas totalmente vacías (formato sin datos al final de la hoja).
+                if any(v is not None for v in valores):
+                    yield valores
+        finally:
+            self.cerrar()
+
+    def bloques(self, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+        bloque: list[tuple] = []
+        for valores in self._registros():
+            bloque.append(valores)
+            if len(bloque) == tamano_bloque:
+                yield pd.DataFrame.from_records(bloque, columns=self.columnas)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame.from_records(bloque, columns=self.columnas)
+
+    def leer(self) -> pd.DataFrame:
+        return pd.DataFrame.from_records(list(self._registros()), columns=self.columnas)
+
+
+def aviso_hoja(hoja_pedida: str, hoja_leida: str) -> str | None:
+    if hoja_pedida == hoja_leida:
+        return None
+    return (
+        f"El archivo Excel no tiene una hoja llamada '{hoja_pedida}'. "
+        f"Se leyó la hoja '{hoja_leida}'; revisa que sea la correcta."
+    )
+
+
+def iterar_movimientos(
+        archivo: IO[bytes],
+        nombre: str,
+        columnas: list[str],
+        hoja: str = "Movimientos_Inventario",
+        tamano_bloque: int = MOVIMIENTOS_POR_BLOQUE,
+        avisar: Callable[[str], None] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Bloques del archivo con sólo `columnas`, en ese orden. Los encabezados se
+    validan antes del primer bloque (ValueError si faltan columnas o si la
+    extensión no es CSV/Excel). Si un Excel no tiene `hoja`, se lee la
+    primera y se llama a `avisar` con el mensaje.
+    """
+    ext = os.path.splitext(nombre)[1].lower().replace(".", "")
+    if ext == "csv":
+        bloques = _bloques_csv(archivo, columnas, tamano_bloque)
+    elif ext == "xlsx":
+        excel = HojaExcel(archivo, hoja, columnas)
+        aviso = aviso_hoja(hoja, excel.hoja)
+        if aviso and avisar:
+            avisar(aviso)
+        bloques = excel.bloques(tamano_bloque)
+    elif ext == "xls":
+        bloques = _bloques_xls(archivo, hoja, columnas, tamano_bloque)
+    else:
+        raise ValueError(
+            f"Tipo de archivo no soportado: .{ext}. Usa archivos Excel (.xlsx, .xls) o CSV."
+        )
+
+    # Se pide el primer bloque aquí para que los errores de encabezado salgan
+    # al llamar, no a la mitad del envío.
+    primero = next(bloques, None)
+    return _encadenar(primero, bloques)
+
+
+def _encadenar(primero: pd.DataFrame | None, resto: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    if primero is not None:
+        yield primero
+        yield from resto
+
+
+def sellar_bloque(bloque: pd.DataFrame, folio: str, fecha: str, hora: str) -> pd.DataFrame:
+    """Agrega ID al inicio y Fecha_Carga/Hora_Carga al final (sobre el mismo bloque)."""
+    bloque.insert(0, "ID", folio)
+    bloque["Fecha_Carga"] = fecha
+    bloque["Hora_Carga"] = hora
+    return bloque
@@ -0,0 +1,102 @@
+"""
+Normalización de texto para comparaciones robustas (nombres de producto,
+encabezados de columnas, etc.).
+"""
+import functools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def _normalize_text(s: str) -> str:
+    """
+    Normaliza texto para comparaciones robustas:
+    - Convierte a string
+    - Quita espacios al inicio y final
+    - Pasa a minúsculas
+    - Elimina acentos
+    - Quita caracteres que no sean letras o números
+    """
+    if s is None or (isinstance(s, float) and pd.isna(s)):
+        return ""
+    s = str(s).strip().lower()
+
+    # Quitar acentos
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+
+    # Quitar espacios y signos de puntuación, dejar solo letras y números
+    s = "".join(ch for ch in s if ch.isalnum())
+    return s
+
+
+def norm(s: str) -> str:
+    """Alias de _normalize_text para nombres de columnas, etc."""
+    return _normalize_text(s)
+
+
+def norm_producto(s: str) -> str:
+    """Normalizador específico para nombres de producto."""
+    return _normalize_text(s)
+
+
+# Separador para normalizar muchos valores en una sola cadena. No es letra
+# ni número, así que nunca sobrevive a la normalización de un valor.
+_SEP = "\x00"
+
+# Bloque "Combining Diacritical Marks": todos son categoría Mn y cubren los
+# acentos del español tras la descomposición NFD.
+_MARCAS_COMUNES = re.compile("[\u0300-\u036f]+")
+
+_NO_ALNUM_ASCII = bytes(b for b in range(128) if not chr(b).isalnum())
+_NO_ALNUM_ASCII_SIN_SEP = _NO_ALNUM_ASCII.replace(_SEP.encode(), b"")
+
+
+@functools.lru_cache(maxsize=1)
+def _tabla_sin_marcas() -> dict[int, None]:
+    """Tabla para str.translate que borra todas las marcas combinantes (Mn)."""
+    return dict.fromkeys(
+        c for c in range(0x110000) if unicodedata.category(chr(c)) == "Mn"
+    )
+
+
+def _normalizar_parte(p: str) -> str:
+    """`p` ya viene en minúsculas, NFD y sin los acentos comunes."""
+    if p.isascii():
+        return p.encode().translate(None, _NO_ALNUM_ASCII).decode()
+    return "".join(ch for ch in p.translate(_tabla_sin_marcas()) if ch.isalnum())
+
+
+def _normalizar_valores(valores: list[str]) -> list[str]:
+    """
+    Normaliza muchos strings a la vez: se unen en una sola cadena para hacer
+    minúsculas, NFD y borrado de acentos en una pasada, y el filtro de
+    letras/números se hace con bytes.translate cuando el texto es ASCII.
+    """
+    texto = _SEP.join(valores)
+    if texto.count(_SEP) != len(valores) - 1:
+        # Algún valor trae el separador: se normaliza uno por uno.
+        return [_normalize_text(v) for v in valores]
+
+    texto = _MARCAS_COMUNES.sub("", unicodedata.normalize("NFD", texto.lower()))
+    if texto.isascii():
+        return texto.encode().translate(None, _NO_ALNUM_ASCII_SIN_SEP).decode().split(_SEP)
+    return [_normalizar_parte(p) for p in texto.split(_SEP)]
+
+
+def normalizar_serie(s: pd.Series) -> pd.Series:
+    """
+    Equivalente vectorizado de `s.apply(norm_producto)`.
+
+    Cada valor distinto se normaliza una sola vez (pd.factorize) y los
+    únicos se procesan en bloque. Los nulos quedan como "".
+    """
+    codigos, unicos = pd.factorize(s, use_na_sentinel=True)
+    if len(unicos) == 0:
+        return pd.Series("", index=s.index, dtype=object)
+
+    limpios = np.asarray(_normalizar_valores([str(v) for v in unicos]), dtype=object)
+    resultado = np.where(codigos >= 0, limpios[codigos], "")
+    return pd.Series(resultado, index=s.index, dtype=object)
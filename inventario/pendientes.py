@@ -0,0 +1,222 @@
+"""
+Tabla materializada de pendientes por (ID_REQ, INSUMO, SKU).
+
+Guarda por clave la cantidad pedida (CANTIDAD PO), la recibida y la
+pendiente (PO - recibido, nunca negativa). Se construye una sola vez por
+versión de la hoja de requerimientos; si la hoja sólo creció al final (p.ej.
+llegaron filas de recepción) se agregan únicamente las filas nuevas y se
+suman a la tabla de la versión anterior, sin recorrer la hoja completa.
+
+`resumen_folios` agrupa esa tabla por folio y proveedor para el tablero de
+folios abiertos.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from inventario.indices import normalizar_folio
+from inventario.normalizacion import norm
+from inventario.perfil import anotar, medido
+from inventario.sincronizacion import Instantanea, VersionesPorOrigen
+
+CLAVES = ["ID_REQ", "INSUMO", "SKU"]
+COLUMNAS = CLAVES + [
+    "PROVEEDOR", "CANTIDAD PO", "CANTIDAD RECIBIDA TOTAL", "CANTIDAD PENDIENTE",
+]
+
+# Atributos de cabecera de cada folio que se muestran en el resumen.
+COLUMNAS_FOLIO = ["CECO_DESTINO", "FECHA DE PEDIDO", "FECHA DESEADA", "ESTATUS"]
+
+
+@dataclass(frozen=True)
+class TablaPendientes:
+    df: pd.DataFrame  # COLUMNAS, una fila por clave
+    indice: dict[str, np.ndarray]  # ID_REQ normalizado → posiciones en df
+    filas: int  # filas de la hoja ya agregadas
+
+
+_tablas = VersionesPorOrigen()  # TablaPendientes
+_atributos = VersionesPorOrigen()  # DataFrame de atributos_por_folio
+_lock = threading.Lock()
+
+
+def _columna_recibida(df: pd.DataFrame) -> str | None:
+    for col in df.columns:
+        if "cantidadrecibida" in norm(col):
+            return col
+    return None
+
+
+def agregar_requerimientos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sumas por (ID_REQ, INSUMO, SKU) de filas de la hoja ya tipadas
+    (ver `tipar_requerimientos`). Las filas sin ID_REQ o sin INSUMO se omiten.
+    """
+    vacio = pd.DataFrame(columns=COLUMNAS).astype(
+        {"CANTIDAD PO": "float64", "CANTIDAD RECIBIDA TOTAL": "float64"}
+    )
+    if "ID_REQ" not in df.columns or "INSUMO" not in df.columns or "CANTIDAD" not in df.columns:
+        return vacio
+
+    df = df[(df["ID_REQ"] != "") & (df["INSUMO"] != "")]
+    if df.empty:
+        return vacio
+
+    col_recibida = _columna_recibida(df)
+    base = pd.DataFrame({
+        "ID_REQ": df["ID_REQ"],
+        "INSUMO": df["INSUMO"],
+        "SKU": df["SKU"] if "SKU" in df.columns else "",
+        "PROVEEDOR": (
+            df["PROVEDOR"].astype(str).replace("", np.nan)
+            if "PROVEDOR" in df.columns else np.nan
+        ),
+        "CANTIDAD PO": df["CANTIDAD"],
+        "CANTIDAD RECIBIDA TOTAL": df[col_recibida] if col_recibida else 0.0,
+    })
+    return _sumar(base)
+
+
+def _sumar(base: pd.DataFrame) -> pd.DataFrame:
+    agregado = base.groupby(CLAVES, as_index=False, sort=False).agg({
+        "PROVEEDOR": "first",
+        "CANTIDAD PO": "sum",
+        "CANTIDAD RECIBIDA TOTAL": "sum",
+    })
+    agregado["PROVEEDOR"] = agregado["PROVEEDOR"].fillna("")
+    agregado["CANTIDAD PENDIENTE"] = (
+        agregado["CANTIDAD PO"] - agregado["CANTIDAD RECIBIDA TOTAL"]
+    ).clip(lower=0)
+    return agregado[COLUMNAS]
+
+
+def _combinar(tabla: pd.DataFrame, nuevas: pd.DataFrame) -> pd.DataFrame:
+    """Suma a `tabla` las sumas de `nuevas`; conserva el proveedor ya conocido."""
+    if nuevas.empty:
+        return tabla
+    base = pd.concat([tabla, nuevas], ignore_index=True)
+    base["PROVEEDOR"] = base["PROVEEDOR"].replace("", np.nan)
+    return _sumar(base)
+
+
+def _construir(df: pd.DataFrame, filas: int) -> TablaPendientes:
+    indice = pd.Series(np.arange(len(df))).groupby(
+        df["ID_REQ"].str.lower().to_numpy(), sort=False
+    ).indices
+    return TablaPendientes(df.reset_index(drop=True), indice, filas)
+
+
+@medido("pendientes: tabla")
+def tabla_pendientes(inst: Instantanea) -> TablaPendientes:
+    """Tabla de pendientes de la versión `inst.version` (incremental si se puede)."""
+    with _lock:
+        tabla = _tablas.get(inst.origen, inst.version)
+        if tabla is not None:
+            anotar(cache="memoria")
+            return tabla
+
+        previa = _tablas.get(inst.origen, inst.anterior) if inst.anterior else None
+        if previa is not None and previa.filas <= len(inst.df):
+            anotar(cache="incremental", filas=len(inst.df) - previa.filas)
+            nuevas = agregar_requerimientos(inst.df.iloc[previa.filas:])
+            df = _combinar(previa.df, nuevas)
+        else:
+            anotar(cache="fallo", filas=len(inst.df))
+            df = agregar_requerimientos(inst.df)
+
+        tabla = _construir(df, len(inst.df))
+        _tablas.guardar(inst.origen, inst.version, tabla)
+        return tabla
+
+
+def pendientes_por_id_req(inst: Instantanea, folio: str) -> pd.DataFrame:
+    """Copia de las filas de la tabla de pendientes de un ID_REQ."""
+    tabla = tabla_pendientes(inst)
+    posiciones = tabla.indice.get(normalizar_folio(folio))
+    if posiciones is None:
+        return tabla.df.iloc[0:0].copy()
+    return tabla.df.iloc[posiciones].copy()
+
+
+def aplicar_recepciones(pendientes: pd.DataFrame, recepciones: pd.DataFrame) -> pd.DataFrame:
+    """
+    Suma a `pendientes` recepciones que aún no se reflejan en la hoja
+    (p.ej. las que siguen en la bandeja de salida). `recepciones` trae
+    ID_REQ, INSUMO, SKU y CANTIDAD RECIBIDA; las de claves que no estén en
+    `pendientes` se ignoran.
+    """
+    if pendientes.empty or recepciones.empty:
+        return pendientes
+
+    recibido = (
+        recepciones.assign(**{
+            col: recepciones[col].fillna("").astype(str).str.strip() for col in CLAVES
+        })
+        .assign(ID_REQ=lambda d: d["ID_REQ"].str.lower())
+        .groupby(CLAVES)["CANTIDAD RECIBIDA"].sum()
+    )
+    claves = pd.MultiIndex.from_arrays([
+        pendientes["ID_REQ"].str.lower(), pendientes["INSUMO"], pendientes["SKU"],
+    ])
+    extra = recibido.reindex(claves, fill_value=0.0).to_numpy()
+
+    pendientes = pendientes.copy()
+    pendientes["CANTIDAD RECIBIDA TOTAL"] = pendientes["CANTIDAD RECIBIDA TOTAL"] + extra
+    pendientes["CANTIDAD PENDIENTE"] = (
+        pendientes["CANTIDAD PO"] - pendientes["CANTIDAD RECIBIDA TOTAL"]
+    ).clip(lower=0)
+    return pendientes
+
+
+def _atributos_folio(df: pd.DataFrame) -> pd.DataFrame:
+    agg = {
+        col: ("last" if col == "ESTATUS" else "first")
+        for col in COLUMNAS_FOLIO if col in df.columns
+    }
+    if "ID_REQ" not in df.columns or not agg:
+        atributos = pd.DataFrame(index=pd.Index([], dtype=object))
+    else:
+        df = df[df["ID_REQ"] != ""]
+        atributos = df.groupby(df["ID_REQ"].str.lower(), sort=False).agg(agg)
+
+    for col in COLUMNAS_FOLIO:
+        if col not in atributos.columns:
+            atributos[col] = pd.NaT if col.startswith("FECHA") else ""
+    return atributos[COLUMNAS_FOLIO]
+
+
+def atributos_por_folio(inst: Instantanea) -> pd.DataFrame:
+    """
+    CECO destino, fechas y último estatus de cada folio, indexados por
+    ID_REQ normalizado. Una sola agrupación por versión de la hoja.
+    """
+    with _lock:
+        atributos = _atributos.get(inst.origen, inst.version)
+        if atributos is None:
+            atributos = _atributos_folio(inst.df)
+            _atributos.guardar(inst.origen, inst.version, atributos)
+        return atributos
+
+
+def resumen_folios(pendientes: pd.DataFrame, atributos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Una fila por (ID_REQ, PROVEEDOR) con número de productos, cantidades y
+    porcentaje recibido, más los atributos del folio (`atributos_por_folio`).
+    Incluye los folios completos: filtrar por CANTIDAD PENDIENTE > 0.
+    """
+    resumen = pendientes.groupby(["ID_REQ", "PROVEEDOR"], as_index=False, sort=False).agg(**{
+        "PRODUCTOS": ("INSUMO", "size"),
+        "CANTIDAD PO": ("CANTIDAD PO", "sum"),
+        "CANTIDAD RECIBIDA TOTAL": ("CANTIDAD RECIBIDA TOTAL", "sum"),
+        "CANTIDAD PENDIENTE": ("CANTIDAD PENDIENTE", "sum"),
+    })
+    po = resumen["CANTIDAD PO"].to_numpy()
+    pendiente = resumen["CANTIDAD PENDIENTE"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resumen["% RECIBIDO"] = np.where(po > 0, (po - pendiente) / po * 100, 100.0)
+
+    return resumen.merge(
+        atributos, left_on=resumen["ID_REQ"].str.lower(), right_index=True, how="left"
+    ).drop(columns="key_0", errors="ignore").reset_index(drop=True)
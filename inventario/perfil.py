@@ -0,0 +1,263 @@
+"""
+Medición de tiempos de loaders, envíos y cálculos.
+
+`medir("nombre")` (context manager) y `@medido("nombre")` registran tiempo
+de pared, filas procesadas, bytes transferidos y si se sirvió de caché. El
+código de más adentro (sincronizador de hojas, caché compartida, cliente
+HTTP) agrega datos con `anotar(bytes=..., cache=...)`, que se aplica a la
+medición abierta más interna; fuera de una medición no hace nada.
+
+Las mediciones de un rerun se juntan en el `Rerun` activado con
+`iniciar_rerun` (lo muestra el panel lateral) y, si se configuró un
+directorio con `configurar_registro`, se escriben también como JSON por
+línea, un archivo por día, para agregarlas entre días. Las líneas se juntan
+en memoria y un hilo las escribe por tandas: medir no toca el disco.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Medicion:
+    nombre: str
+    nivel: int  # 0 = medición de primer nivel; 1 = dentro de otra, etc.
+    inicio: float  # epoch
+    ms: float = 0.0
+    filas: int | None = None
+    bytes: int | None = None
+    cache: str | None = None  # "memoria", "compartida", "304", "descarga", "fallo"…
+    error: str | None = None
+
+    def anotar(self, filas: int | None = None, bytes: int | None = None, cache: str | None = None):
+        if filas is not None:
+            self.filas = filas
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+        if cache is not None:
+            self.cache = cache
+
+
+@dataclass
+class Rerun:
+    contexto: dict  # sesión, vista… (se copia a cada línea del registro)
+    inicio: float = field(default_factory=time.time)
+    mediciones: list[Medicion] = field(default_factory=list)
+
+    @property
+    def ms_medidos(self) -> float:
+        """Tiempo desde el inicio del rerun hasta el fin de la última medición."""
+        if not self.mediciones:
+            return 0.0
+        fin = max(m.inicio + m.ms / 1000 for m in self.mediciones)
+        return (fin - self.inicio) * 1000
+
+
+_rerun: contextvars.ContextVar[Rerun | None] = contextvars.ContextVar("perfil_rerun", default=None)
+_pila: contextvars.ContextVar[tuple[Medicion, ...]] = contextvars.ContextVar("perfil_pila", default=())
+
+
+# Cada cuántos segundos (o líneas juntadas) se escribe el registro.
+SEGUNDOS_POR_ESCRITURA = 2.0
+LINEAS_POR_ESCRITURA = 500
+# Un archivo del día que pasa de este tamaño se renombra a AAAA-MM-DD.<n>.jsonl.
+MAX_BYTES_ARCHIVO = 32 * 1024 * 1024
+# Días que se conservan los archivos del registro.
+DIAS_REGISTRO = 30
+
+
+class RegistroJSONL:
+    """
+    Agrega cada medición como una línea JSON en `<directorio>/AAAA-MM-DD.jsonl`.
+    `escribir` sólo la deja en memoria; el hilo del registro escribe las
+    juntadas cada SEGUNDOS_POR_ESCRITURA (antes si se juntan
+    LINEAS_POR_ESCRITURA) y al terminar el proceso. El archivo del día se
+    rota al pasar de MAX_BYTES_ARCHIVO y los de más de DIAS_REGISTRO días se
+    borran.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        self._lock_archivo = threading.Lock()
+        self._lineas: list[tuple[str, str]] = []  # (día, línea)
+        self._despertar = threading.Event()
+        self._activo = True
+        self._hilo: threading.Thread | None = None
+        self._depurado: date | None = None
+        os.makedirs(directorio, exist_ok=True)
+        atexit.register(self.vaciar)
+
+    def ruta(self, dia: str | None = None) -> str:
+        return os.path.join(self.directorio, f"{dia or datetime.now().strftime('%Y-%m-%d')}.jsonl")
+
+    def escribir(self, medicion: Medicion, contexto: dict) -> None:
+        inicio = datetime.fromtimestamp(medicion.inicio)
+        linea = json.dumps({
+            "ts": inicio.isoformat(timespec="milliseconds"),
+            **contexto,
+            "nombre": medicion.nombre,
+            "nivel": medicion.nivel,
+            "ms": round(medicion.ms, 2),
+            "filas": medicion.filas,
+            "bytes": medicion.bytes,
+            "cache": medicion.cache,
+            "error": medicion.error,
+        }, ensure_ascii=False)
+        with self._lock:
+            self._lineas.append((inicio.strftime("%Y-%m-%d"), linea))
+            lleno = len(self._lineas) >= LINEAS_POR_ESCRITURA
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="perfil-registro", daemon=True)
+                self._hilo.start()
+        if lleno:
+            self._despertar.set()
+
+    def vaciar(self) -> None:
+        """Escribe ya las líneas juntadas (el hilo lo hace solo cada tanto)."""
+        with self._lock_archivo:
+            with self._lock:
+                lineas, self._lineas = self._lineas, []
+            if not lineas:
+                return
+            por_dia: dict[str, list[str]] = {}
+            for dia, linea in lineas:
+                por_dia.setdefault(dia, []).append(linea)
+            try:
+                for dia, del_dia in por_dia.items():
+                    ruta = self.ruta(dia)
+                    self._rotar(ruta)
+                    with open(ruta, "a", encoding="utf-8") as f:
+                        f.write("\n".join(del_dia) + "\n")
+                self._depurar()
+            except OSError:
+                logger.warning("No se pudo escribir el registro de tiempos", exc_info=True)
+
+    def cerrar(self) -> None:
+        """Escribe lo pendiente y termina el hilo."""
+        self._activo = False
+        self._despertar.set()
+        self.vaciar()
+
+    def _rotar(self, ruta: str) -> None:
+        try:
+            if os.path.getsize(ruta) < MAX_BYTES_ARCHIVO:
+                return
+        except FileNotFoundError:
+            return
+        base = ruta[:-len(".jsonl")]
+        n = 1
+        while os.path.exists(f"{base}.{n}.jsonl"):
+            n += 1
+        # Otro proceso pudo rotarlo primero: entonces ya no existe y se crea de nuevo.
+        try:
+            os.rename(ruta, f"{base}.{n}.jsonl")
+        except FileNotFoundError:
+            pass
+
+    def _depurar(self) -> None:
+        hoy = date.today()
+        if self._depurado == hoy:
+            return
+        limite = (hoy - timedelta(days=DIAS_REGISTRO)).isoformat()
+        for nombre in os.listdir(self.directorio):
+            # AAAA-MM-DD se compara como texto.
+            if nombre.endswith(".jsonl") and nombre[:10] < limite:
+                os.remove(os.path.join(self.directorio, nombre))
+        self._depurado = hoy
+
+    def _bucle(self) -> None:
+        while self._activo:
+            self._despertar.wait(SEGUNDOS_POR_ESCRITURA)
+            self._despertar.clear()
+            try:
+                self.vaciar()
+            except Exception:
+                logger.exception("Error en el registro de tiempos")
+
+
+_registro: RegistroJSONL | None = None
+
+
+def configurar_registro(directorio: str | None) -> RegistroJSONL | None:
+    """Activa (o, con None, desactiva) el registro JSONL del proceso."""
+    global _registro
+    if _registro is not None and _registro.directorio != directorio:
+        _registro.cerrar()
+        _registro = None
+    if directorio is not None and _registro is None:
+        _registro = RegistroJSONL(directorio)
+    return _registro
+
+
+def iniciar_rerun(**contexto) -> Rerun:
+    """Empieza a juntar las mediciones del rerun actual (hilo del script)."""
+    rerun = Rerun(contexto)
+    _rerun.set(rerun)
+    return rerun
+
+
+def anotar(**datos) -> None:
+    """Agrega filas/bytes/cache a la medición abierta más interna, si hay una."""
+    pila = _pila.get()
+    if pila:
+        pila[-1].anotar(**datos)
+
+
+@contextmanager
+def medir(nombre: str, filas: int | None = None):
+    pila = _pila.get()
+    medicion = Medicion(nombre, len(pila), time.time(), filas=filas)
+    token = _pila.set(pila + (medicion,))
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    except Exception as e:
+        medicion.error = type(e).__name__
+        raise
+    finally:
+        medicion.ms = (time.perf_counter() - inicio) * 1000
+        _pila.reset(token)
+        rerun = _rerun.get()
+        if rerun is not None:
+            rerun.mediciones.append(medicion)
+        if _registro is not None:
+            _registro.escribir(medicion, rerun.contexto if rerun is not None else {})
+
+
+def _filas(valor) -> int | None:
+    forma = getattr(getattr(valor, "df", valor), "shape", None)  # Instantanea → su df
+    if forma:
+        return int(forma[0])
+    if isinstance(valor, list):
+        return len(valor)
+    return None
+
+
+def medido(nombre: str | None = None):
+    """Decorador: mide cada llamada; si devuelve un DataFrame/lista, cuenta sus filas."""
+
+    def decorador(func):
+        etiqueta = nombre or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with medir(etiqueta) as medicion:
+                valor = func(*args, **kwargs)
+                if medicion.filas is None:
+                    medicion.filas = _filas(valor)
+                return valor
+
+        return wrapper
+
+    return decorador
@@ -0,0 +1,80 @@
+"""
+Serialización a JSON de filas para Apps Script.
+
+`filas_json` convierte un DataFrame a listas de valores nativos columna por
+columna: las fechas se formatean en bloque (ISO, como `isoformat()`) y los
+nulos se ponen en None con la máscara de cada columna, sin recorrer celda
+por celda. `dumps_json` produce directamente los bytes del cuerpo del POST,
+con orjson si está instalado y con la librería estándar si no.
+"""
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # opcional: sólo acelera
+    orjson = None
+
+
+def dumps_json(obj) -> bytes:
+    """JSON compacto en UTF-8; lo que no sea serializable se manda como str."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def loads_json(datos: bytes | str):
+    return orjson.loads(datos) if orjson is not None else json.loads(datos)
+
+
+def _iso_fechas(valores: np.ndarray) -> np.ndarray:
+    """datetime64 sin zona → texto como `Timestamp.isoformat()` (fracción sólo si la hay)."""
+    valores = valores.astype("datetime64[ns]")
+    nanos = valores.view("int64") % 1_000_000_000
+    nanos[np.isnat(valores)] = 0  # NaT (se vuelve None después) no lleva fracción
+    texto = np.datetime_as_string(valores, unit="s")
+    if nanos.any():
+        con_us = nanos % 1000 == 0
+        texto = np.where(
+            nanos == 0, texto,
+            np.where(
+                con_us,
+                np.datetime_as_string(valores, unit="us"),
+                np.datetime_as_string(valores, unit="ns"),
+            ),
+        )
+    return texto
+
+
+def _valores_columna(s: pd.Series) -> list:
+    dtype = s.dtype
+    if pd.api.types.is_datetime64_dtype(dtype):
+        valores = _iso_fechas(s.to_numpy()).tolist()
+    elif isinstance(dtype, pd.DatetimeTZDtype):
+        valores = [x.isoformat() if x is not pd.NaT else None for x in s]
+    elif dtype == object and pd.api.types.infer_dtype(s, skipna=True) in (
+        "date", "datetime", "mixed", "mixed-integer",
+    ):
+        # Texto mezclado con fechas (p.ej. columnas leídas de Excel).
+        valores = [x.isoformat() if isinstance(x, date) else x for x in s.tolist()]
+    else:
+        valores = s.tolist()
+
+    nulos = np.flatnonzero(s.isna().to_numpy())
+    for i in nulos:
+        valores[i] = None
+    return valores
+
+
+def filas_json(df: pd.DataFrame) -> list[tuple]:
+    """
+    Filas de `df` como tuplas serializables a JSON (fechas ISO, nulos → None);
+    en el JSON quedan como arreglos, igual que una lista.
+    """
+    if df.empty:
+        return []
+    columnas = [_valores_columna(df.iloc[:, j]) for j in range(df.shape[1])]
+    return list(zip(*columnas))
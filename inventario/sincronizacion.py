@@ -0,0 +1,414 @@
+"""
+Sincronización de hojas de Google Sheets publicadas como CSV.
+
+Cada hoja se guarda en disco (contenido crudo + metadatos) y se revalida con
+peticiones condicionales (If-None-Match / If-Modified-Since). El CSV sólo se
+vuelve a parsear cuando el contenido cambió; si la hoja únicamente creció al
+final, se parsean sólo las filas nuevas y se concatenan a la copia en memoria.
+
+Opcionalmente cada hoja pasa por una función `preparar` (tipado, limpieza)
+y el resultado se guarda como instantánea columnar (Arrow/Feather sin
+compresión). En un arranque en frío, si la hoja no cambió, se mapea en
+memoria esa instantánea en lugar de volver a parsear y preparar el CSV.
+
+Si se configura una caché compartida, la última versión parseada se publica
+ahí para que los demás procesos del servidor no repitan la descarga dentro
+del intervalo mínimo de revalidación.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable
+
+import pandas as pd
+import requests
+
+from inventario.cache import ESQUEMA_CACHE, BackendCache
+from inventario.perfil import anotar
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Instantanea:
+    """Versión de una hoja ya parseada."""
+
+    df: pd.DataFrame
+    version: str  # sha256 del CSV
+    obtenido_en: float  # epoch de la última revalidación contra Google
+    # Versión de la que ésta sólo añadió filas al final (parseo incremental);
+    # permite a las estructuras derivadas procesar únicamente las nuevas.
+    anterior: str | None = None
+    # Quién publica las versiones (url de la hoja, tabla del almacén): las
+    # estructuras derivadas se guardan por origen, ver `VersionesPorOrigen`.
+    origen: str = ""
+
+
+class VersionesPorOrigen:
+    """
+    Estructuras derivadas por (origen, versión), con las últimas
+    `max_versiones` de cada origen: la actual y, mientras se publica la
+    nueva, la anterior. Así la hoja sincronizada (p.ej. el archivo mensual)
+    y la tabla del almacén no se desalojan entre sí. Quien la usa la protege
+    con su propio lock.
+    """
+
+    def __init__(self, max_versiones: int = 2):
+        self.max_versiones = max_versiones
+        self._por_origen: dict[str, dict[str, object]] = {}
+
+    def get(self, origen: str, version: str | None):
+        return self._por_origen.get(origen, {}).get(version)
+
+    def guardar(self, origen: str, version: str, valor) -> None:
+        versiones = self._por_origen.setdefault(origen, {})
+        versiones[version] = valor
+        while len(versiones) > self.max_versiones:
+            versiones.pop(next(iter(versiones)))
+
+
+def leer_csv_bytes(
+        contenido: bytes,
+        names: list[str] | None = None,
+        dtype: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Parsea un CSV en memoria con el mismo criterio que los loaders:
+    motor C y, si falla, motor python saltando líneas corruptas.
+    Si se pasan `names`, el contenido no trae encabezado. `dtype` fija el
+    tipo de algunas columnas (las que no existan se ignoran).
+    """
+    kwargs = {} if names is None else {"header": None, "names": names}
+    if dtype:
+        kwargs["dtype"] = dtype
+
+    try:
+        df = pd.read_csv(BytesIO(contenido), **kwargs)
+    except pd.errors.ParserError:
+        df = pd.read_csv(
+            BytesIO(contenido), engine="python", on_bad_lines="skip", **kwargs
+        )
+
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+def _ruta_temporal(ruta: str) -> str:
+    return f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _escribir_atomico(ruta: str, contenido: bytes) -> None:
+    tmp = _ruta_temporal(ruta)
+    with open(tmp, "wb") as f:
+        f.write(contenido)
+    os.replace(tmp, ruta)
+
+
+def _sin_preparar(df: pd.DataFrame) -> pd.DataFrame:
+    return df
+
+
+def concatenar(viejo: pd.DataFrame, nuevo: pd.DataFrame) -> pd.DataFrame:
+    """pd.concat conservando como categóricas las columnas que ya lo eran."""
+    df = pd.concat([viejo, nuevo], ignore_index=True)
+    for col in viejo.columns:
+        if not isinstance(viejo[col].dtype, pd.CategoricalDtype):
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if col in nuevo.columns and isinstance(nuevo[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.api.types.union_categoricals(
+                [viejo[col], nuevo[col]], ignore_order=True
+            )
+        else:
+            df[col] = df[col].astype("category")
+    return df
+
+
+class SincronizadorHoja:
+    """
+    Mantiene la copia local de una hoja publicada.
+
+    `obtener()` devuelve la copia en memoria sin tocar la red;
+    `obtener(revalidar=True)` hace un GET condicional, salvo que la última
+    revalidación tenga menos de `intervalo_minimo` segundos (así varias
+    llamadas dentro del mismo rerun no descargan la hoja varias veces).
+
+    `preparar` recibe el CSV parseado (o sólo las filas nuevas, si la hoja
+    creció al final) y devuelve el DataFrame que se publica; `esquema`
+    identifica esa preparación e invalida instantáneas hechas con otra.
+    `dtype` se pasa a read_csv para no inferir el tipo de esas columnas.
+
+    El DataFrame devuelto es compartido entre sesiones: no modificarlo in-place.
+    """
+
+    def __init__(
+            self,
+            nombre: str,
+            url: str,
+            directorio: str,
+            intervalo_minimo: float = 10.0,
+            timeout: float = 30.0,
+            cache: BackendCache | None = None,
+            preparar: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+            esquema: str = "",
+            dtype: dict | None = None,
+    ):
+        self.nombre = nombre
+        self.url = url
+        self.intervalo_minimo = intervalo_minimo
+        self.timeout = timeout
+        self.cache = cache
+        self.preparar = preparar or _sin_preparar
+        self.esquema = esquema
+        self.dtype = dtype
+        self._clave_cache = f"v{ESQUEMA_CACHE}:hoja:{nombre}:{esquema}:{url}"
+
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_csv = os.path.join(directorio, f"{nombre}.csv")
+        self._ruta_meta = os.path.join(directorio, f"{nombre}.json")
+        self._ruta_arrow = os.path.join(directorio, f"{nombre}.feather")
+
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._actual: Instantanea | None = None
+        self._contenido: bytes | None = None
+        # Encabezados del CSV tal cual; hacen falta para parsear sólo las filas nuevas.
+        self._columnas_crudas: list[str] | None = None
+        self._meta: dict = self._leer_meta()
+
+    # ---------------- disco ----------------
+    def _leer_meta(self) -> dict:
+        try:
+            with open(self._ruta_meta, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if meta.get("url") != self.url or not os.path.exists(self._ruta_csv):
+            return {}
+        return meta
+
+    def _leer_contenido_local(self) -> bytes | None:
+        if self._contenido is not None:
+            return self._contenido
+        try:
+            with open(self._ruta_csv, "rb") as f:
+                contenido = f.read()
+        except OSError:
+            return None
+        if hashlib.sha256(contenido).hexdigest() != self._meta.get("sha256"):
+            return None
+        return contenido
+
+    def _guardar(self, contenido: bytes, resp: requests.Response, version: str) -> None:
+        """Persiste el CSV (sólo si cambió) y los validadores de la respuesta."""
+        meta = {
+            "url": self.url,
+            "sha256": version,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "guardado_en": time.time(),
+        }
+        try:
+            if version != self._meta.get("sha256"):
+                _escribir_atomico(self._ruta_csv, contenido)
+            _escribir_atomico(
+                self._ruta_meta, json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            )
+        except OSError:
+            logger.warning("No se pudo guardar la copia local de '%s'", self.nombre, exc_info=True)
+        self._meta = meta
+
+    # ---------------- instantánea columnar ----------------
+    def _sello(self, version: str) -> bytes:
+        return f"{version}:{self.esquema}".encode("utf-8")
+
+    def _leer_arrow(self, version: str) -> pd.DataFrame | None:
+        """Instantánea de `version` mapeada en memoria, si existe y es de este esquema."""
+        import pyarrow as pa
+
+        try:
+            with pa.memory_map(self._ruta_arrow) as fuente:
+                lector = pa.ipc.open_file(fuente)
+                meta = lector.schema.metadata or {}
+                if meta.get(b"sincronizacion") != self._sello(version):
+                    return None
+                df = lector.read_all().to_pandas()
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Instantánea ilegible de '%s'", self.nombre, exc_info=True)
+            return None
+
+        columnas = meta.get(b"columnas_crudas")
+        self._columnas_crudas = json.loads(columnas) if columnas else None
+        return df
+
+    def _escribir_arrow(self, df: pd.DataFrame, version: str) -> None:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        try:
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            meta = dict(tabla.schema.metadata or {})
+            meta[b"sincronizacion"] = self._sello(version)
+            if self._columnas_crudas is not None:
+                meta[b"columnas_crudas"] = json.dumps(self._columnas_crudas).encode("utf-8")
+            tmp = _ruta_temporal(self._ruta_arrow)
+            feather.write_feather(
+                tabla.replace_schema_metadata(meta), tmp, compression="uncompressed"
+            )
+            os.replace(tmp, self._ruta_arrow)
+        except Exception:
+            # Columnas con tipos mezclados, disco lleno, etc.: se sigue sin instantánea.
+            logger.warning("No se pudo guardar la instantánea de '%s'", self.nombre, exc_info=True)
+
+    # ---------------- parseo ----------------
+    def _parsear(self, contenido: bytes) -> tuple[pd.DataFrame, str | None]:
+        """DataFrame preparado y, si sólo se añadieron filas, la versión que extiende."""
+        anterior = self._contenido
+        if (
+                self._actual is not None
+                and self._columnas_crudas is not None
+                and anterior
+                and anterior.endswith(b"\n")
+                and len(contenido) > len(anterior)
+                and contenido.startswith(anterior)
+        ):
+            nuevas = leer_csv_bytes(
+                contenido[len(anterior):], names=self._columnas_crudas, dtype=self.dtype
+            )
+            return concatenar(self._actual.df, self.preparar(nuevas)), self._actual.version
+
+        crudo = leer_csv_bytes(contenido, dtype=self.dtype)
+        self._columnas_crudas = list(crudo.columns)
+        return self.preparar(crudo), None
+
+    def _publicar(self, contenido: bytes, version: str, ahora: float) -> Instantanea:
+        if self._actual is not None and self._actual.version == version:
+            self._actual = Instantanea(
+                self._actual.df, version, ahora, self._actual.anterior, origen=self.url
+            )
+        else:
+            df, base = self._leer_arrow(version), None
+            if df is None:
+                df, base = self._parsear(contenido)
+                self._escribir_arrow(df, version)
+            self._actual = Instantanea(df, version, ahora, anterior=base, origen=self.url)
+        self._contenido = contenido
+        return self._actual
+
+    # ---------------- caché compartida ----------------
+    def _desde_cache(self, ahora: float) -> Instantanea | None:
+        """Versión publicada por otro proceso, si aún está dentro del intervalo."""
+        if self.cache is None:
+            return None
+
+        meta = self.cache.consultar(self._clave_cache)
+        if meta is None or meta.expira <= ahora:
+            return None
+        if self._actual is not None and self._actual.version == meta.version:
+            self._actual = Instantanea(
+                self._actual.df, meta.version, meta.creado, self._actual.anterior,
+                origen=self.url,
+            )
+            return self._actual
+
+        leido = self.cache.leer(self._clave_cache)
+        if leido is None:
+            return None
+        meta, datos = leido
+
+        # El otro proceso ya dejó el CSV en disco; se recupera para que el
+        # siguiente cambio pueda parsearse de forma incremental.
+        self._meta = self._leer_meta()
+        self._contenido = None
+        self._columnas_crudas = None
+        if self._meta.get("sha256") == meta.version:
+            self._contenido = self._leer_contenido_local()
+
+        self._actual = Instantanea(pickle.loads(datos), meta.version, meta.creado, origen=self.url)
+        return self._actual
+
+    def _a_cache(self, inst: Instantanea) -> None:
+        if self.cache is None:
+            return
+        if self.cache.renovar(self._clave_cache, inst.version, self.intervalo_minimo):
+            return
+        datos = pickle.dumps(inst.df, protocol=pickle.HIGHEST_PROTOCOL)
+        self.cache.guardar(self._clave_cache, datos, inst.version, self.intervalo_minimo)
+
+    # ---------------- API ----------------
+    def obtener(self, revalidar: bool = False) -> Instantanea:
+        with self._lock:
+            ahora = time.time()
+            if self._actual is not None and (
+                    not revalidar or ahora - self._actual.obtenido_en < self.intervalo_minimo
+            ):
+                anotar(cache="memoria")
+                return self._actual
+
+            compartida = self._desde_cache(ahora)
+            if compartida is not None:
+                anotar(cache="compartida")
+                return compartida
+
+            local = self._leer_contenido_local()
+            headers = {}
+            if local is not None:
+                if self._meta.get("etag"):
+                    headers["If-None-Match"] = self._meta["etag"]
+                if self._meta.get("last_modified"):
+                    headers["If-Modified-Since"] = self._meta["last_modified"]
+
+            try:
+                resp = self._session.get(self.url, headers=headers, timeout=self.timeout)
+                if resp.status_code == 304 and local is not None:
+                    anotar(cache="304")
+                    inst = self._publicar(local, self._meta["sha256"], ahora)
+                    self._a_cache(inst)
+                    return inst
+                resp.raise_for_status()
+            except requests.RequestException:
+                # Sin red: se sirve la última copia conocida si existe.
+                if self._actual is not None:
+                    logger.warning("Fallo al revalidar '%s'; se usa la copia en memoria", self.nombre)
+                    return self._actual
+                if local is not None:
+                    logger.warning("Fallo al revalidar '%s'; se usa la copia en disco", self.nombre)
+                    return self._publicar(local, self._meta["sha256"], ahora)
+                raise
+
+            contenido = resp.content
+            anotar(cache="descarga", bytes=len(contenido))
+            version = hashlib.sha256(contenido).hexdigest()
+            if (
+                    version != self._meta.get("sha256")
+                    or resp.headers.get("ETag") != self._meta.get("etag")
+                    or resp.headers.get("Last-Modified") != self._meta.get("last_modified")
+            ):
+                self._guardar(contenido, resp, version)
+            inst = self._publicar(contenido, version, ahora)
+            self._a_cache(inst)
+            return inst
+
+
+_sincronizadores: dict[tuple[str, str], SincronizadorHoja] = {}
+_sincronizadores_lock = threading.Lock()
+
+
+def obtener_sincronizador(nombre: str, url: str, directorio: str, **kwargs) -> SincronizadorHoja:
+    """Devuelve el sincronizador de la hoja (uno por proceso)."""
+    clave = (nombre, url)
+    with _sincronizadores_lock:
+        sinc = _sincronizadores.get(clave)
+        if sinc is None:
+            sinc = SincronizadorHoja(nombre, url, directorio, **kwargs)
+            _sincronizadores[clave] = sinc
+        return sinc
@@ -0,0 +1,25 @@
+"""Datos de prueba compartidos por los tests."""
+import pandas as pd
+
+from inventario.esquemas import tipar_requerimientos
+from inventario.perfil import iniciar_rerun
+
+
+def hoja_requerimientos(filas: int) -> pd.DataFrame:
+    """Hoja de requerimientos ya tipada: dos líneas por folio."""
+    return tipar_requerimientos(pd.DataFrame({
+        "ID_REQ": [f"REQ-20240101-1200{i // 2:02d}" for i in range(filas)],
+        "INSUMO": [f"Insumo {i % 2}" for i in range(filas)],
+        "SKU": [str(100 + i % 2) for i in range(filas)],
+        "PROVEDOR": [f"Proveedor {i % 3}" for i in range(filas)],
+        "CANTIDAD": [float(i + 1) for i in range(filas)],
+        "CANTIDAD RECIBIDA": [0.0] * filas,
+        "ESTATUS": ["Recibido" if i == 7 else "Pendiente" for i in range(filas)],
+    }))
+
+
+def cache_de(nombre: str, funcion):
+    rerun = iniciar_rerun()
+    valor = funcion()
+    (medicion,) = [m for m in rerun.mediciones if m.nombre == nombre]
+    return valor, medicion.cache
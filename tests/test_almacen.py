@@ -0,0 +1,152 @@
+import functools
+import time
+
+import pandas as pd
+import pytest
+
+from inventario.almacen import Almacen
+from inventario.archivo import ArchivoRequerimientos
+from inventario.bandeja_salida import ENVIADO, FALLIDO, BandejaSalida
+from inventario.esquemas import (
+    ESQUEMA_REQUERIMIENTOS, RECEPCION_COLUMNS, REQUERIMIENTOS_COLUMNS, tipar_requerimientos,
+)
+from inventario.pendientes import tabla_pendientes
+from inventario.sincronizacion import Instantanea
+from tests.datos import cache_de, hoja_requerimientos
+
+
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    # Sin hilo de entrega: los envíos se quedan en la cola para revisarlos.
+    monkeypatch.setattr(BandejaSalida, "iniciar", lambda self: None)
+    return Almacen(str(tmp_path / "almacen.sqlite3"))
+
+
+def leer(almacen: Almacen) -> Instantanea:
+    return almacen.instantanea("requerimientos", tipar_requerimientos, ESQUEMA_REQUERIMIENTOS)
+
+
+def registrar_requerimiento(almacen: Almacen, folio: str) -> int:
+    fila = {"ID_REQ": folio, "INSUMO": "Insumo 0", "SKU": "100", "CANTIDAD": 3, "ESTATUS": "Pendiente"}
+    return almacen.registrar(
+        "requerimientos", REQUERIMIENTOS_COLUMNS, [[fila.get(c, "") for c in REQUERIMIENTOS_COLUMNS]],
+        "requerimiento", folio, "https://ejemplo",
+    )
+
+
+def registrar_recepcion(almacen: Almacen, folio: str, id_req: str, cantidad: float) -> int:
+    fila = {
+        "Folio Generado de Recepcion": folio, "ID DE REQUERIMIENTO AL QUE CORRESPONDE": id_req,
+        "SKU": "100", "PRODUCTO": "Insumo 0", "CANTIDAD RECIBIDA": cantidad,
+    }
+    return almacen.registrar(
+        "recepciones", RECEPCION_COLUMNS, [[fila.get(c, "") for c in RECEPCION_COLUMNS]],
+        "recepcion", folio, "https://ejemplo",
+    )
+
+
+def marcar(almacen: Almacen, id_envio: int, estado: str, actualizado: float) -> None:
+    almacen.bandeja._conexion().execute(
+        "UPDATE envios SET estado = ?, actualizado = ? WHERE id = ?", (estado, actualizado, id_envio)
+    )
+
+
+def test_importar_conserva_las_filas_locales_que_la_hoja_no_refleja(almacen):
+    hace_una_hora = time.time() - 3600
+    en_cola = registrar_requerimiento(almacen, "REQ-20240102-090000")
+    registrar_requerimiento(almacen, "REQ-20240101-120001")  # ya aparece en la hoja
+    entregado = registrar_requerimiento(almacen, "REQ-20240102-090001")
+    marcar(almacen, entregado, ENVIADO, hace_una_hora)  # la hoja ya tuvo tiempo de publicarlo
+
+    hoja = hoja_requerimientos(4)
+    assert almacen.importar("requerimientos", Instantanea(hoja, "v1", time.time()), ESQUEMA_REQUERIMIENTOS)
+    assert not almacen.importar("requerimientos", Instantanea(hoja, "v1", time.time()), ESQUEMA_REQUERIMIENTOS)
+
+    df = leer(almacen).df
+    assert list(df["ID_REQ"]) == [*hoja["ID_REQ"], "REQ-20240102-090000"]
+    assert almacen.filas_sin_reflejar("requerimientos", 0)["ID_REQ"].tolist() == ["REQ-20240102-090000"]
+
+    # Si el envío falla, la fila deja de contar como pendiente de reflejar.
+    marcar(almacen, en_cola, FALLIDO, time.time())
+    assert almacen.filas_sin_reflejar("requerimientos", 0).empty
+
+
+def test_filas_sin_reflejar_cuenta_las_entregadas_despues_de_la_descarga(almacen):
+    descarga = time.time() - 600
+    antes = registrar_recepcion(almacen, "REC-1", "REQ-20240101-120000", 1)
+    despues = registrar_recepcion(almacen, "REC-2", "REQ-20240101-120000", 2)
+    registrar_recepcion(almacen, "REC-3", "REQ-20240101-120000", 4)  # sigue en cola
+    marcar(almacen, antes, ENVIADO, descarga - 60)
+    marcar(almacen, despues, ENVIADO, descarga + 60)
+
+    en_cola = almacen.filas_sin_reflejar("recepciones", descarga)
+    assert en_cola["Folio Generado de Recepcion"].tolist() == ["REC-2", "REC-3"]
+
+
+def test_recepciones_locales_prevalecen_sobre_la_hoja(almacen):
+    registrar_recepcion(almacen, "REC-1", "REQ-20240101-120000", 5)
+    hoja = pd.DataFrame({
+        "Folio Generado de Recepcion": ["REC-1", "REC-0"],
+        "ID DE REQUERIMIENTO AL QUE CORRESPONDE": ["REQ-20240101-120000"] * 2,
+        "CANTIDAD RECIBIDA": ["4", "1"],  # la hoja trae REC-1 con otro valor
+    })
+    almacen.importar("recepciones", Instantanea(hoja, "v1", time.time()), "prueba")
+
+    df = almacen.instantanea("recepciones", lambda d: d, "prueba").df
+    recibido = df.set_index("Folio Generado de Recepcion")["CANTIDAD RECIBIDA"].astype(float)
+    assert recibido.to_dict() == {"REC-0": 1.0, "REC-1": 5.0}
+
+
+def test_importar_hoja_crecida_actualiza_pendientes_de_forma_incremental(almacen):
+    almacen.importar("requerimientos", Instantanea(hoja_requerimientos(6), "v1", time.time()),
+                     ESQUEMA_REQUERIMIENTOS)
+    primera = leer(almacen)
+    tabla_pendientes(primera)
+
+    # La hoja crece al final (y con ello cambian las categorías de ESTATUS/PROVEDOR).
+    crecida = hoja_requerimientos(10)
+    almacen.importar("requerimientos", Instantanea(crecida, "v2", time.time()), ESQUEMA_REQUERIMIENTOS)
+    segunda = leer(almacen)
+    assert segunda.anterior == primera.version
+
+    tabla, cache = cache_de("pendientes: tabla", lambda: tabla_pendientes(segunda))
+    assert cache == "incremental"
+    assert tabla.df["CANTIDAD PO"].sum() == crecida["CANTIDAD"].sum()
+
+
+def test_importar_hoja_reescrita_reconstruye_pendientes(almacen):
+    almacen.importar("requerimientos", Instantanea(hoja_requerimientos(6), "v1", time.time()),
+                     ESQUEMA_REQUERIMIENTOS)
+    tabla_pendientes(leer(almacen))
+
+    cambiada = hoja_requerimientos(8)
+    cambiada.loc[0, "CANTIDAD"] = 99.0
+    almacen.importar("requerimientos", Instantanea(cambiada, "v2", time.time()), ESQUEMA_REQUERIMIENTOS)
+    segunda = leer(almacen)
+    assert segunda.anterior is None
+
+    _, cache = cache_de("pendientes: tabla", lambda: tabla_pendientes(segunda))
+    assert cache == "fallo"
+
+
+def test_archivar_saca_los_folios_cerrados_del_almacen(almacen, tmp_path):
+    hoja = hoja_requerimientos(10)
+    hoja.loc[hoja["ID_REQ"] == "REQ-20240101-120000", "CANTIDAD RECIBIDA"] = hoja["CANTIDAD"]
+    inst = Instantanea(hoja, "v1", time.time())
+    almacen.importar("requerimientos", inst, ESQUEMA_REQUERIMIENTOS)
+    assert len(leer(almacen).df) == 10
+
+    archivo = ArchivoRequerimientos(str(tmp_path / "archivo"))
+    depurar = functools.partial(almacen.depurar, "requerimientos")
+    assert archivo.archivar_instantanea(inst, dias=30, depurar=depurar) == 2
+
+    # REQ-…-120000 (todo recibido) y REQ-…-120003 (estatus Recibido) salen de la tabla caliente.
+    vigentes = leer(almacen).df
+    assert len(vigentes) == 6
+    assert not vigentes["ID_REQ"].isin(["REQ-20240101-120000", "REQ-20240101-120003"]).any()
+    assert len(archivo.buscar("REQ-20240101-120003")) == 2
+
+    # La hoja todavía los trae: la siguiente importación no los regresa.
+    almacen.importar("requerimientos", Instantanea(hoja.copy(), "v2", time.time()),
+                     ESQUEMA_REQUERIMIENTOS)
+    assert len(leer(almacen).df) == 6
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+import requests
+
+from inventario import bandeja_salida, cliente_http
+from inventario.bandeja_salida import ENVIADO, ENVIANDO, FALLIDO, PENDIENTE, BandejaSalida
+
+
+class Respuesta:
+    def __init__(self, status_code: int = 200, data: dict | None = None):
+        self.status_code = status_code
+        self._data = data if data is not None else {"status": "ok", "inserted": 1}
+        self.text = str(self._data)
+
+    def json(self):
+        return self._data
+
+
+class ServidorFalso:
+    """Sustituye a `post_apps_script`: responde según `guion`, lote por lote."""
+
+    def __init__(self, guion=None):
+        self.guion = list(guion or [])
+        self.lotes: list[int] = []
+
+    def __call__(self, url, payload, clave, servidor_deduplica=False, **_):
+        self.lotes.append(payload["lote"])
+        paso = self.guion.pop(0) if self.guion else Respuesta()
+        if isinstance(paso, Exception):
+            raise paso
+        return paso
+
+
+@pytest.fixture
+def bandeja(tmp_path, monkeypatch):
+    monkeypatch.setattr(BandejaSalida, "iniciar", lambda self: None)
+    return BandejaSalida(str(tmp_path / "bandeja.sqlite3"))
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    falso = ServidorFalso()
+    monkeypatch.setattr(cliente_http, "post_apps_script", falso)
+    return falso
+
+
+def encolar_lotes(bandeja: BandejaSalida, lotes: int) -> int:
+    filas = [{"n": i} for i in range(lotes * cliente_http.TAMANO_LOTE)]
+    return bandeja.encolar("requerimiento", "REQ-1", "https://ejemplo", filas)
+
+
+def fila(bandeja: BandejaSalida, id_envio: int) -> tuple:
+    return bandeja._conexion().execute(
+        "SELECT estado, intentos, lotes_enviados, insertadas FROM envios WHERE id = ?",
+        (id_envio,),
+    ).fetchone()
+
+
+def listo_ya(bandeja: BandejaSalida, id_envio: int) -> None:
+    bandeja._conexion().execute("UPDATE envios SET proximo_intento = 0 WHERE id = ?", (id_envio,))
+
+
+def test_envio_en_curso_se_libera_al_vencer_el_lease(bandeja, servidor):
+    id_envio = encolar_lotes(bandeja, 1)
+    con = bandeja._conexion()
+    # Otro proceso lo reclamó hace poco: no se toca.
+    con.execute("UPDATE envios SET estado = ?, actualizado = ? WHERE id = ?",
+                (ENVIANDO, time.time(), id_envio))
+    assert not bandeja.procesar_uno()
+
+    # Ese proceso murió: pasado el lease, se reclama y se entrega.
+    con.execute("UPDATE envios SET actualizado = ? WHERE id = ?",
+                (time.time() - bandeja_salida.LEASE_SEGUNDOS - 1, id_envio))
+    assert bandeja.procesar_uno()
+    assert fila(bandeja, id_envio)[0] == ENVIADO
+
+
+def test_fallos_se_reintentan_con_backoff_hasta_marcar_fallido(bandeja, servidor):
+    id_envio = encolar_lotes(bandeja, 1)
+    servidor.guion = [Respuesta(429, {"status": "error"})] * bandeja_salida.MAX_INTENTOS
+    con = bandeja._conexion()
+
+    for intento in range(1, bandeja_salida.MAX_INTENTOS + 1):
+        antes = time.time()
+        assert bandeja.procesar_uno()
+        estado, intentos, _, _ = fila(bandeja, id_envio)
+        assert intentos == intento
+        if intento < bandeja_salida.MAX_INTENTOS:
+            assert estado == PENDIENTE
+            (proximo,) = con.execute(
+                "SELECT proximo_intento FROM envios WHERE id = ?", (id_envio,)
+            ).fetchone()
+            assert proximo - antes == pytest.approx(min(300.0, 5.0 * 2 ** (intento - 1)), abs=1)
+            # Antes de su próximo intento no se vuelve a tomar.
+            assert not bandeja.procesar_uno()
+            listo_ya(bandeja, id_envio)
+
+    assert estado == FALLIDO
+    assert not bandeja.procesar_uno()
+    (envio,) = bandeja.envios()
+    assert envio.ultimo_error == "HTTP 429"
+
+
+def test_reintento_retoma_desde_el_primer_lote_sin_confirmar(bandeja, servidor):
+    id_envio = encolar_lotes(bandeja, 3)
+    servidor.guion = [Respuesta(), Respuesta(429, {"status": "error"})]
+
+    assert bandeja.procesar_uno()
+    assert fila(bandeja, id_envio) == (PENDIENTE, 1, 1, 1)
+
+    listo_ya(bandeja, id_envio)
+    assert bandeja.procesar_uno()
+    assert servidor.lotes == [1, 2, 2, 3]
+    assert fila(bandeja, id_envio) == (ENVIADO, 2, 3, 3)
+
+
+def test_lote_sin_respuesta_no_se_reintenta_si_el_servidor_no_deduplica(bandeja, servidor):
+    id_envio = encolar_lotes(bandeja, 2)
+    servidor.guion = [Respuesta(), cliente_http.SinConfirmar("ReadTimeout")]
+
+    bandeja.procesar_uno()
+    estado, intentos, lotes_enviados, _ = fila(bandeja, id_envio)
+    assert (estado, lotes_enviados) == (FALLIDO, 1)
+    (envio,) = bandeja.envios()
+    assert "Sin confirmar el lote 2" in envio.ultimo_error
+
+    bandeja.reintentar(id_envio)
+    bandeja.procesar_uno()
+    assert servidor.lotes == [1, 2, 2]
+    assert fila(bandeja, id_envio)[0] == ENVIADO
+
+
+def test_post_no_repite_tras_timeout_de_lectura(monkeypatch):
+    llamadas = []
+
+    class Sesion:
+        def post(self, *args, **kwargs):
+            llamadas.append(1)
+            raise requests.ReadTimeout("sin respuesta")
+
+    monkeypatch.setattr(cliente_http, "obtener_sesion", lambda: Sesion())
+    monkeypatch.setattr(cliente_http.time, "sleep", lambda s: None)
+
+    with pytest.raises(cliente_http.SinConfirmar):
+        cliente_http.post_apps_script("https://ejemplo", {}, "REQ-1:1/1")
+    assert len(llamadas) == 1
+
+    with pytest.raises(requests.ReadTimeout):
+        cliente_http.post_apps_script("https://ejemplo", {}, "REQ-1:1/1", servidor_deduplica=True)
+    assert len(llamadas) == 1 + cliente_http.INTENTOS
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+import streamlit as st
+
+from inventario import envios
+from inventario.almacen import Almacen
+from inventario.bandeja_salida import BandejaSalida
+from inventario.esquemas import USER_COLUMNS
+
+
+class Archivo(io.BytesIO):
+    def __init__(self, nombre: str, contenido: bytes):
+        super().__init__(contenido)
+        self.name = nombre
+
+
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    monkeypatch.setattr(BandejaSalida, "iniciar", lambda self: None)
+    alm = Almacen(str(tmp_path / "almacen.sqlite3"))
+    folios = iter(f"INV-{n}" for n in range(1, 100))
+    monkeypatch.setattr(envios, "almacen", lambda: alm)
+    monkeypatch.setattr(envios, "generar_folio_inventario", lambda: (next(folios), "2026-10-17", "12:00:00"))
+    monkeypatch.setattr(st, "secrets", {"APPS_SCRIPT_CONSOLIDADO_URL": "https://ejemplo"})
+    return alm
+
+
+@pytest.fixture
+def errores(monkeypatch):
+    mensajes: list[str] = []
+
+    class Avance:
+        def info(self, texto):
+            pass
+
+        success = info
+
+        def error(self, texto):
+            mensajes.append(texto)
+
+    monkeypatch.setattr(st, "error", mensajes.append)
+    monkeypatch.setattr(st, "empty", Avance)
+    return mensajes
+
+
+def csv_movimientos(filas: int) -> bytes:
+    lineas = [",".join(USER_COLUMNS)] + [",".join([f"v{i}"] * len(USER_COLUMNS)) for i in range(filas)]
+    return "\n".join(lineas).encode("utf-8")
+
+
+def envios_registrados(almacen: Almacen) -> list[str]:
+    return [e.folio for e in reversed(almacen.bandeja.envios())]
+
+
+def test_archivo_sin_movimientos_no_genera_folio(almacen, errores):
+    for contenido in (b"", csv_movimientos(0)):
+        assert envios.cargar_movimientos_por_bloques(Archivo("mov.csv", contenido)) is None
+    assert len(errores) == 2
+    assert envios_registrados(almacen) == []
+
+
+def test_error_a_la_mitad_reporta_los_bloques_registrados(almacen, errores, monkeypatch):
+    registrar = almacen.registrar
+
+    def falla_en_el_tercero(tabla, columnas, filas, tipo, folio, url, extra=None):
+        if extra["bloque"] == 3:
+            raise OSError("disco lleno")
+        return registrar(tabla, columnas, filas, tipo, folio, url, extra)
+
+    monkeypatch.setattr(almacen, "registrar", falla_en_el_tercero)
+    archivo = Archivo("mov.csv", csv_movimientos(7))
+    assert envios.cargar_movimientos_por_bloques(archivo, tamano_bloque=2) is None
+
+    assert envios_registrados(almacen) == ["INV-1:b1", "INV-1:b2"]
+    (mensaje,) = errores
+    assert "se detuvo en el bloque 3" in mensaje
+    assert "Quedaron registrados 2 bloque(s) con 4 movimiento(s)" in mensaje
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from inventario import folios
+from inventario.folios import BLOQUE, GeneradorFolios, validar_nodo
+
+
+class Reloj:
+    """Sustituye a `datetime` en inventario.folios: el tiempo sólo avanza al dormir."""
+
+    def __init__(self):
+        self.actual = datetime(2026, 10, 17, 10, 30, 15)
+
+    def now(self, tz=None):
+        return self.actual
+
+    def dormir(self, segundos):
+        self.actual += timedelta(seconds=1)
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(folios, "datetime", reloj)
+    monkeypatch.setattr(folios.time, "sleep", reloj.dormir)
+    return reloj
+
+
+def test_procesos_del_mismo_servidor_no_repiten_folio_en_un_segundo(tmp_path, reloj):
+    ruta = str(tmp_path / "folios.sqlite3")
+    # Dos procesos: cada uno con su generador sobre el mismo archivo.
+    a, b = GeneradorFolios(ruta, nodo="M1"), GeneradorFolios(ruta, nodo="M1")
+
+    generados = [g.nuevo("REQ")[0] for _ in range(BLOQUE + 10) for g in (a, b)]
+    assert len(set(generados)) == len(generados)
+    assert all(f.startswith("REQ-20261017-103015-M1-") for f in generados)
+
+
+def test_servidores_distintos_se_distinguen_por_nodo(tmp_path, reloj):
+    a = GeneradorFolios(str(tmp_path / "a.sqlite3"), nodo="M1")
+    b = GeneradorFolios(str(tmp_path / "b.sqlite3"), nodo="M2")
+
+    assert a.nuevo("REQ")[0] == "REQ-20261017-103015-M1-0001"
+    assert b.nuevo("REQ")[0] == "REQ-20261017-103015-M2-0001"
+    # Cada prefijo lleva su propio consecutivo.
+    assert a.nuevo("REC")[0] == "REC-20261017-103015-M1-0001"
+
+
+def test_consecutivo_agotado_espera_al_siguiente_segundo(tmp_path, reloj, monkeypatch):
+    monkeypatch.setattr(folios, "MAX_SECUENCIA", 2)
+    generador = GeneradorFolios(str(tmp_path / "folios.sqlite3"), nodo="M1")
+
+    assert [generador.nuevo("INV")[0] for _ in range(3)] == [
+        "INV-20261017-103015-M1-0001",
+        "INV-20261017-103015-M1-0002",
+        "INV-20261017-103016-M1-0001",
+    ]
+
+
+def test_nodo_invalido():
+    assert validar_nodo(" m1 ") == "M1"
+    for nodo in ("", "ABCDE", "M-1"):
+        with pytest.raises(ValueError):
+            validar_nodo(nodo)
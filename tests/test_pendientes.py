@@ -0,0 +1,49 @@
+import time
+
+import pandas as pd
+
+from inventario.pendientes import tabla_pendientes
+from inventario.sincronizacion import Instantanea
+from tests.datos import cache_de, hoja_requerimientos
+
+
+def version(df: pd.DataFrame, nombre: str, anterior: str | None = None, origen: str = "prueba") -> Instantanea:
+    return Instantanea(df, nombre, time.time(), anterior, origen=origen)
+
+
+def construir(inst: Instantanea) -> tuple[pd.DataFrame, str]:
+    tabla, cache = cache_de("pendientes: tabla", lambda: tabla_pendientes(inst))
+    return tabla.df, cache
+
+
+def ordenada(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["ID_REQ", "INSUMO", "SKU"]).reset_index(drop=True)
+
+
+def test_version_que_extiende_a_la_anterior_se_actualiza_de_forma_incremental():
+    construir(version(hoja_requerimientos(6), "v1", origen="incremental"))
+    crecida = hoja_requerimientos(11)
+
+    incremental, cache = construir(version(crecida, "v2", anterior="v1", origen="incremental"))
+    assert cache == "incremental"
+
+    completa, cache = construir(version(crecida, "v2", origen="completa"))
+    assert cache == "fallo"
+    pd.testing.assert_frame_equal(ordenada(incremental), ordenada(completa), check_categorical=False)
+
+    _, cache = construir(version(crecida, "v2", anterior="v1", origen="incremental"))
+    assert cache == "memoria"
+
+
+def test_sin_version_anterior_conocida_se_reconstruye_completa():
+    construir(version(hoja_requerimientos(6), "v1", origen="otra"))
+
+    # La anterior es de otro origen (otra hoja o almacén): no sirve de base.
+    _, cache = construir(version(hoja_requerimientos(8), "v2", anterior="v1", origen="sin-base"))
+    assert cache == "fallo"
+
+    # Una "anterior" con más filas que la nueva tampoco.
+    construir(version(hoja_requerimientos(8), "v1", origen="recortada"))
+    tabla, cache = construir(version(hoja_requerimientos(4), "v2", anterior="v1", origen="recortada"))
+    assert cache == "fallo"
+    assert tabla["CANTIDAD PO"].sum() == hoja_requerimientos(4)["CANTIDAD"].sum()
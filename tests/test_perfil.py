@@ -0,0 +1,45 @@
+import json
+import os
+from datetime import date, timedelta
+
+from inventario import perfil
+from inventario.perfil import Medicion, RegistroJSONL
+
+
+def lineas(ruta: str) -> list[dict]:
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f]
+
+
+def medicion(nombre: str) -> Medicion:
+    return Medicion(nombre, 0, perfil.time.time(), ms=1.5)
+
+
+def test_escribir_junta_las_lineas_y_las_escribe_por_tandas(tmp_path):
+    registro = RegistroJSONL(str(tmp_path))
+    for n in range(3):
+        registro.escribir(medicion(f"paso {n}"), {"sesion": "abc"})
+    assert not os.path.exists(registro.ruta())
+
+    registro.cerrar()
+    assert [(l["nombre"], l["sesion"]) for l in lineas(registro.ruta())] == [
+        ("paso 0", "abc"), ("paso 1", "abc"), ("paso 2", "abc"),
+    ]
+
+
+def test_archivo_grande_se_rota_y_los_viejos_se_borran(tmp_path, monkeypatch):
+    monkeypatch.setattr(perfil, "MAX_BYTES_ARCHIVO", 100)
+    viejo = tmp_path / f"{(date.today() - timedelta(days=perfil.DIAS_REGISTRO + 1)).isoformat()}.jsonl"
+    viejo.write_text("{}\n")
+    registro = RegistroJSONL(str(tmp_path))
+
+    for n in range(3):
+        registro.escribir(medicion(f"paso {n}"), {})
+        registro.vaciar()
+    registro.cerrar()
+
+    hoy = registro.ruta()[:-len(".jsonl")]
+    assert [l["nombre"] for l in lineas(f"{hoy}.1.jsonl")] == ["paso 0"]
+    assert [l["nombre"] for l in lineas(f"{hoy}.2.jsonl")] == ["paso 1"]
+    assert [l["nombre"] for l in lineas(registro.ruta())] == ["paso 2"]
+    assert not viejo.exists()